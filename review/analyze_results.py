@@ -3,52 +3,103 @@ IEEE Xplore 爬取结果分析脚本
 用于合并、统计和导出爬取的文献数据
 """
 
-import json
-import glob
 import os
-from datetime import datetime
+import sys
 import csv
+import zlib
+from bisect import bisect_right
+from article_records import ArticleRecord, iter_queries, result_files
+from columnar_store import ColumnarStore
+from exporters import export_records, EXPORT_FIELDS, TOPIC_FIELDS
+from search_index import SearchIndex, fts5_available
+from near_duplicates import StreamingDeduplicator, DEFAULT_THRESHOLD
+from query_overlap import QueryOverlap
+from screening_rank import ScreeningRanker, load_criteria, CRITERIA_FILENAME
+from topic_clusters import TopicModel, DEFAULT_K
+from crawl_profiler import CrawlProfiler
+
+def _title_hash(article):
+    return zlib.crc32((article.get('title') or '').encode('utf-8'))
+
 
 class ResultAnalyzer:
-    def __init__(self, results_dir='ieee_results'):
+    def __init__(self, results_dir='ieee_results', dedupe_threshold=DEFAULT_THRESHOLD):
         self.results_dir = results_dir
-        self.all_articles = []
         self.query_stats = []
+        self.search_index = None
+        self.columnar_store = None
+        self.screening_ranker = None
+        self.topic_model = None
+        self._topic_model_current = False   # 新文献是否已分配到主题簇
+        
+        # 一次扫描得到的统计量（不保留文献本身，峰值内存只与单个结果文件有关）
+        self.article_count = 0
+        self.year_counts = {}
+        
+        # 近似去重（MinHash/LSH），阈值为估计的Jaccard相似度
+        self.dedupe_threshold = dedupe_threshold
+        self.deduplicator = None
+        self._query_starts = []       # 每个结果文件第一篇文献的加载序号，把去重序号换算为 (检索式, 文件内位置)
+        self._query_ids = []
+        self._duplicates = {}         # (检索式编号, 文件内位置) -> 标题哈希，去重时跳过
+        self._all_articles = None
         
     def load_all_results(self):
-        """加载所有结果文件"""
-        result_files = glob.glob(f"{self.results_dir}/query_*_results.json")
-        result_files.sort(key=lambda x: int(x.split('_')[1]))  # 按编号排序
+        """扫描所有结果文件：逐个文件读取，统计后即释放"""
+        print(f"找到 {len(result_files(self.results_dir))} 个结果文件")
         
-        print(f"找到 {len(result_files)} 个结果文件")
+        self.query_stats = []
+        self.article_count = 0
+        self.year_counts = {}
+        self.deduplicator = StreamingDeduplicator(threshold=self.dedupe_threshold)
+        self._query_starts = []
+        self._query_ids = []
+        self._duplicates = {}
+        self._all_articles = None
         
-        for file_path in result_files:
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    
-                    # 统计信息
-                    query_stat = {
-                        'query_id': data['query_id'],
-                        'query_text': data['query_text'][:100] + '...' if len(data['query_text']) > 100 else data['query_text'],
-                        'total_results': data.get('total_results', 'N/A'),
-                        'articles_count': data.get('articles_count', 0),
-                        'crawl_time': data.get('crawl_time', 'N/A')
-                    }
-                    self.query_stats.append(query_stat)
-                    
-                    # 收集所有文章（添加来源检索式信息）
-                    for article in data.get('articles', []):
-                        article['source_query_id'] = data['query_id']
-                        article['source_query_text'] = data['query_text']
-                        self.all_articles.append(article)
-                        
-                print(f"✓ 已加载：{file_path} - {data.get('articles_count', 0)} 篇文章")
-                
-            except Exception as e:
-                print(f"✗ 加载失败：{file_path} - {e}")
-        
-        print(f"\n总共加载了 {len(self.all_articles)} 篇文献")
+        def on_error(file_path, e):
+            print(f"✗ 加载失败：{file_path} - {e}")
+        
+        for query, articles in iter_queries(self.results_dir, on_error):
+            self.query_stats.append(query.stat())
+            self._query_starts.append(self.article_count)
+            self._query_ids.append(query.query_id)
+            for position, article in enumerate(articles):
+                year = article.get('year', 'N/A')
+                if year != 'N/A':
+                    self.year_counts[year] = self.year_counts.get(year, 0) + 1
+                if self.deduplicator.add(article) != self.article_count:
+                    self._duplicates[(query.query_id, position)] = _title_hash(article)
+                self.article_count += 1
+            print(f"✓ 已加载：query_{query.query_id} - {query.articles_count} 篇文章")
+        
+        print(f"\n总共加载了 {self.article_count} 篇文献")
+    
+    def iter_articles(self, remove_duplicates=False):
+        """逐篇生成文献记录（ArticleRecord），可选跳过重复文献和无标题文献；有主题模型时附加簇编号和高频词"""
+        duplicates = self._duplicates if remove_duplicates else {}
+        topic_model = self.topic_model
+        for query, articles in iter_queries(self.results_dir):
+            for position, article in enumerate(articles):
+                if remove_duplicates and not article.get('title', '').strip():
+                    continue
+                # 按 (检索式, 位置) 对应加载时的去重结果；标题哈希不一致说明文件已变化，保留该文献
+                if duplicates.get((query.query_id, position)) == _title_hash(article):
+                    continue
+                record = ArticleRecord(article, query)
+                if topic_model is not None:
+                    cluster, terms = topic_model.cluster_of(record)
+                    if cluster is not None:
+                        record.topic_cluster = cluster
+                        record.topic_terms = '; '.join(terms)
+                yield record
+    
+    @property
+    def all_articles(self):
+        """全部文献记录列表（兼容旧接口；会把整个语料读入内存，尽量使用 iter_articles）"""
+        if self._all_articles is None:
+            self._all_articles = list(self.iter_articles())
+        return self._all_articles
         
     def print_statistics(self):
         """打印统计信息"""
@@ -57,7 +108,7 @@ class ResultAnalyzer:
         print("="*80)
         
         print(f"\n检索式数量：{len(self.query_stats)}")
-        print(f"文献总数：{len(self.all_articles)}")
+        print(f"文献总数：{self.article_count}")
         
         # 按检索式统计
         print(f"\n{'检索式ID':<8} {'文献数':<8} {'总结果数':<15} {'爬取时间'}")
@@ -71,102 +122,116 @@ class ResultAnalyzer:
         print("-"*80)
         print(f"{'合计':<8} {total_articles:<8}")
         
-        # 年份分布
-        years = [a.get('year', 'N/A') for a in self.all_articles]
-        year_counts = {}
-        for year in years:
-            if year != 'N/A':
-                year_counts[year] = year_counts.get(year, 0) + 1
+        # 年份、期刊/会议分布（有最新的Parquet数据集时用列式扫描，不会写入数据集）
+        store = self.get_columnar_store()
+        if store is not None:
+            sorted_years = store.year_counts()[:10]
+            venues = store.venue_counts(top=10)
+        else:
+            sorted_years = sorted(self.year_counts.items(), key=lambda x: x[1], reverse=True)[:10]
+            venues = []
         
-        if year_counts:
+        if sorted_years:
             print(f"\n📅 年份分布（Top 10）：")
-            sorted_years = sorted(year_counts.items(), key=lambda x: x[1], reverse=True)[:10]
             for year, count in sorted_years:
                 print(f"  {year}: {count} 篇")
         
-        # 去重统计
-        unique_titles = set(a.get('title', '') for a in self.all_articles)
-        print(f"\n🔄 去重后文献数：{len(unique_titles)} 篇")
-        print(f"   重复文献数：{len(self.all_articles) - len(unique_titles)} 篇")
-        
-    def remove_duplicates(self):
-        """去除重复文献（基于标题）"""
-        seen_titles = set()
-        unique_articles = []
+        if venues:
+            print(f"\n🏛️  期刊/会议分布（Top 10）：")
+            for venue, count in venues:
+                print(f"  {count:>6}  {venue}")
         
-        for article in self.all_articles:
-            title = article.get('title', '').strip()
-            if title and title not in seen_titles:
-                seen_titles.add(title)
-                unique_articles.append(article)
+        # 主题簇（已训练主题模型时；只读取模型，新文献在导出时才分配）
+        topic_model = self.get_topic_model()
+        if topic_model is not None:
+            print(f"\n🧩 主题簇（Top 10，共 {topic_model.k} 个）：")
+            for cluster, count, terms in topic_model.summary()[:10]:
+                print(f"  #{cluster:<3} {count:>6} 篇  {', '.join(terms[:5])}")
         
-        print(f"\n去重前：{len(self.all_articles)} 篇")
-        print(f"去重后：{len(unique_articles)} 篇")
+        # 去重统计
+        clusters = self.find_duplicate_clusters()
+        duplicates = sum(len(c) - 1 for c in clusters)
+        print(f"\n🔄 去重后文献数：{self.article_count - duplicates} 篇（相似度阈值 {self.dedupe_threshold}）")
+        print(f"   重复文献数：{duplicates} 篇（{len(clusters)} 个重复簇）")
         
-        return unique_articles
+    def find_duplicate_clusters(self):
+        """近似重复簇（doc_id/DOI一致或标题+摘要高度相似），在加载时流式计算"""
+        if self.deduplicator is None:
+            return []
+        return list(self.deduplicator.clusters().values())
+    
+    def _slot_of(self, idx):
+        """去重序号（加载顺序） -> (检索式编号, 文件内位置)"""
+        i = bisect_right(self._query_starts, idx) - 1
+        return self._query_ids[i], idx - self._query_starts[i]
+    
+    def remove_duplicates(self):
+        """去除重复文献（近似去重，每个重复簇保留最早出现的一篇），返回记录迭代器"""
+        return self.iter_articles(remove_duplicates=True)
     
     def export_to_csv(self, output_file='all_articles.csv', remove_duplicates=True):
-        """导出为CSV文件"""
-        if not self.all_articles:
+        """导出为CSV文件（边读边写）"""
+        self._export(output_file, 'csv', remove_duplicates, '📝')
+    
+    def export_to_excel(self, output_file='all_articles.xlsx', remove_duplicates=True):
+        """导出为Excel文件（openpyxl只写模式，需要安装openpyxl）"""
+        try:
+            import openpyxl  # noqa: F401
+        except ImportError:
+            print("✗ 需要安装 openpyxl：")
+            print("  pip install openpyxl")
+            return
+        self._export(output_file, 'xlsx', remove_duplicates, '📊')
+    
+    def export_references(self, fmt='bib', output_file=None, remove_duplicates=True):
+        """导出为文献管理软件格式（bib=BibTeX，ris=RIS）"""
+        self._export(output_file or f'all_articles.{fmt}', fmt, remove_duplicates, '📚')
+    
+    def _export(self, output_file, fmt, remove_duplicates, icon):
+        if not self.article_count:
             print("没有数据可导出")
             return
         
-        articles = self.remove_duplicates() if remove_duplicates else self.all_articles
+        print(f"\n{icon} 正在导出到 {output_file}...")
+        
+        topic_model = self.get_topic_model(assign_new=True)
+        fields = EXPORT_FIELDS + TOPIC_FIELDS if topic_model is not None else EXPORT_FIELDS
+        count, _ = export_records(self.iter_articles(remove_duplicates), output_file, fmt, fields=fields)
+        
+        if remove_duplicates:
+            print(f"\n去重前：{self.article_count} 篇")
+            print(f"去重后：{count} 篇")
+        print(f"✓ 导出完成：{count} 篇文献")
+        print(f"  文件位置：{os.path.abspath(output_file)}")
+    
+    def export_duplicate_clusters(self, output_file='duplicate_clusters.csv'):
+        """导出重复簇（便于人工核查）；再扫描一遍结果文件，只保留簇成员"""
+        clusters = self.find_duplicate_clusters()
+        print(f"\n🔄 正在导出 {len(clusters)} 个重复簇到 {output_file}...")
         
-        print(f"\n📝 正在导出到 {output_file}...")
+        members_at = {self._slot_of(idx) for members in clusters for idx in members}
         
-        # 定义CSV字段
-        fieldnames = [
-            'title', 'authors', 'year', 'publisher_info', 
-            'abstract', 'link', 'source_query_id', 'source_query_text'
-        ]
+        rows = {}
+        for query, articles in iter_queries(self.results_dir):
+            for position, article in enumerate(articles):
+                if (query.query_id, position) in members_at:
+                    rows[(query.query_id, position)] = [
+                        article.get('doc_id', ''), article.get('title', ''),
+                        article.get('year', ''), article.get('publisher_info', ''), query.query_id
+                    ]
         
         with open(output_file, 'w', encoding='utf-8-sig', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            
-            for article in articles:
-                row = {field: article.get(field, 'N/A') for field in fieldnames}
-                writer.writerow(row)
+            writer = csv.writer(f)
+            writer.writerow(['cluster_id', 'kept', 'doc_id', 'title', 'year', 'publisher_info', 'source_query_id'])
+            for cluster_id, members in enumerate(clusters, 1):
+                for pos, idx in enumerate(members):
+                    slot = self._slot_of(idx)
+                    if slot in rows:
+                        writer.writerow([cluster_id, 'Y' if pos == 0 else ''] + rows[slot])
         
-        print(f"✓ 导出完成：{len(articles)} 篇文献")
+        print(f"✓ 导出完成")
         print(f"  文件位置：{os.path.abspath(output_file)}")
     
-    def export_to_excel(self, output_file='all_articles.xlsx', remove_duplicates=True):
-        """导出为Excel文件（需要pandas和openpyxl）"""
-        try:
-            import pandas as pd
-            
-            if not self.all_articles:
-                print("没有数据可导出")
-                return
-            
-            articles = self.remove_duplicates() if remove_duplicates else self.all_articles
-            
-            print(f"\n📊 正在导出到 {output_file}...")
-            
-            df = pd.DataFrame(articles)
-            
-            # 重新排列列顺序
-            column_order = [
-                'title', 'authors', 'year', 'publisher_info', 
-                'abstract', 'link', 'source_query_id', 'source_query_text'
-            ]
-            
-            # 只保留存在的列
-            column_order = [col for col in column_order if col in df.columns]
-            df = df[column_order]
-            
-            # 导出
-            df.to_excel(output_file, index=False, engine='openpyxl')
-            
-            print(f"✓ 导出完成：{len(articles)} 篇文献")
-            print(f"  文件位置：{os.path.abspath(output_file)}")
-            
-        except ImportError:
-            print("✗ 需要安装 pandas 和 openpyxl：")
-            print("  pip install pandas openpyxl")
-    
     def export_query_stats(self, output_file='query_statistics.csv'):
         """导出检索式统计信息"""
         print(f"\n📋 正在导出统计信息到 {output_file}...")
@@ -180,31 +245,159 @@ class ResultAnalyzer:
         print(f"✓ 导出完成")
         print(f"  文件位置：{os.path.abspath(output_file)}")
     
-    def search_by_keyword(self, keyword):
-        """按关键词搜索文献"""
+    def analyze_query_overlap(self, output_dir='.'):
+        """检索式重叠分析：交集矩阵、独有贡献、最小覆盖，并生成重爬计划"""
+        print(f"\n🧮 正在分析检索式重叠...")
+        overlap = QueryOverlap(self.results_dir, StreamingDeduplicator(threshold=self.dedupe_threshold)).load()
+        rows, plan, files = overlap.export(output_dir)
+        
+        print(f"\n{'检索式ID':<8} {'文献数':<8} {'独有':<8} {'覆盖序':<6}")
+        print("-"*40)
+        for row in sorted(rows, key=lambda r: r['unique'], reverse=True):
+            print(f"{row['query_id']:<8} {row['articles']:<8} {row['unique']:<8} {str(row['cover_rank']):<6}")
+        
+        print(f"\n✓ 去重后文献 {overlap.article_count} 篇，建议重爬 {len(plan['recrawl'])} 个检索式，跳过 {len(plan['skip'])} 个")
+        for path in files:
+            print(f"  文件位置：{os.path.abspath(path)}")
+        return rows
+    
+    def rank_for_screening(self, criteria_file=CRITERIA_FILENAME, output_file='screening_queue.csv'):
+        """按纳入标准/种子文献给去重后的文献打分，导出按优先级排序的筛选队列（需要numpy和scipy）"""
+        try:
+            import scipy  # noqa: F401
+        except ImportError:
+            print("✗ 需要安装 numpy 和 scipy：")
+            print("  pip install numpy scipy")
+            return
+        if not os.path.exists(criteria_file):
+            print(f"⚠️  没有找到纳入标准文件：{criteria_file}（格式见 screening_rank.py）")
+            return
+        
+        print(f"\n🎯 正在按 {criteria_file} 排序...")
+        if self.screening_ranker is None:
+            self.screening_ranker = ScreeningRanker(self.results_dir, self.dedupe_threshold).build(verbose=True)
+        count = self.screening_ranker.export_queue(load_criteria(criteria_file), output_file)
+        print(f"✓ 筛选队列已导出：{count} 篇")
+        print(f"  文件位置：{os.path.abspath(output_file)}")
+    
+    def get_topic_model(self, assign_new=False):
+        """加载已保存的主题模型；没有模型或未安装scipy时返回None
+
+        assign_new=True 时把新文献分配到已有簇（在线更新簇中心并保存模型），只在导出时使用
+        """
+        if self.topic_model is None:
+            try:
+                import scipy  # noqa: F401
+            except ImportError:
+                return None
+            model = TopicModel(self.results_dir, dedupe_threshold=self.dedupe_threshold)
+            if not model.exists():
+                return None
+            model.load()
+            self.topic_model = model
+        if assign_new and not self._topic_model_current:
+            self.topic_model.update(verbose=True)
+            self._topic_model_current = True
+        return self.topic_model
+    
+    def fit_topic_clusters(self, k=DEFAULT_K):
+        """对去重后的文献训练主题聚类（覆盖已有模型）"""
+        try:
+            import scipy  # noqa: F401
+        except ImportError:
+            print("✗ 需要安装 numpy 和 scipy：")
+            print("  pip install numpy scipy")
+            return
+        
+        print(f"\n🧩 正在聚类（k={k}）...")
+        self.topic_model = TopicModel(self.results_dir, k=k, dedupe_threshold=self.dedupe_threshold).fit(verbose=True)
+        self._topic_model_current = True
+        for cluster, count, terms in self.topic_model.summary():
+            print(f"  #{cluster:<3} {count:>6} 篇  {', '.join(terms)}")
+        print("  之后的导出会附带 topic_cluster、topic_terms 列")
+    
+    def get_columnar_store(self):
+        """打开已导出且与结果文件一致的Parquet数据集（只读，不更新）；没有、已过期或未安装pyarrow时返回None"""
+        if self.columnar_store is None:
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                return None
+            store = ColumnarStore(results_dir=self.results_dir)
+            store.partition = store.saved_partition() or store.partition
+            if not store.is_current():
+                return None
+            self.columnar_store = store
+        return self.columnar_store
+    
+    def export_dataset(self, partition='query'):
+        """导出为Parquet数据集（按检索式或年份分区，只重写变化的结果文件）"""
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            print("✗ 需要安装 pyarrow：")
+            print("  pip install pyarrow")
+            return
+        
+        print(f"\n🗂️  正在更新Parquet数据集（按{'检索式' if partition == 'query' else '年份'}分区）...")
+        store = ColumnarStore(results_dir=self.results_dir, partition=partition)
+        store.update(verbose=True)
+        print(f"  文献数：{store.count()} 篇")
+        self.columnar_store = store
+    
+    def get_search_index(self):
+        """打开磁盘倒排索引（首次打开时增量更新）"""
+        if self.search_index is None:
+            self.search_index = SearchIndex(results_dir=self.results_dir)
+            self.search_index.update()
+        return self.search_index
+    
+    def search_by_keyword(self, keyword, limit=10):
+        """按关键词搜索文献（支持布尔、短语和字段限定查询，按相关度排序）
+
+        返回全部匹配的文献，limit 只限制打印的条数
+        """
+        if fts5_available():
+            _, results = self.get_search_index().search(keyword, limit=None)
+        else:
+            results = self._scan_keyword(keyword)
+        
+        print(f"\n🔍 搜索 '{keyword}'：找到 {len(results)} 篇相关文献")
+        
+        for idx, article in enumerate(results[:limit], 1):
+            print(f"\n{idx}. {article.get('title', 'N/A')}")
+            print(f"   作者：{article.get('authors', 'N/A')}")
+            print(f"   年份：{article.get('year', 'N/A')}")
+        
+        if len(results) > limit:
+            print(f"\n... 还有 {len(results) - limit} 篇")
+        
+        return results
+    
+    def _scan_keyword(self, keyword):
+        """逐篇扫描的子串匹配（SQLite不支持FTS5时使用）"""
         results = []
         keyword_lower = keyword.lower()
         
-        for article in self.all_articles:
+        for article in self.iter_articles():
             title = article.get('title', '').lower()
             abstract = article.get('abstract', '').lower()
             
             if keyword_lower in title or keyword_lower in abstract:
                 results.append(article)
         
-        print(f"\n🔍 搜索关键词 '{keyword}'：找到 {len(results)} 篇相关文献")
-        
-        for idx, article in enumerate(results[:10], 1):  # 只显示前10个
-            print(f"\n{idx}. {article.get('title', 'N/A')}")
-            print(f"   作者：{article.get('authors', 'N/A')}")
-            print(f"   年份：{article.get('year', 'N/A')}")
-        
-        if len(results) > 10:
-            print(f"\n... 还有 {len(results) - 10} 篇")
-        
         return results
 
 
+def print_profile(profiler):
+    """结束当前剖析并输出时间分类"""
+    summary = profiler.stop() if profiler is not None else None
+    if summary:
+        main = summary['categories'].get('main', {})
+        top = '，'.join(f"{label} {seconds:.2f}s" for label, seconds in list(main.items())[:3])
+        print(f"🔬 剖析 {summary['name']}：{top or '无采样'}（报告：{summary['report']}）")
+
+
 def main():
     """主函数"""
     print("""
@@ -215,11 +408,20 @@ def main():
     
     analyzer = ResultAnalyzer()
     
+    # 剖析模式：python analyze_results.py --profile（每个分析命令一份火焰图和内存报告）
+    profiler = None
+    if '--profile' in sys.argv:
+        profiler = CrawlProfiler(os.path.join(analyzer.results_dir, 'profiles'))
+        print(f"🔬 剖析模式：报告写入 {profiler.output_dir}/\n")
+    
     # 加载所有结果
     print("📂 正在加载结果文件...\n")
+    if profiler is not None:
+        profiler.start('analyze_load')
     analyzer.load_all_results()
+    print_profile(profiler)
     
-    if not analyzer.all_articles:
+    if not analyzer.article_count:
         print("\n⚠️  没有找到任何结果文件！")
         print("   请先运行 ieee_crawler.py 进行爬取")
         return
@@ -236,30 +438,62 @@ def main():
         print("\n请选择操作：")
         print("  1. 导出为CSV（推荐，去重）")
         print("  2. 导出为CSV（保留重复）")
-        print("  3. 导出为Excel（需要安装pandas）")
+        print("  3. 导出为Excel（需要安装openpyxl）")
         print("  4. 导出检索式统计信息")
         print("  5. 按关键词搜索")
-        print("  6. 退出")
-        
-        choice = input("\n请输入选项 (1-6): ").strip()
-        
-        if choice == '1':
-            analyzer.export_to_csv('all_articles_unique.csv', remove_duplicates=True)
-        elif choice == '2':
-            analyzer.export_to_csv('all_articles_all.csv', remove_duplicates=False)
-        elif choice == '3':
-            analyzer.export_to_excel('all_articles.xlsx', remove_duplicates=True)
-        elif choice == '4':
-            analyzer.export_query_stats()
-        elif choice == '5':
-            keyword = input("请输入关键词: ").strip()
-            if keyword:
-                analyzer.search_by_keyword(keyword)
-        elif choice == '6':
-            print("\n👋 再见！")
-            break
-        else:
-            print("❌ 无效选项，请重新选择")
+        print("  6. 导出重复簇")
+        print("  7. 导出Parquet数据集（需要安装pyarrow）")
+        print("  8. 导出为BibTeX（去重）")
+        print("  9. 导出为RIS（去重）")
+        print("  10. 检索式重叠分析（生成重爬计划）")
+        print("  11. 按纳入标准排序，导出筛选队列（需要安装scipy）")
+        print("  12. 主题聚类（需要安装scipy）")
+        print("  0. 退出")
+        
+        choice = input("\n请输入选项 (0-12): ").strip()
+        
+        if profiler is not None and choice != '0':
+            profiler.start(f"analyze_{choice}")
+        try:
+            if choice == '1':
+                analyzer.export_to_csv('all_articles_unique.csv', remove_duplicates=True)
+            elif choice == '2':
+                analyzer.export_to_csv('all_articles_all.csv', remove_duplicates=False)
+            elif choice == '3':
+                analyzer.export_to_excel('all_articles.xlsx', remove_duplicates=True)
+            elif choice == '4':
+                analyzer.export_query_stats()
+            elif choice == '5':
+                keyword = input("请输入关键词（支持 AND/OR/NOT、\"短语\"、title: 限定字段）: ").strip()
+                if keyword:
+                    analyzer.search_by_keyword(keyword)
+            elif choice == '6':
+                analyzer.export_duplicate_clusters()
+            elif choice == '7':
+                partition = input("分区方式（query=按检索式，year=按年份，默认query）: ").strip() or 'query'
+                if partition in ('query', 'year'):
+                    analyzer.export_dataset(partition)
+                else:
+                    print("❌ 无效的分区方式")
+            elif choice == '8':
+                analyzer.export_references('bib')
+            elif choice == '9':
+                analyzer.export_references('ris')
+            elif choice == '10':
+                analyzer.analyze_query_overlap()
+            elif choice == '11':
+                criteria_file = input(f"纳入标准文件（默认 {CRITERIA_FILENAME}）: ").strip() or CRITERIA_FILENAME
+                analyzer.rank_for_screening(criteria_file)
+            elif choice == '12':
+                k = input(f"簇数量（默认 {DEFAULT_K}）: ").strip()
+                analyzer.fit_topic_clusters(int(k) if k.isdigit() else DEFAULT_K)
+            elif choice == '0':
+                print("\n👋 再见！")
+                break
+            else:
+                print("❌ 无效选项，请重新选择")
+        finally:
+            print_profile(profiler)
 
 
 if __name__ == "__main__":
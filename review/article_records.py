@@ -0,0 +1,182 @@
+"""
+结果文件的流式读写
+逐个文件读取 query_*_results.json，生成紧凑的文献记录后立即释放该文件的数据，
+峰值内存只与单个结果文件大小有关，而不是整个语料；
+爬虫用 ResultWriter 逐页追加文献，内存只与单页文献数有关，而不是检索式的总页数
+"""
+
+import glob
+import json
+import os
+import sys
+
+ARTICLE_FIELDS = ('title', 'link', 'authors', 'publisher_info', 'year', 'abstract',
+                  'doc_id', 'pdf_downloaded', 'pdf_path')
+# 分析阶段附加的字段（主题簇）
+EXTRA_FIELDS = ('topic_cluster', 'topic_terms')
+
+
+class QueryRef:
+    """检索式引用：同一检索式的所有文献共享一个对象，不再为每篇文献复制检索式全文"""
+    __slots__ = ('query_id', 'query_text', 'total_results', 'articles_count', 'crawl_time')
+
+    def __init__(self, query_id, query_text, total_results='N/A', articles_count=0, crawl_time='N/A'):
+        self.query_id = query_id
+        self.query_text = query_text
+        self.total_results = total_results
+        self.articles_count = articles_count
+        self.crawl_time = crawl_time
+
+    def stat(self):
+        """analyze_results 中使用的检索式统计字典"""
+        text = self.query_text
+        return {
+            'query_id': self.query_id,
+            'query_text': text[:100] + '...' if len(text) > 100 else text,
+            'total_results': self.total_results,
+            'articles_count': self.articles_count,
+            'crawl_time': self.crawl_time
+        }
+
+
+class ArticleRecord:
+    """紧凑的文献记录（__slots__），兼容字典式的 get() 访问"""
+    __slots__ = ARTICLE_FIELDS + EXTRA_FIELDS + ('query',)
+
+    def __init__(self, data, query):
+        for field in ARTICLE_FIELDS:
+            value = data.get(field)
+            # 短字符串（年份、N/A）驻留，减少重复对象
+            if isinstance(value, str) and len(value) <= 16:
+                value = sys.intern(value)
+            setattr(self, field, value)
+        self.topic_cluster = None
+        self.topic_terms = None
+        self.query = query
+
+    @property
+    def source_query_id(self):
+        return self.query.query_id
+
+    @property
+    def source_query_text(self):
+        return self.query.query_text
+
+    def get(self, key, default=None):
+        value = getattr(self, key, None) if key in self.__slots__ or key.startswith('source_') else None
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def to_dict(self):
+        data = {field: getattr(self, field) for field in ARTICLE_FIELDS}
+        for field in EXTRA_FIELDS:
+            if getattr(self, field) is not None:
+                data[field] = getattr(self, field)
+        data['source_query_id'] = self.query.query_id
+        data['source_query_text'] = self.query.query_text
+        return data
+
+
+def result_files(results_dir='ieee_results'):
+    """按检索式编号排序的结果文件列表"""
+    files = glob.glob(os.path.join(results_dir, 'query_*_results.json'))
+
+    def sort_key(path):
+        part = os.path.basename(path).split('_')[1]
+        return (0, int(part), '') if part.isdigit() else (1, 0, part)
+
+    return sorted(files, key=sort_key)
+
+
+def read_query(file_path):
+    """读取一个结果文件，返回 (QueryRef, 原始文章列表)"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    articles = data.get('articles', [])
+    query = QueryRef(
+        sys.intern(str(data['query_id'])), data.get('query_text', ''),
+        data.get('total_results', 'N/A'), data.get('articles_count', 0), data.get('crawl_time', 'N/A')
+    )
+    return query, articles
+
+
+def iter_queries(results_dir='ieee_results', on_error=None):
+    """逐个结果文件生成 (QueryRef, 原始文章列表)，处理完一个文件再读下一个"""
+    for file_path in result_files(results_dir):
+        try:
+            query, articles = read_query(file_path)
+        except Exception as e:
+            if on_error:
+                on_error(file_path, e)
+            continue
+        yield query, articles
+
+
+def iter_articles(results_dir='ieee_results', on_error=None):
+    """逐篇生成 ArticleRecord"""
+    for query, articles in iter_queries(results_dir, on_error):
+        for article in articles:
+            yield ArticleRecord(article, query)
+
+
+class ResultWriter:
+    """增量写出结果文件：逐页追加文献（每篇一行），close() 时原子替换正式文件
+
+    写出的仍是普通JSON，json.load 可以直接读取；iter_articles() 按行流式读回，用于更新语料清单
+    """
+
+    def __init__(self, filename, header):
+        self.filename = filename
+        self.header = header
+        self.count = 0
+        self._part = filename + '.part'
+        self._file = open(self._part, 'w', encoding='utf-8')
+        self._file.write('{\n')
+        for key, value in header.items():
+            self._file.write(f'  {json.dumps(key)}: {json.dumps(value, ensure_ascii=False)},\n')
+        self._file.write('  "articles": [')
+
+    def write_articles(self, articles):
+        for article in articles:
+            self._file.write(',\n    ' if self.count else '\n    ')
+            self._file.write(json.dumps(article, ensure_ascii=False))
+            self.count += 1
+
+    def close(self):
+        """写完结尾（articles_count）并替换正式文件，返回文件名"""
+        self._file.write('\n  ],\n' if self.count else '],\n')
+        self._file.write(f'  "articles_count": {self.count}\n}}\n')
+        self._file.close()
+        os.replace(self._part, self.filename)
+        return self.filename
+
+    def discard(self):
+        """放弃写到一半的文件（检索失败时），原有的正式文件保持不变"""
+        if not self._file.closed:
+            self._file.close()
+        if os.path.exists(self._part):
+            os.remove(self._part)
+
+    def iter_articles(self):
+        """逐篇读回已写完的文献"""
+        with open(self.filename, 'r', encoding='utf-8') as f:
+            in_articles = False
+            for line in f:
+                if line.startswith('  "articles": ['):
+                    in_articles = True
+                elif in_articles and line.startswith('    {'):
+                    yield json.loads(line.rstrip().rstrip(','))
+                elif in_articles:
+                    break
+
+    def document(self):
+        """不含文献列表的结果文件字段 + 流式的 articles，可直接交给 CorpusManifest.record_query"""
+        data = dict(self.header)
+        data['articles_count'] = self.count
+        data['articles'] = self.iter_articles()
+        return data
@@ -0,0 +1,54 @@
+"""
+解析器基准测试的数据和工具：读取保存的页面、合成检索结果页、测量峰值分配
+"""
+
+import os
+import random
+import tracemalloc
+
+REVIEW_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TEMPLATE_DOC_ID = '10763288'
+TEMPLATE_TITLE = ('Stress Prediction in Higher Education Students Using Psychometric Assessments '
+                  'and AOA-CNN-XGBoost Models')
+WORDS = ('adaptive', 'neural', 'network', 'stress', 'detection', 'students', 'learning', 'deep', 'model',
+         'prediction', 'wearable', 'sensor', 'signal', 'analysis', 'emotion', 'recognition', 'mental',
+         'health', 'framework', 'classification', 'transformer', 'graph', 'federated', 'optimization')
+
+
+def read_page(name):
+    with open(os.path.join(REVIEW_DIR, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def synthetic_result_page(rows, seed=0, duplicate_ratio=0.1):
+    """用 ieee_page_source.html 中真实的文献项作模板，生成含 rows 条结果的检索结果页
+
+    约 duplicate_ratio 的标题与之前的结果重复（不同检索式命中同一文献的情况）
+    """
+    page = read_page('ieee_page_source.html')
+    start = page.find('<xpl-results-item')
+    end = page.find('</xpl-results-item>') + len('</xpl-results-item>')
+    template = page[start:end]
+    rng = random.Random(seed)
+    titles = []
+    items = []
+    for i in range(rows):
+        if titles and rng.random() < duplicate_ratio:
+            title = rng.choice(titles)
+        else:
+            title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 14))).title()
+            titles.append(title)
+        items.append(template.replace(TEMPLATE_DOC_ID, str(20000000 + i)).replace(TEMPLATE_TITLE, title))
+    return page[:start] + "".join(items) + page[end:]
+
+
+def peak_allocation(fn, *args):
+    """执行一次 fn，返回 (结果, 峰值分配字节数)"""
+    tracemalloc.start()
+    try:
+        result = fn(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak
@@ -0,0 +1,44 @@
+"""
+解析器基准测试的公共夹具：阈值检查（review/ 目录由同目录 pytest.ini 的 pythonpath 加入导入路径）
+"""
+
+import json
+import os
+
+import pytest
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+THRESHOLDS_FILE = os.path.join(BENCH_DIR, 'thresholds.json')
+# 较慢的CI机器上可放宽阈值：BENCHMARK_THRESHOLD_SCALE=2 pytest benchmarks
+THRESHOLD_SCALE = float(os.environ.get('BENCHMARK_THRESHOLD_SCALE', '1'))
+
+
+@pytest.fixture(scope='session')
+def thresholds():
+    with open(THRESHOLDS_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def check_threshold(thresholds):
+    """基准结束后按 thresholds.json 检查：每行平均耗时（微秒）和每行峰值分配（字节）
+
+    超过阈值时测试失败，CI据此发现热点路径的性能退化
+    """
+
+    def check(benchmark, name, rows, peak_bytes=None):
+        limits = thresholds[name]
+        mean_us = benchmark.stats.stats.mean * 1e6 / rows
+        benchmark.extra_info['rows'] = rows
+        benchmark.extra_info['rows_per_second'] = round(rows / benchmark.stats.stats.mean)
+        benchmark.extra_info['us_per_row'] = round(mean_us, 3)
+        max_us = limits['max_us_per_row'] * THRESHOLD_SCALE
+        assert mean_us <= max_us, f"{name}：每行 {mean_us:.2f} 微秒，超过阈值 {max_us:g} 微秒"
+        if peak_bytes is not None:
+            per_row = peak_bytes / rows
+            benchmark.extra_info['peak_bytes_per_row'] = round(per_row)
+            max_bytes = limits['max_peak_bytes_per_row'] * THRESHOLD_SCALE
+            assert per_row <= max_bytes, f"{name}：每行峰值分配 {per_row:.0f} 字节，超过阈值 {max_bytes:g} 字节"
+
+    return check
@@ -0,0 +1,87 @@
+"""
+离线解析器基准测试（pytest-benchmark），不需要浏览器和网络
+
+    pip install pytest pytest-benchmark                  # 见 requirements.txt 的可选部分
+    pytest benchmarks                                    # 运行并按 thresholds.json 检查
+    pytest benchmarks --benchmark-autosave               # 保存本机基线
+    pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:25%   # 与基线比较，变慢超过25%失败
+"""
+
+import pytest
+
+from bench_data import read_page, synthetic_result_page, peak_allocation
+from page_parser import parse_result_page, find_pdf_url, safe_pdf_filename, doc_id_from_link
+from near_duplicates import StreamingDeduplicator
+
+SIZES = (25, 100, 1000)
+
+
+@pytest.fixture(scope='module', params=SIZES, ids=lambda n: f"{n}rows")
+def result_page(request):
+    return request.param, synthetic_result_page(request.param)
+
+
+@pytest.fixture(scope='module')
+def articles_1000():
+    return parse_result_page(synthetic_result_page(1000))
+
+
+def test_saved_result_page(benchmark, check_threshold):
+    """ieee_page_source.html（真实检索结果页，含大量样式和脚本）"""
+    html = read_page('ieee_page_source.html')
+    articles = benchmark(parse_result_page, html)
+    assert len(articles) == 1
+    assert articles[0]['doc_id'] == '10763288'
+    assert articles[0]['authors'].startswith('Sarthak Sharma')
+    check_threshold(benchmark, 'saved_result_page', len(articles))
+
+
+def test_saved_pdf_viewer_page(benchmark, check_threshold):
+    """debug_page_source.html（PDF查看器页）中查找getPDF地址"""
+    html = read_page('debug_page_source.html')
+    url = benchmark(find_pdf_url, html)
+    assert url and 'getPDF.jsp' in url and '&amp;' not in url
+    check_threshold(benchmark, 'saved_pdf_viewer_page', 1)
+
+
+def test_extract_throughput(benchmark, check_threshold, result_page):
+    """合成检索结果页的提取吞吐量（行/秒）和峰值分配"""
+    rows, html = result_page
+    articles = benchmark(parse_result_page, html)
+    assert len(articles) == rows
+    _, peak = peak_allocation(parse_result_page, html)
+    check_threshold(benchmark, f'extract_{rows}', rows, peak)
+
+
+def test_pdf_filenames(benchmark, check_threshold, articles_1000):
+    """PDF文件名和文档ID（下载每篇文献时计算）"""
+
+    def names():
+        return [safe_pdf_filename(doc_id_from_link(a['link'], i), a['title'])
+                for i, a in enumerate(articles_1000, 1)]
+
+    result = benchmark(names)
+    assert len(set(result)) == len(articles_1000)
+    check_threshold(benchmark, 'pdf_filenames', len(articles_1000))
+
+
+def test_dedupe_exact_titles(benchmark, check_threshold, articles_1000):
+    """按标题精确去重（search_query 中的统计）"""
+    unique = benchmark(lambda: len(set(a['title'] for a in articles_1000)))
+    assert 0 < unique < len(articles_1000)
+    check_threshold(benchmark, 'dedupe_exact_titles', len(articles_1000))
+
+
+def test_dedupe_near_duplicates(benchmark, check_threshold, articles_1000):
+    """近似重复检测（StreamingDeduplicator，导出和统计时使用）"""
+
+    def dedupe():
+        deduplicator = StreamingDeduplicator()
+        for article in articles_1000:
+            deduplicator.add(article)
+        return deduplicator.duplicate_count
+
+    duplicates = benchmark.pedantic(dedupe, rounds=3, iterations=1)
+    assert duplicates > 0
+    _, peak = peak_allocation(dedupe)
+    check_threshold(benchmark, 'dedupe_near_duplicates', len(articles_1000), peak)
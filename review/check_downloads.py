@@ -1,11 +1,10 @@
 """检查每个检索式的文献和PDF下载情况"""
-import json
-import os
-import glob
+import sys
+from corpus_manifest import open_manifest
 
-results_dir = 'ieee_results'
-result_files = sorted(glob.glob(f"{results_dir}/query_*_results.json"), 
-                     key=lambda x: int(os.path.basename(x).split('_')[1]))
+# --sync：先把手动增删的PDF和修改过的结果文件同步到清单
+manifest = open_manifest(sync='--sync' in sys.argv)
+summaries = manifest.query_summaries()
 
 print("\n" + "="*80)
 print("检索式文献和PDF下载详细统计")
@@ -15,17 +14,13 @@ total_articles = 0
 total_pdfs = 0
 queries_with_results = 0
 
-for file in result_files:
-    with open(file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    query_id = data['query_id']
-    articles_count = data.get('articles_count', 0)
-    articles = data.get('articles', [])
+for summary in summaries:
+    query_id = summary['query_id']
+    articles_count = summary['articles_count'] or 0
     
     if articles_count > 0:
         queries_with_results += 1
-        pdfs_downloaded = sum(1 for a in articles if a.get('pdf_downloaded', False))
+        pdfs_downloaded = summary['pdfs_downloaded']
         
         print(f"\n检索式 #{query_id:>2}: 找到 {articles_count:>2} 篇文献, 下载 {pdfs_downloaded:>2} 个PDF", end="")
         
@@ -36,8 +31,8 @@ for file in result_files:
         
         # 显示前3篇的标题
         if articles_count <= 3:
-            for i, article in enumerate(articles, 1):
-                pdf_status = "✓" if article.get('pdf_downloaded') else "✗"
+            for i, article in enumerate(manifest.query_articles(query_id, limit=3), 1):
+                pdf_status = "✓" if article['pdf_downloaded'] else "✗"
                 print(f"  {i}. [{pdf_status}] {article['title'][:60]}...")
         
         total_articles += articles_count
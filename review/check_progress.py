@@ -2,16 +2,84 @@
 查看爬取进度
 """
 
+import csv
 import json
 import os
-import glob
-from datetime import datetime
+import sys
+from corpus_manifest import open_manifest
+from status_server import fetch_status
 
-def check_progress():
+CSV_FILE = 'IEEE_Xplore_检索式汇总_修正版.csv'
+
+
+def count_queries(csv_file=CSV_FILE):
+    """统计CSV中的检索式数量"""
+    if not os.path.exists(csv_file):
+        return 0
+    with open(csv_file, 'r', encoding='utf-8') as f:
+        return sum(1 for _ in csv.DictReader(f))
+
+
+def tail_lines(path, count=5, block_size=4096):
+    """从文件末尾向前读取最后几行，不加载整个文件"""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        data = b''
+        while end > 0 and data.count(b'\n') <= count:
+            read_size = min(block_size, end)
+            end -= read_size
+            f.seek(end)
+            data = f.read(read_size) + data
+    lines = data.decode('utf-8', errors='replace').splitlines()
+    return lines[-count:]
+
+
+def print_live_status(status):
+    """打印运行中爬虫的实时状态"""
+    p = status['progress']
+    c = status['current']
+    t = status['throughput']
+    eta = status.get('eta_seconds')
+    
+    print(f"\n状态统计（实时）：")
+    print(f"  已完成：{p['completed']}/{p['total']} 个检索式 ({p['percent']:.1f}%)")
+    print(f"  失败：{p['failed']} 个")
+    print(f"  剩余：{p['remaining']} 个")
+    if eta is not None:
+        print(f"  预计剩余时间：{eta // 3600}小时{eta % 3600 // 60}分")
+    
+    if c['query_id']:
+        print(f"\n当前检索式：#{c['query_id']}（第 {c['page']} 页，阶段：{c['stage'] or '-'}）")
+    print(f"\n吞吐：{t['queries_per_hour']} 检索式/小时，{t['articles_per_minute']} 篇/分钟")
+    print(f"  本次已提取文献：{t['articles_extracted']} 篇，下载PDF：{t['pdfs_downloaded']} 个")
+    
+    if status['recent_errors']:
+        print(f"\n最近错误：")
+        for entry in status['recent_errors'][-5:]:
+            print(f"  {entry['time']} {entry['level']} {entry['message']}")
+    
+    print(f"\n最近日志：")
+    for entry in status['recent_log'][-5:]:
+        print(f"  {entry['time']} {entry['level']} {entry['message']}")
+
+
+def check_progress(sync=False):
     print("\n" + "="*60)
     print("IEEE Xplore 爬虫进度查看")
     print("="*60)
     
+    # 爬虫正在运行时直接读取内存状态，不扫描任何文件
+    status = fetch_status()
+    if status is not None:
+        print_live_status(status)
+        print("\n" + "="*60)
+        print("提示：")
+        print("  - 浏览器查看：http://127.0.0.1:8765/")
+        print("  - 停止爬虫：按 Ctrl+C")
+        print("="*60 + "\n")
+        return
+    
     # 读取进度文件
     progress_file = 'crawl_progress.json'
     if os.path.exists(progress_file):
@@ -20,54 +88,53 @@ def check_progress():
         
         completed = len(progress.get('completed', []))
         failed = len(progress.get('failed', []))
-        total = 80
+        total = count_queries() or completed
         
         print(f"\n状态统计：")
-        print(f"  已完成：{completed}/{total} 个检索式 ({completed/total*100:.1f}%)")
+        print(f"  已完成：{completed}/{total} 个检索式 ({completed/total*100 if total else 0:.1f}%)")
         print(f"  失败：{failed} 个")
         print(f"  剩余：{total - completed} 个")
-        
+        if failed:
+            categories = {}
+            for entry in progress['failed']:
+                category = entry.get('category', 'other')
+                categories[category] = categories.get(category, 0) + 1
+            print(f"  失败原因：" + "，".join(f"{k} {v}" for k, v in sorted(categories.items())))
+        failed_pdfs = len(progress.get('failed_pdfs', []))
+        if failed or failed_pdfs:
+            print(f"  PDF下载失败（可重试）：{failed_pdfs} 篇")
+            print(f"  重试失败的条目：python ieee_crawler.py --retry-failed")
+
+        high_water = progress.get('high_water', {})
+        if high_water:
+            last_check = max(entry.get('checked_at', '') for entry in high_water.values())
+            new_items = sum(entry.get('new_items', 0) for entry in high_water.values())
+            print(f"  增量爬取：{len(high_water)} 个检索式有高水位，最近检查 {last_check[:19]}，"
+                  f"最近一次新增 {new_items} 篇（python ieee_crawler.py --incremental）")
+
         last_time = progress.get('last_query_time')
         if last_time:
             print(f"  最后更新：{last_time[:19]}")
     else:
         print("\n未找到进度文件，爬虫可能还未启动")
     
-    # 检查结果文件
+    # 结果文件和PDF统计（来自语料清单）
     result_dir = 'ieee_results'
     if os.path.exists(result_dir):
-        result_files = glob.glob(f"{result_dir}/query_*_results.json")
-        print(f"\n结果文件：{len(result_files)} 个")
-        
-        total_articles = 0
-        for file in result_files:
-            try:
-                with open(file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    total_articles += data.get('articles_count', 0)
-            except:
-                pass
-        
-        print(f"  已提取文献：{total_articles} 篇")
-    
-    # 检查PDF文件
-    pdf_dir = 'ieee_pdfs'
-    if os.path.exists(pdf_dir):
-        pdf_files = [f for f in os.listdir(pdf_dir) if f.endswith('.pdf')]
-        print(f"\nPDF文件：{len(pdf_files)} 个")
+        totals = open_manifest(result_dir, sync=sync).totals()
+        print(f"\n结果文件：{totals['queries']} 个")
+        print(f"  已提取文献：{totals['articles']} 篇")
         
-        if pdf_files:
-            total_size = sum(os.path.getsize(os.path.join(pdf_dir, f)) for f in pdf_files)
-            print(f"  总大小：{total_size / (1024*1024):.2f} MB")
+        print(f"\nPDF文件：{totals['pdf_files']} 个")
+        if totals['pdf_files']:
+            print(f"  总大小：{totals['pdf_bytes'] / (1024*1024):.2f} MB")
     
     # 检查日志最后几行
     log_file = 'ieee_crawler.log'
     if os.path.exists(log_file):
         print(f"\n最近日志：")
-        with open(log_file, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-            for line in lines[-5:]:
-                print(f"  {line.strip()}")
+        for line in tail_lines(log_file, 5):
+            print(f"  {line.strip()}")
     
     print("\n" + "="*60)
     print("提示：")
@@ -78,6 +145,6 @@ def check_progress():
 
 
 if __name__ == "__main__":
-    check_progress()
+    check_progress(sync='--sync' in sys.argv)
 
 
@@ -0,0 +1,370 @@
+"""
+参考文献抽取与引用图
+从 ieee_pdfs/ 中每个PDF的参考文献部分抽取并规范化参考文献条目（进程池并行；已提取全文的直接读取
+ieee_fulltext/ 中的sidecar，否则用pypdf提取），按DOI或标题模糊匹配（MinHash/LSH）解析到本地语料，
+写入磁盘上的引用图 ieee_results/citation_graph.db：
+
+    refs       每条参考文献：引用方doc_id、序号、原文、标题、DOI、年份、目标键、解析到的本地doc_id
+    processed  已处理的PDF（按SHA-256判断是否需要重新抽取）
+
+引用方/被引方/目标键上都有索引，入度排名和"被语料引用但尚未爬取"的列表直接由SQL查询得到，不需要重新扫描PDF
+
+用法：
+    python citation_graph.py build [--force]      # 增量抽取并解析
+    python citation_graph.py top [N]              # 本地语料中被引次数最多的文献
+    python citation_graph.py missing [N]          # 被引用但尚未爬取的文献（滚雪球检索候选）
+"""
+
+import csv
+import os
+import re
+import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from article_records import iter_articles
+from fulltext_extractor import DEFAULT_FULLTEXT_DIR, doc_id_from_filename, find_doi, load_fulltext
+from near_duplicates import NearDuplicateDetector, normalize_text, title_shingles, normalize_doi
+
+GRAPH_FILENAME = 'citation_graph.db'
+# 参考文献标题与本地语料标题的相似度阈值
+TITLE_MATCH_THRESHOLD = 0.8
+MIN_TITLE_CHARS = 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS refs (
+    id INTEGER PRIMARY KEY,
+    citing_doc_id TEXT NOT NULL,
+    ordinal INTEGER,
+    raw TEXT,
+    title TEXT,
+    doi TEXT,
+    year INTEGER,
+    target_key TEXT,
+    cited_doc_id TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_refs_citing ON refs(citing_doc_id);
+CREATE INDEX IF NOT EXISTS idx_refs_cited ON refs(cited_doc_id);
+CREATE INDEX IF NOT EXISTS idx_refs_target ON refs(target_key);
+CREATE TABLE IF NOT EXISTS processed (
+    doc_id TEXT PRIMARY KEY,
+    filename TEXT,
+    sha256 TEXT,
+    refs INTEGER,
+    error TEXT,
+    processed_at TEXT
+);
+"""
+
+RE_REFERENCES_HEADING = re.compile(r'^\s*(?:[IVX]+\.\s*|\d+\.?\s*)?(?:REFERENCES|References|BIBLIOGRAPHY|Bibliography)\s*$',
+                                   re.MULTILINE)
+RE_BRACKET_ENTRY = re.compile(r'(?:^|\s)\[(\d{1,3})\]\s+')
+RE_NUMBERED_ENTRY = re.compile(r'^\s*(\d{1,3})\.\s+', re.MULTILINE)
+RE_QUOTED_TITLE = re.compile(r'[“"](.{10,300}?)[,.]?\s*[”"]')
+RE_YEAR = re.compile(r'\b(19[5-9]\d|20\d\d)\b')
+RE_HYPHEN_BREAK = re.compile(r'(\w)-\s*\n\s*(\w)')
+RE_SPACES = re.compile(r'\s+')
+
+
+def references_section(text):
+    """参考文献部分（最后一个 REFERENCES 标题之后的文本）；找不到时返回空字符串"""
+    matches = list(RE_REFERENCES_HEADING.finditer(text))
+    if not matches:
+        return ''
+    return text[matches[-1].end():]
+
+
+def split_references(section):
+    """把参考文献部分切分为条目：[(序号, 文本)]；支持 [1] 和 1. 两种编号"""
+    section = RE_HYPHEN_BREAK.sub(r'\1\2', section)
+    for pattern in (RE_BRACKET_ENTRY, RE_NUMBERED_ENTRY):
+        marks = list(pattern.finditer(section))
+        if len(marks) < 2:
+            continue
+        entries = []
+        expected = 1
+        for i, m in enumerate(marks):
+            number = int(m.group(1))
+            # 编号需要大致连续，过滤正文中的 [3] 之类引用标记
+            if number != expected:
+                continue
+            end = marks[i + 1].start() if i + 1 < len(marks) else len(section)
+            text = RE_SPACES.sub(' ', section[m.end():end]).strip()
+            if text:
+                entries.append((number, text))
+            expected += 1
+        if entries:
+            return entries
+    return []
+
+
+def parse_reference(text):
+    """解析一条参考文献：{'title', 'doi', 'year'}"""
+    title_match = RE_QUOTED_TITLE.search(text)
+    years = RE_YEAR.findall(text)
+    return {
+        'title': title_match.group(1).strip() if title_match else None,
+        'doi': normalize_doi(find_doi(text)),
+        'year': int(years[-1]) if years else None,
+    }
+
+
+def target_key(ref):
+    """被引文献的归并键：优先DOI，其次规范化标题"""
+    if ref['doi']:
+        return f"doi:{ref['doi']}"
+    if ref['title']:
+        norm = normalize_text(ref['title'])
+        if len(norm) >= MIN_TITLE_CHARS:
+            return f"t:{norm}"
+    return None
+
+
+def extract_references(task):
+    """抽取单个PDF的参考文献（在子进程中运行）"""
+    pdf_path, doc_id, sha256, fulltext_dir = task
+    result = {'doc_id': doc_id, 'filename': os.path.basename(pdf_path), 'sha256': sha256, 'refs': [], 'error': None}
+    try:
+        record = load_fulltext(doc_id, fulltext_dir)
+        if record and record.get('sha256') == sha256:
+            pages = record.get('pages', [])
+        else:
+            import logging
+            from pypdf import PdfReader
+
+            logging.getLogger('pypdf').setLevel(logging.ERROR)
+            reader = PdfReader(pdf_path)
+            if reader.is_encrypted:
+                reader.decrypt('')
+            pages = []
+            for page in reader.pages:
+                try:
+                    pages.append(page.extract_text() or '')
+                except Exception:
+                    pages.append('')
+        for number, text in split_references(references_section('\n'.join(pages))):
+            ref = parse_reference(text)
+            ref.update(ordinal=number, raw=text[:1000])
+            result['refs'].append(ref)
+    except Exception as e:
+        result['error'] = str(e)[:200]
+    return result
+
+
+class CorpusTitleIndex:
+    """本地语料的DOI/标题索引，用于把参考文献解析到doc_id"""
+
+    def __init__(self, threshold=TITLE_MATCH_THRESHOLD):
+        self.detector = NearDuplicateDetector(threshold=threshold)
+        self.by_doi = {}
+        self.by_title = {}
+        self.signatures = {}
+        self.buckets = {}
+
+    def add(self, doc_id, title, doi=None):
+        if doi:
+            self.by_doi.setdefault(normalize_doi(doi), doc_id)
+        norm = normalize_text(title or '')
+        if len(norm) < MIN_TITLE_CHARS or norm in self.by_title:
+            return
+        self.by_title[norm] = doc_id
+        sig = self.detector.signature(title_shingles(norm))
+        self.signatures[doc_id] = sig
+        for band, key in enumerate(self.detector.band_keys(sig)):
+            self.buckets.setdefault((band, key), []).append(doc_id)
+
+    def resolve(self, ref):
+        """返回本地doc_id或None"""
+        if ref.get('doi') and ref['doi'] in self.by_doi:
+            return self.by_doi[ref['doi']]
+        if not ref.get('title'):
+            return None
+        norm = normalize_text(ref['title'])
+        if norm in self.by_title:
+            return self.by_title[norm]
+        if len(norm) < MIN_TITLE_CHARS:
+            return None
+        sig = self.detector.signature(title_shingles(norm))
+        seen = set()
+        best, best_sim = None, 0.0
+        for band, key in enumerate(self.detector.band_keys(sig)):
+            for doc_id in self.buckets.get((band, key), ()):
+                if doc_id in seen:
+                    continue
+                seen.add(doc_id)
+                sim = float((self.signatures[doc_id] == sig).mean())
+                if sim > best_sim:
+                    best, best_sim = doc_id, sim
+        return best if best_sim >= self.detector.threshold else None
+
+
+class CitationGraph:
+    """磁盘上的引用图"""
+
+    def __init__(self, results_dir='ieee_results', pdf_dir='ieee_pdfs', fulltext_dir=DEFAULT_FULLTEXT_DIR, db_path=None):
+        self.results_dir = results_dir
+        self.pdf_dir = pdf_dir
+        self.fulltext_dir = fulltext_dir
+        self.db_path = db_path or os.path.join(results_dir, GRAPH_FILENAME)
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    # ------------------------------------------------------------------
+    # 构建
+    # ------------------------------------------------------------------
+
+    def corpus_index(self, manifest=None):
+        index = CorpusTitleIndex()
+        dois = {}
+        if manifest is not None:
+            dois = {r['doc_id']: r['doi'] for r in manifest.fulltext_records() if r.get('doi')}
+        for article in iter_articles(self.results_dir):
+            doc_id = article.get('doc_id')
+            if doc_id and not str(doc_id).startswith('doc_'):
+                index.add(str(doc_id), article.get('title'), dois.get(str(doc_id)))
+        return index
+
+    def build(self, manifest, workers=None, force=False, verbose=True):
+        """抽取新增/变化PDF的参考文献，并重新解析尚未解析到本地语料的条目"""
+        manifest.sync_pdfs()
+        done = {} if force else {r['doc_id']: r['sha256'] for r in self.conn.execute('SELECT doc_id, sha256 FROM processed')}
+
+        tasks = []
+        for pdf in manifest.pdf_files():
+            doc_id = doc_id_from_filename(pdf['filename'])
+            if done.get(doc_id) == pdf['sha256']:
+                continue
+            tasks.append((os.path.join(manifest.pdf_dir, pdf['filename']), doc_id, pdf['sha256'], self.fulltext_dir))
+
+        if verbose:
+            print(f"📚 正在抽取 {len(tasks)} 个PDF的参考文献...")
+        if len(tasks) <= 1 or workers == 1:
+            results = [extract_references(t) for t in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(extract_references, tasks, chunksize=max(1, len(tasks) // 64)))
+
+        index = self.corpus_index(manifest)
+        now = datetime.now().isoformat()
+        with self.conn:
+            for result in results:
+                self.conn.execute('DELETE FROM refs WHERE citing_doc_id = ?', (result['doc_id'],))
+                self.conn.executemany(
+                    'INSERT INTO refs (citing_doc_id, ordinal, raw, title, doi, year, target_key, cited_doc_id) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    [(result['doc_id'], ref['ordinal'], ref['raw'], ref['title'], ref['doi'], ref['year'],
+                      target_key(ref), index.resolve(ref)) for ref in result['refs']]
+                )
+                self.conn.execute('INSERT OR REPLACE INTO processed VALUES (?, ?, ?, ?, ?, ?)',
+                                  (result['doc_id'], result['filename'], result['sha256'],
+                                   len(result['refs']), result['error'], now))
+
+            # 语料增长后，之前未解析的条目可能已经可以解析
+            resolved = 0
+            rows = self.conn.execute('SELECT id, title, doi FROM refs WHERE cited_doc_id IS NULL').fetchall()
+            for row in rows:
+                doc_id = index.resolve({'title': row['title'], 'doi': row['doi']})
+                if doc_id:
+                    self.conn.execute('UPDATE refs SET cited_doc_id = ? WHERE id = ?', (doc_id, row['id']))
+                    resolved += 1
+
+        if verbose:
+            refs = sum(len(r['refs']) for r in results)
+            failed = [r for r in results if r['error']]
+            print(f"✓ 抽取 {refs} 条参考文献（失败 {len(failed)} 个PDF），新解析到本地语料 {resolved} 条")
+            totals = self.totals()
+            print(f"  引用图：{totals['citing']} 篇施引文献，{totals['refs']} 条参考文献，"
+                  f"其中 {totals['resolved']} 条指向本地语料")
+        return results
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    def totals(self):
+        row = self.conn.execute("""
+            SELECT COUNT(*) AS refs, COUNT(DISTINCT citing_doc_id) AS citing, COUNT(cited_doc_id) AS resolved
+            FROM refs
+        """).fetchone()
+        return dict(row)
+
+    def references(self, doc_id):
+        """某篇文献的参考文献列表"""
+        return [dict(r) for r in self.conn.execute(
+            'SELECT * FROM refs WHERE citing_doc_id = ? ORDER BY ordinal', (doc_id,))]
+
+    def cited_by(self, doc_id):
+        """本地语料中引用了该文献的doc_id列表"""
+        return [r[0] for r in self.conn.execute(
+            'SELECT DISTINCT citing_doc_id FROM refs WHERE cited_doc_id = ?', (doc_id,))]
+
+    def in_degree_ranking(self, limit=20):
+        """本地语料中被引次数最多的文献：[(doc_id, 被引次数)]"""
+        return [tuple(r) for r in self.conn.execute("""
+            SELECT cited_doc_id, COUNT(DISTINCT citing_doc_id) AS n
+            FROM refs WHERE cited_doc_id IS NOT NULL AND cited_doc_id != citing_doc_id
+            GROUP BY cited_doc_id ORDER BY n DESC LIMIT ?
+        """, (limit,))]
+
+    def not_harvested(self, limit=50):
+        """被语料引用、但尚未爬取的文献（按被引次数排序）"""
+        return [dict(r) for r in self.conn.execute("""
+            SELECT target_key, MAX(title) AS title, MAX(doi) AS doi, MAX(year) AS year,
+                   COUNT(DISTINCT citing_doc_id) AS cited_by, MIN(raw) AS example
+            FROM refs WHERE cited_doc_id IS NULL AND target_key IS NOT NULL
+            GROUP BY target_key ORDER BY cited_by DESC, year DESC LIMIT ?
+        """, (limit,))]
+
+    def export_not_harvested(self, output_file='snowball_candidates.csv', limit=1000):
+        rows = self.not_harvested(limit)
+        with open(output_file, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=['cited_by', 'title', 'doi', 'year', 'target_key', 'example'])
+            writer.writeheader()
+            for row in rows:
+                writer.writerow({k: row[k] for k in writer.fieldnames})
+        return len(rows)
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] not in ('build', 'top', 'missing'):
+        print(__doc__)
+        return
+
+    graph = CitationGraph()
+    if args[0] == 'build':
+        try:
+            import pypdf  # noqa: F401
+        except ImportError:
+            print("✗ 需要安装 pypdf：")
+            print("  pip install pypdf")
+            return
+        from corpus_manifest import open_manifest
+
+        graph.build(open_manifest(), force='--force' in args)
+        return
+
+    limit = int(args[1]) if len(args) > 1 and args[1].isdigit() else 20
+    if args[0] == 'top':
+        print(f"\n🏆 本地语料中被引最多的文献（Top {limit}）：")
+        for doc_id, n in graph.in_degree_ranking(limit):
+            print(f"  {n:>5}  {doc_id}")
+    else:
+        print(f"\n🔎 被引用但尚未爬取的文献（Top {limit}）：")
+        for row in graph.not_harvested(limit):
+            label = row['title'] or row['example'][:100]
+            print(f"  {row['cited_by']:>5}  {label}  {row['doi'] or ''}")
+        count = graph.export_not_harvested()
+        print(f"\n✓ 已导出 {count} 条到 snowball_candidates.csv")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""
+列式文献数据集（Apache Arrow / Parquet）
+把 ieee_results/ 中的结果文件转为按检索式或年份分区的Parquet数据集，供统计和下游筛选工具直接读取：
+
+    ieee_results/dataset/query_id=<id>/part.parquet          # 按检索式分区（默认）
+    ieee_results/dataset/year=<year>/query_<id>.parquet      # 按年份分区
+
+作者、期刊/会议（venue）、检索式列使用字典编码；只重写内容变化的结果文件对应的分片。
+分区列同时保存在文件中，目录名只用于组织文件，下游工具可以直接读取单个分片。
+统计只读取需要的列，用向量化计算完成
+需要安装 pyarrow：pip install pyarrow
+
+用法：
+    python columnar_store.py update [--partition query|year]   # 增量更新数据集
+    python columnar_store.py stats                             # 年份/venue/作者分布
+"""
+
+import json
+import os
+import shutil
+import sys
+import time
+
+from article_records import read_query, result_files
+
+DEFAULT_DATASET_DIR = 'dataset'
+SOURCES_FILENAME = '_sources.json'
+PARTITIONS = ('query', 'year')
+BATCH_SIZE = 4096
+UNKNOWN_YEAR = 'unknown'
+
+
+def venue_of(publisher_info):
+    """从发表信息中提取期刊/会议名（第一行，去掉 Year:/Volume: 等后缀）"""
+    if not publisher_info or publisher_info == 'N/A':
+        return None
+    venue = publisher_info.strip().splitlines()[0]
+    for sep in ('Year:', ' | '):
+        venue = venue.split(sep, 1)[0]
+    return venue.strip() or None
+
+
+def split_authors(authors):
+    if not authors or authors == 'N/A':
+        return []
+    return [a.strip() for a in authors.replace('\n', ';').split(';') if a.strip()]
+
+
+def parse_year(year):
+    try:
+        return int(str(year).strip()[:4])
+    except (TypeError, ValueError):
+        return None
+
+
+def _schema(pa):
+    dict_string = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ('doc_id', pa.string()),
+        ('title', pa.string()),
+        ('authors', pa.list_(dict_string)),
+        ('venue', dict_string),
+        ('publisher_info', pa.string()),
+        ('year', pa.int16()),
+        ('abstract', pa.string()),
+        ('link', pa.string()),
+        ('pdf_downloaded', pa.bool_()),
+        ('query_id', dict_string),
+    ])
+
+
+def _to_table(pa, schema, columns):
+    arrays = []
+    for field in schema:
+        values = columns[field.name]
+        if pa.types.is_dictionary(field.type):
+            arrays.append(pa.array(values, pa.string()).dictionary_encode())
+        elif pa.types.is_list(field.type):
+            flat = pa.array([a for authors in values for a in authors], pa.string()).dictionary_encode()
+            offsets = [0]
+            for authors in values:
+                offsets.append(offsets[-1] + len(authors))
+            arrays.append(pa.ListArray.from_arrays(pa.array(offsets, pa.int32()), flat))
+        else:
+            arrays.append(pa.array(values, field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def _article_columns(query_id, articles):
+    columns = {name: [] for name in ('doc_id', 'title', 'authors', 'venue', 'publisher_info', 'year',
+                                     'abstract', 'link', 'pdf_downloaded', 'query_id')}
+    for article in articles:
+        columns['doc_id'].append(article.get('doc_id'))
+        columns['title'].append(article.get('title'))
+        columns['authors'].append(split_authors(article.get('authors')))
+        columns['venue'].append(venue_of(article.get('publisher_info')))
+        columns['publisher_info'].append(article.get('publisher_info'))
+        columns['year'].append(parse_year(article.get('year')))
+        columns['abstract'].append(article.get('abstract'))
+        columns['link'].append(article.get('link'))
+        columns['pdf_downloaded'].append(bool(article.get('pdf_downloaded')))
+        columns['query_id'].append(query_id)
+    return columns
+
+
+class ColumnarStore:
+    """结果文件的Parquet数据集"""
+
+    def __init__(self, results_dir='ieee_results', dataset_dir=None, partition='query'):
+        if partition not in PARTITIONS:
+            raise ValueError(f"不支持的分区方式：{partition}（可选 {', '.join(PARTITIONS)}）")
+        self.results_dir = results_dir
+        self.dataset_dir = dataset_dir or os.path.join(results_dir, DEFAULT_DATASET_DIR)
+        self.partition = partition
+        self._dataset = None
+
+    def _load_sources(self):
+        path = os.path.join(self.dataset_dir, SOURCES_FILENAME)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return data
+
+    def _save_sources(self, sources, query_ids):
+        path = os.path.join(self.dataset_dir, SOURCES_FILENAME)
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'partition': self.partition, 'files': sources, 'query_ids': query_ids},
+                      f, ensure_ascii=False, indent=1)
+        os.replace(tmp, path)
+
+    def saved_partition(self):
+        """已有数据集的分区方式（不存在时返回None）"""
+        state = self._load_sources()
+        return state.get('partition') if state else None
+
+    def _current_sources(self):
+        """当前结果文件的 {文件名: [大小, 修改时间]}"""
+        current = {}
+        for path in result_files(self.results_dir):
+            stat = os.stat(path)
+            current[os.path.basename(path)] = [stat.st_size, stat.st_mtime]
+        return current
+
+    def is_current(self):
+        """数据集存在且与当前结果文件一致（只读检查，不写入）"""
+        state = self._load_sources()
+        return bool(state) and state.get('partition') == self.partition and state['files'] == self._current_sources()
+
+    # ------------------------------------------------------------------
+    # 写入
+    # ------------------------------------------------------------------
+
+    def update(self, verbose=False):
+        """把新增或变化的结果文件写入数据集，返回重写的检索式数量"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        state = self._load_sources()
+        if state is None or state.get('partition') != self.partition:
+            # 首次创建或分区方式改变：整体重建
+            if os.path.isdir(self.dataset_dir):
+                shutil.rmtree(self.dataset_dir)
+            state = {'files': {}}
+        os.makedirs(self.dataset_dir, exist_ok=True)
+        known = state['files']
+
+        # 文件名 -> 写入数据集时使用的检索式编号（文件内容中的 query_id，可能与文件名不同）
+        query_ids = state.get('query_ids', {})
+        current = self._current_sources()
+        changed = sorted(name for name, source in current.items() if known.get(name) != source)
+        removed = set(known) - set(current)
+
+        for name in removed:
+            self._remove_query(query_ids.pop(name, name.split('_')[1]))
+
+        # 只读取变化的结果文件
+        schema = _schema(pa)
+        written = 0
+        for name in changed:
+            try:
+                query, articles = read_query(os.path.join(self.results_dir, name))
+            except Exception as e:
+                print(f"✗ 读取失败：{name} - {e}")
+                # 不记录为已写入，下次更新时重试
+                if name in known:
+                    current[name] = known[name]
+                else:
+                    del current[name]
+                continue
+            if name in query_ids and query_ids[name] != query.query_id:
+                self._remove_query(query_ids[name])
+            self._remove_query(query.query_id)
+            table = _to_table(pa, schema, _article_columns(query.query_id, articles))
+            self._write_query(pq, query.query_id, table)
+            query_ids[name] = query.query_id
+            written += 1
+
+        self._save_sources(current, query_ids)
+        self._dataset = None
+        if verbose:
+            print(f"✓ 数据集已更新：重写 {written} 个检索式，删除 {len(removed)} 个（分区：{self.partition}）")
+            print(f"  位置：{os.path.abspath(self.dataset_dir)}")
+        return written
+
+    def _write_query(self, pq, query_id, table):
+        if self.partition == 'query':
+            part_dir = os.path.join(self.dataset_dir, f"query_id={query_id}")
+            os.makedirs(part_dir, exist_ok=True)
+            pq.write_table(table, os.path.join(part_dir, 'part.parquet'),
+                           compression='zstd', row_group_size=BATCH_SIZE)
+            return
+
+        import pyarrow.compute as pc
+
+        years = table.column('year')
+        for year in pc.unique(years).to_pylist():
+            mask = pc.is_null(years) if year is None else pc.equal(years, year)
+            part = table.filter(mask)
+            part_dir = os.path.join(self.dataset_dir, f"year={UNKNOWN_YEAR if year is None else year}")
+            os.makedirs(part_dir, exist_ok=True)
+            pq.write_table(part, os.path.join(part_dir, f"query_{query_id}.parquet"),
+                           compression='zstd', row_group_size=BATCH_SIZE)
+
+    def _remove_query(self, query_id):
+        if self.partition == 'query':
+            shutil.rmtree(os.path.join(self.dataset_dir, f"query_id={query_id}"), ignore_errors=True)
+            return
+        if not os.path.isdir(self.dataset_dir):
+            return
+        for entry in os.scandir(self.dataset_dir):
+            if entry.is_dir() and entry.name.startswith('year='):
+                path = os.path.join(entry.path, f"query_{query_id}.parquet")
+                if os.path.exists(path):
+                    os.remove(path)
+
+    # ------------------------------------------------------------------
+    # 读取与统计
+    # ------------------------------------------------------------------
+
+    def dataset(self):
+        """打开数据集（分区列同时保存在文件中，目录名只用于组织文件和增量重写）"""
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        if self._dataset is None:
+            self._dataset = ds.dataset(self.dataset_dir, format='parquet', schema=_schema(pa))
+        return self._dataset
+
+    def scan(self, columns, filter=None):
+        """只读取指定列，返回 pyarrow.Table"""
+        return self.dataset().to_table(columns=columns, filter=filter)
+
+    def count(self):
+        return self.dataset().count_rows()
+
+    def value_counts(self, column, top=None):
+        """列取值分布，按数量降序返回 [(值, 数量)]（authors列按单个作者统计）"""
+        import pyarrow.compute as pc
+
+        values = self.scan([column]).column(column)
+        if column == 'authors':
+            values = pc.list_flatten(values)
+        counts = pc.value_counts(values)
+        pairs = [(v, c) for v, c in zip(counts.field('values').to_pylist(), counts.field('counts').to_pylist())
+                 if v is not None]
+        pairs.sort(key=lambda x: x[1], reverse=True)
+        return pairs[:top] if top else pairs
+
+    def year_counts(self):
+        return self.value_counts('year')
+
+    def venue_counts(self, top=None):
+        return self.value_counts('venue', top)
+
+    def author_counts(self, top=None):
+        return self.value_counts('authors', top)
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] not in ('update', 'stats'):
+        print(__doc__)
+        return
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        print("✗ 需要安装 pyarrow：")
+        print("  pip install pyarrow")
+        return
+
+    if '--partition' in args:
+        partition = args[args.index('--partition') + 1]
+    else:
+        partition = ColumnarStore().saved_partition() or 'query'
+
+    store = ColumnarStore(partition=partition)
+    start = time.perf_counter()
+    store.update(verbose=args[0] == 'update')
+    if args[0] == 'update':
+        print(f"  文献数：{store.count()} 篇，耗时 {time.perf_counter() - start:.2f} 秒")
+        return
+
+    store.dataset()
+    start = time.perf_counter()
+    years = sorted(store.year_counts())
+    venues = store.venue_counts(top=10)
+    authors = store.author_counts(top=10)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    print(f"\n📚 文献数：{store.count()} 篇（统计耗时 {elapsed:.1f} ms）")
+    print("\n📅 年份分布：")
+    for year, count in years:
+        print(f"  {year}: {count} 篇")
+    print("\n🏛️  期刊/会议（Top 10）：")
+    for venue, count in venues:
+        print(f"  {count:>6}  {venue}")
+    print("\n👤 作者（Top 10）：")
+    for author, count in authors:
+        print(f"  {count:>6}  {author}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,440 @@
+"""
+语料清单（corpus manifest）
+用SQLite维护检索式、文献、doc_id、PDF标记、路径、文件大小和哈希的索引，
+爬虫保存结果/下载PDF时增量更新，各检查脚本直接查询，无需重新解析全部结果JSON
+
+用法：
+    python corpus_manifest.py rebuild         # 增量扫描已有输出目录（只处理变化的文件）
+    python corpus_manifest.py rebuild --full  # 清空后完全重建
+    python corpus_manifest.py stats           # 显示汇总
+"""
+
+import glob
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+
+DEFAULT_RESULTS_DIR = 'ieee_results'
+DEFAULT_PDF_DIR = 'ieee_pdfs'
+MANIFEST_FILENAME = 'corpus_manifest.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS queries (
+    query_id TEXT PRIMARY KEY,
+    query_text TEXT,
+    total_results TEXT,
+    articles_count INTEGER,
+    crawl_time TEXT,
+    result_file TEXT,
+    file_size INTEGER,
+    file_mtime REAL
+);
+CREATE TABLE IF NOT EXISTS articles (
+    query_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    doc_id TEXT,
+    title TEXT,
+    link TEXT,
+    year TEXT,
+    pdf_downloaded INTEGER NOT NULL DEFAULT 0,
+    pdf_path TEXT,
+    pdf_filename TEXT,
+    PRIMARY KEY (query_id, position)
+);
+CREATE INDEX IF NOT EXISTS idx_articles_doc_id ON articles(doc_id);
+CREATE INDEX IF NOT EXISTS idx_articles_pdf ON articles(pdf_downloaded, pdf_filename);
+CREATE TABLE IF NOT EXISTS pdf_files (
+    filename TEXT PRIMARY KEY,
+    path TEXT,
+    size INTEGER,
+    mtime REAL,
+    sha256 TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_pdf_files_sha256 ON pdf_files(sha256);
+CREATE TABLE IF NOT EXISTS pdf_verdicts (
+    path TEXT PRIMARY KEY,
+    size INTEGER,
+    mtime REAL,
+    verdict TEXT,
+    checked_at TEXT
+);
+CREATE TABLE IF NOT EXISTS fulltext (
+    doc_id TEXT PRIMARY KEY,
+    filename TEXT,
+    sha256 TEXT,
+    pages INTEGER,
+    chars INTEGER,
+    doi TEXT,
+    headings INTEGER,
+    error TEXT,
+    extracted_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_fulltext_doi ON fulltext(doi);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def query_sort_key(query_id):
+    """检索式编号排序（数字优先）"""
+    try:
+        return (0, int(query_id), '')
+    except (TypeError, ValueError):
+        return (1, 0, str(query_id))
+
+
+def pdf_basename(pdf_path):
+    """PDF文件名（兼容Windows下保存的反斜杠路径）"""
+    return pdf_path.replace('\\', '/').rsplit('/', 1)[-1] if pdf_path else None
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """分块计算文件哈希"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CorpusManifest:
+    """语料清单（SQLite）"""
+
+    def __init__(self, db_path=None, results_dir=DEFAULT_RESULTS_DIR, pdf_dir=DEFAULT_PDF_DIR):
+        self.results_dir = results_dir
+        self.pdf_dir = pdf_dir
+        self.db_path = db_path or os.path.join(results_dir, MANIFEST_FILENAME)
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    # ------------------------------------------------------------------
+    # 写入（爬虫调用）
+    # ------------------------------------------------------------------
+
+    def record_query(self, output_data, result_file=None):
+        """记录（或替换）一个检索式的结果"""
+        query_id = str(output_data['query_id'])
+        # 统一路径写法（分隔符、"./"），rebuild 按路径比较是否已删除
+        result_file = os.path.normpath(result_file) if result_file else None
+        file_size = file_mtime = None
+        if result_file and os.path.exists(result_file):
+            stat = os.stat(result_file)
+            file_size, file_mtime = stat.st_size, stat.st_mtime
+
+        # articles 可以是列表或生成器（ResultWriter.iter_articles 流式读回），逐行插入不整体保留
+        count = 0
+
+        def rows():
+            nonlocal count
+            for position, article in enumerate(output_data.get('articles', [])):
+                pdf_path = article.get('pdf_path')
+                count += 1
+                yield (
+                    query_id, position, article.get('doc_id'), article.get('title', ''),
+                    article.get('link'), article.get('year'),
+                    1 if article.get('pdf_downloaded') else 0,
+                    pdf_path, pdf_basename(pdf_path)
+                )
+
+        with self._lock, self.conn:
+            self.conn.execute('DELETE FROM articles WHERE query_id = ?', (query_id,))
+            self.conn.executemany('INSERT INTO articles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows())
+            self.conn.execute(
+                'INSERT OR REPLACE INTO queries VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (query_id, output_data.get('query_text', ''), str(output_data.get('total_results', 'N/A')),
+                 output_data.get('articles_count', count), output_data.get('crawl_time'),
+                 result_file, file_size, file_mtime)
+            )
+
+    def record_pdf(self, pdf_path, content=None):
+        """记录一个PDF文件（content为已在内存中的文件内容，可避免重新读取）"""
+        if not os.path.exists(pdf_path):
+            return
+        stat = os.stat(pdf_path)
+        filename = os.path.basename(pdf_path)
+
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT size, mtime, sha256 FROM pdf_files WHERE filename = ?', (filename,)
+            ).fetchone()
+        if row and row['size'] == stat.st_size and row['mtime'] == stat.st_mtime and row['sha256']:
+            return
+
+        sha256 = hashlib.sha256(content).hexdigest() if content is not None else file_sha256(pdf_path)
+        with self._lock, self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO pdf_files VALUES (?, ?, ?, ?, ?)',
+                (filename, pdf_path, stat.st_size, stat.st_mtime, sha256)
+            )
+
+    # ------------------------------------------------------------------
+    # 重建（扫描已有输出目录）
+    # ------------------------------------------------------------------
+
+    def rebuild(self, full=False, verbose=True):
+        """扫描结果目录和PDF目录，只处理新增或变化的文件"""
+        if full:
+            with self._lock, self.conn:
+                self.conn.execute('DELETE FROM articles')
+                self.conn.execute('DELETE FROM queries')
+                self.conn.execute('DELETE FROM pdf_files')
+
+        with self._lock:
+            known = {os.path.normpath(row['result_file']): (row['file_size'], row['file_mtime'], row['query_id'])
+                     for row in self.conn.execute('SELECT result_file, file_size, file_mtime, query_id FROM queries')
+                     if row['result_file']}
+
+        seen_queries = set()
+        updated = 0
+        for file_path in glob.glob(os.path.join(self.results_dir, 'query_*_results.json')):
+            file_path = os.path.normpath(file_path)
+            stat = os.stat(file_path)
+            prev = known.get(file_path)
+            if prev and prev[0] == stat.st_size and prev[1] == stat.st_mtime:
+                seen_queries.add(prev[2])
+                continue
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.record_query(data, file_path)
+                seen_queries.add(str(data['query_id']))
+                updated += 1
+            except Exception as e:
+                print(f"✗ 读取失败：{file_path} - {e}")
+                if prev:
+                    seen_queries.add(prev[2])
+
+        # 已删除的结果文件：记录过结果文件、但这次没有任何结果文件对应的检索式
+        removed = sorted({qid for _, _, qid in known.values() if qid not in seen_queries}, key=query_sort_key)
+        if removed:
+            with self._lock, self.conn:
+                for qid in removed:
+                    self.conn.execute('DELETE FROM articles WHERE query_id = ?', (qid,))
+                    self.conn.execute('DELETE FROM queries WHERE query_id = ?', (qid,))
+
+        pdf_stats = self.sync_pdfs()
+
+        with self._lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('last_rebuild', ?)", (datetime.now().isoformat(),))
+
+        if verbose:
+            print(f"✓ 清单已更新：{updated} 个结果文件变化，{len(removed)} 个已删除，"
+                  f"PDF新增/变化 {pdf_stats['pdfs_updated']} 个、删除 {pdf_stats['pdfs_removed']} 个")
+        return {'results_updated': updated, 'results_removed': len(removed), **pdf_stats}
+
+    def sync_pdfs(self):
+        """同步PDF目录（只对大小或修改时间变化的文件重新计算哈希）"""
+        with self._lock:
+            known = {row['filename']: (row['size'], row['mtime'])
+                     for row in self.conn.execute('SELECT filename, size, mtime FROM pdf_files')}
+
+        current = set()
+        updated = 0
+        if os.path.isdir(self.pdf_dir):
+            with os.scandir(self.pdf_dir) as entries:
+                for entry in entries:
+                    if not entry.name.endswith('.pdf') or not entry.is_file():
+                        continue
+                    current.add(entry.name)
+                    stat = entry.stat()
+                    if known.get(entry.name) == (stat.st_size, stat.st_mtime):
+                        continue
+                    self.record_pdf(os.path.join(self.pdf_dir, entry.name))
+                    updated += 1
+
+        removed = [name for name in known if name not in current]
+        if removed:
+            with self._lock, self.conn:
+                self.conn.executemany('DELETE FROM pdf_files WHERE filename = ?', [(n,) for n in removed])
+        return {'pdfs_updated': updated, 'pdfs_removed': len(removed)}
+
+    # ------------------------------------------------------------------
+    # 查询（检查脚本调用）
+    # ------------------------------------------------------------------
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def totals(self):
+        """全局汇总"""
+        row = self._query("""
+            SELECT
+                (SELECT COUNT(*) FROM queries) AS queries,
+                (SELECT COUNT(*) FROM queries WHERE articles_count > 0) AS queries_with_results,
+                (SELECT COALESCE(SUM(articles_count), 0) FROM queries) AS articles,
+                (SELECT COUNT(DISTINCT doc_id) FROM articles) AS unique_doc_ids,
+                (SELECT COUNT(*) FROM articles WHERE pdf_downloaded = 1) AS pdf_marked,
+                (SELECT COUNT(*) FROM pdf_files) AS pdf_files,
+                (SELECT COALESCE(SUM(size), 0) FROM pdf_files) AS pdf_bytes
+        """)[0]
+        return dict(row)
+
+    def query_summaries(self):
+        """每个检索式的文献数和PDF下载数"""
+        rows = self._query("""
+            SELECT q.query_id, q.query_text, q.total_results, q.articles_count, q.crawl_time,
+                   COALESCE(SUM(a.pdf_downloaded), 0) AS pdfs_downloaded
+            FROM queries q LEFT JOIN articles a ON a.query_id = q.query_id
+            GROUP BY q.query_id
+        """)
+        return sorted((dict(r) for r in rows), key=lambda r: query_sort_key(r['query_id']))
+
+    def query_articles(self, query_id, limit=None):
+        """某个检索式的文献"""
+        sql = 'SELECT * FROM articles WHERE query_id = ? ORDER BY position'
+        if limit:
+            sql += f' LIMIT {int(limit)}'
+        return [dict(r) for r in self._query(sql, (str(query_id),))]
+
+    def query_doc_ids(self, query_id):
+        """某个检索式已有的doc_id集合（增量爬取时判断从哪一篇开始是已有文献）"""
+        return {r['doc_id'] for r in self._query('SELECT doc_id FROM articles WHERE query_id = ?', (str(query_id),))}
+
+    def missing_pdfs(self):
+        """JSON标记已下载但PDF文件不存在（或没有路径）的记录"""
+        rows = self._query("""
+            SELECT a.query_id, a.title, a.doc_id, a.pdf_path, a.pdf_filename
+            FROM articles a LEFT JOIN pdf_files p ON p.filename = a.pdf_filename
+            WHERE a.pdf_downloaded = 1 AND (a.pdf_filename IS NULL OR p.filename IS NULL)
+        """)
+        return sorted((dict(r) for r in rows), key=lambda r: query_sort_key(r['query_id']))
+
+    def duplicate_pdf_references(self):
+        """被多条记录引用的PDF文件 -> [(query_id, title), ...]"""
+        rows = self._query("""
+            SELECT a.pdf_filename, a.query_id, a.title
+            FROM articles a
+            JOIN (SELECT pdf_filename FROM articles
+                  WHERE pdf_downloaded = 1 AND pdf_filename IS NOT NULL
+                  GROUP BY pdf_filename HAVING COUNT(*) > 1) d
+              ON d.pdf_filename = a.pdf_filename
+            WHERE a.pdf_downloaded = 1
+            ORDER BY a.pdf_filename, CAST(a.query_id AS INTEGER), a.position
+        """)
+        duplicates = {}
+        for r in rows:
+            duplicates.setdefault(r['pdf_filename'], []).append({'query_id': r['query_id'], 'title': r['title']})
+        return duplicates
+
+    def marked_pdf_counts(self):
+        """JSON中标记的PDF路径数 / 去重后的路径数"""
+        row = self._query("""
+            SELECT COUNT(pdf_filename) AS marked_paths, COUNT(DISTINCT pdf_filename) AS unique_paths
+            FROM articles WHERE pdf_downloaded = 1
+        """)[0]
+        return dict(row)
+
+    def unreferenced_pdfs(self):
+        """实际存在但没有任何记录引用的PDF文件"""
+        rows = self._query("""
+            SELECT p.filename FROM pdf_files p
+            WHERE NOT EXISTS (SELECT 1 FROM articles a WHERE a.pdf_filename = p.filename AND a.pdf_downloaded = 1)
+            ORDER BY p.filename
+        """)
+        return [r['filename'] for r in rows]
+
+    def duplicate_pdf_contents(self):
+        """内容相同（哈希一致）的不同PDF文件"""
+        rows = self._query("""
+            SELECT sha256, GROUP_CONCAT(filename, '|') AS filenames
+            FROM pdf_files WHERE sha256 IS NOT NULL
+            GROUP BY sha256 HAVING COUNT(*) > 1
+        """)
+        return {r['sha256']: r['filenames'].split('|') for r in rows}
+
+    def pdf_verdicts(self):
+        """PDF校验结果缓存：path -> {'size', 'mtime', 'verdict'}"""
+        return {
+            r['path']: {'size': r['size'], 'mtime': r['mtime'], 'verdict': json.loads(r['verdict'])}
+            for r in self._query('SELECT path, size, mtime, verdict FROM pdf_verdicts')
+        }
+
+    def save_pdf_verdicts(self, rows):
+        """保存PDF校验结果，rows为 [(path, size, mtime, verdict), ...]"""
+        now = datetime.now().isoformat()
+        with self._lock, self.conn:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO pdf_verdicts VALUES (?, ?, ?, ?, ?)',
+                [(path, size, mtime, json.dumps(verdict, ensure_ascii=False), now)
+                 for path, size, mtime, verdict in rows]
+            )
+
+    def fulltext_hashes(self):
+        """已处理过的 doc_id -> (PDF内容哈希, 错误信息)"""
+        return {r['doc_id']: (r['sha256'], r['error']) for r in self._query('SELECT doc_id, sha256, error FROM fulltext')}
+
+    def save_fulltext_records(self, records):
+        """保存全文提取结果"""
+        now = datetime.now().isoformat()
+        with self._lock, self.conn:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO fulltext VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [(r['doc_id'], r['filename'], r['sha256'], r['pages'], r['chars'], r['doi'],
+                  r['headings'], r['error'], now) for r in records]
+            )
+
+    def fulltext_records(self):
+        """全文提取记录"""
+        return [dict(r) for r in self._query('SELECT * FROM fulltext ORDER BY doc_id')]
+
+    def pdf_files(self):
+        """PDF文件列表"""
+        return [dict(r) for r in self._query('SELECT * FROM pdf_files ORDER BY filename')]
+
+
+def open_manifest(results_dir=DEFAULT_RESULTS_DIR, pdf_dir=DEFAULT_PDF_DIR, sync=False):
+    """打开清单；首次使用时从已有输出目录构建
+
+    默认只查询清单（爬虫和协调者写结果、下载PDF时已经更新）；sync=True 时先做增量同步
+    （按大小和修改时间，只重新读取变化的结果文件、只对变化的PDF计算哈希），用于反映爬虫之外手动增删的PDF和修改的结果文件
+    """
+    db_path = os.path.join(results_dir, MANIFEST_FILENAME)
+    is_new = not os.path.exists(db_path)
+    manifest = CorpusManifest(db_path, results_dir, pdf_dir)
+    if is_new:
+        print(f"未找到语料清单，正在从 {results_dir}/ 构建（仅首次）...")
+        manifest.rebuild()
+    elif sync:
+        stats = manifest.rebuild(verbose=False)
+        if any(stats.values()):
+            print(f"✓ 清单已同步：{stats['results_updated']} 个结果文件变化，{stats['results_removed']} 个已删除，"
+                  f"PDF新增/变化 {stats['pdfs_updated']} 个、删除 {stats['pdfs_removed']} 个")
+    return manifest
+
+
+def main():
+    args = sys.argv[1:]
+    command = args[0] if args else 'stats'
+
+    manifest = CorpusManifest()
+    if command == 'rebuild':
+        manifest.rebuild(full='--full' in args)
+    elif command != 'stats':
+        print(__doc__)
+        return
+
+    totals = manifest.totals()
+    print(f"\n检索式：{totals['queries']} 个（有结果 {totals['queries_with_results']} 个）")
+    print(f"文献：{totals['articles']} 篇（doc_id去重 {totals['unique_doc_ids']} 篇）")
+    print(f"PDF：标记 {totals['pdf_marked']} 个，实际文件 {totals['pdf_files']} 个，"
+          f"{totals['pdf_bytes'] / 1024 / 1024:.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
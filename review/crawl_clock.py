@@ -0,0 +1,79 @@
+"""
+可替换的时钟
+爬虫的所有等待（safe_delay、页面内的sleep、重试退避、熔断冷却）和阶段计时都通过时钟对象进行：
+正常运行时使用系统时钟；模拟器（crawl_simulator.py）使用虚拟时钟，sleep只推进虚拟时间，
+几小时的爬取流程几秒钟就能跑完。
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+class SystemClock:
+    """系统时钟"""
+
+    def time(self):
+        return time.time()
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def perf_counter(self):
+        return time.perf_counter()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+class VirtualClock:
+    """虚拟时钟：sleep立即返回并推进虚拟时间
+
+    branch(start) 在当前线程中开一条从start开始的分支时间线，用于模拟后台并发执行的任务
+    （分支中的sleep只推进分支时间，不影响主时间线）
+    """
+
+    def __init__(self, start=0.0, epoch=None):
+        self.now = start
+        self.epoch = time.time() if epoch is None else epoch
+        self.slept = 0.0
+        self._local = threading.local()
+
+    def _branch_now(self):
+        return getattr(self._local, 'now', None)
+
+    def monotonic(self):
+        branch = self._branch_now()
+        return self.now if branch is None else branch
+
+    perf_counter = monotonic
+
+    def time(self):
+        return self.epoch + self.monotonic()
+
+    def sleep(self, seconds):
+        if seconds <= 0:
+            return
+        self.slept += seconds
+        if self._branch_now() is None:
+            self.now += seconds
+        else:
+            self._local.now += seconds
+
+    def advance_to(self, moment):
+        """主时间线前进到moment（等待后台任务完成）"""
+        if moment > self.now:
+            self.now = moment
+
+    @contextmanager
+    def branch(self, start):
+        previous = self._branch_now()
+        self._local.now = start
+        try:
+            yield
+        finally:
+            self._local.now = previous
+
+
+SYSTEM_CLOCK = SystemClock()
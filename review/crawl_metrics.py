@@ -0,0 +1,253 @@
+"""
+爬取流程计时与指标统计
+为 search_query / extract_articles / go_to_next_page / download_article_pdf
+的每个阶段记录耗时，导出为 Prometheus 文本文件和 JSON
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from crawl_clock import SYSTEM_CLOCK
+
+# 直方图分桶（秒），覆盖从脚本执行到查询间大延迟的范围
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+# 阶段类型：wait=等待（延迟、WebDriverWait、sleep），work=实际工作
+KIND_WAIT = 'wait'
+KIND_WORK = 'work'
+
+
+class Histogram:
+    """累积分桶直方图（与Prometheus histogram语义一致）"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'max': round(self.max, 6),
+            'avg': round(self.sum / self.count, 6) if self.count else 0.0,
+            'buckets': {str(b): c for b, c in zip(self.buckets, self.bucket_counts)}
+        }
+
+
+class CrawlMetrics:
+    """轻量级阶段计时器
+
+    用法：
+        with metrics.span('search.driver_get'):
+            driver.get(url)
+        with metrics.span('delay.small', kind='wait'):
+            time.sleep(5)
+
+    span可以嵌套，直方图记录的是包含子阶段的总耗时；
+    每个检索式的“等待/工作”汇总使用扣除子阶段后的独占耗时，避免重复计算。
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, clock=None):
+        self.buckets = buckets
+        self.clock = clock or SYSTEM_CLOCK    # 模拟器使用虚拟时钟
+        self.histograms = {}      # (stage, kind) -> Histogram
+        self.counters = {}        # (name, labels) -> value
+        self.gauges = {}          # (name, labels) -> 当前值
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        # 当前检索式的汇总
+        self.current_query = None
+        self._query_start = None
+        self._query_kind_totals = {KIND_WAIT: 0.0, KIND_WORK: 0.0}
+        self._query_stage_totals = {}
+
+        # 最近进入的阶段（供状态接口显示“当前阶段”）
+        self.active_stage = None
+
+        self.started_at = time.time()
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def span(self, stage, kind=KIND_WORK):
+        """记录一个阶段的耗时"""
+        stack = self._stack()
+        frame = [stage, kind, 0.0]  # 最后一项累加子阶段耗时
+        stack.append(frame)
+        self.active_stage = stage
+        start = self.clock.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = self.clock.perf_counter() - start
+            stack.pop()
+            if stack:
+                stack[-1][2] += elapsed
+            self.active_stage = stack[-1][0] if stack else None
+            self._record(stage, kind, elapsed, max(elapsed - frame[2], 0.0))
+
+    def observe(self, stage, elapsed, kind=KIND_WORK):
+        """直接记录一个耗时（不便用with包裹的代码块使用）"""
+        stack = self._stack()
+        if stack:
+            stack[-1][2] += elapsed
+        self._record(stage, kind, elapsed, elapsed)
+
+    def _record(self, stage, kind, elapsed, exclusive):
+        with self._lock:
+            key = (stage, kind)
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = Histogram(self.buckets)
+            hist.observe(elapsed)
+
+            if self.current_query is not None:
+                self._query_kind_totals[kind] = self._query_kind_totals.get(kind, 0.0) + exclusive
+                self._query_stage_totals[stage] = self._query_stage_totals.get(stage, 0.0) + exclusive
+
+    def inc(self, name, value=1, **labels):
+        """计数器加值"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        """设置瞬时值（队列深度等）"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.gauges[key] = value
+
+    def begin_query(self, query_id):
+        """开始统计一个检索式"""
+        with self._lock:
+            self.current_query = query_id
+            self._query_start = self.clock.perf_counter()
+            self._query_kind_totals = {KIND_WAIT: 0.0, KIND_WORK: 0.0}
+            self._query_stage_totals = {}
+
+    def end_query(self):
+        """结束当前检索式的统计，返回汇总字典"""
+        with self._lock:
+            if self.current_query is None:
+                return None
+            total = self.clock.perf_counter() - self._query_start
+            wait = self._query_kind_totals.get(KIND_WAIT, 0.0)
+            work = self._query_kind_totals.get(KIND_WORK, 0.0)
+            top_stages = sorted(self._query_stage_totals.items(), key=lambda x: x[1], reverse=True)[:3]
+            summary = {
+                'query_id': self.current_query,
+                'total': total,
+                'wait': wait,
+                'work': work,
+                # 未被任何span覆盖的时间（日志、JSON保存等）
+                'other': max(total - wait - work, 0.0),
+                'top_stages': top_stages
+            }
+            self.current_query = None
+        self.observe('query.total', total)
+        return summary
+
+    @staticmethod
+    def format_summary(summary):
+        """格式化单个检索式的汇总行"""
+        total = summary['total'] or 1e-9
+        top = ', '.join(f"{stage} {sec:.1f}s" for stage, sec in summary['top_stages'])
+        return (f"⏱ 检索式 #{summary['query_id']} 耗时 {summary['total']:.1f}s："
+                f"等待 {summary['wait']:.1f}s ({summary['wait'] / total * 100:.0f}%)，"
+                f"工作 {summary['work']:.1f}s ({summary['work'] / total * 100:.0f}%)，"
+                f"其他 {summary['other']:.1f}s | 最耗时：{top or '无'}")
+
+    def snapshot(self):
+        """返回当前全部指标（JSON可序列化）"""
+        with self._lock:
+            stages = {}
+            for (stage, kind), hist in sorted(self.histograms.items()):
+                entry = hist.to_dict()
+                entry['kind'] = kind
+                stages[stage] = entry
+            counters = []
+            for (name, labels), value in sorted(self.counters.items()):
+                counters.append({'name': name, 'labels': dict(labels), 'value': value})
+            gauges = [{'name': name, 'labels': dict(labels), 'value': value}
+                      for (name, labels), value in sorted(self.gauges.items())]
+        return {
+            'generated_at': time.time(),
+            'uptime_seconds': round(time.time() - self.started_at, 3),
+            'stages': stages,
+            'counters': counters,
+            'gauges': gauges
+        }
+
+    def export_json(self, path):
+        """导出为JSON文件"""
+        _atomic_write(path, json.dumps(self.snapshot(), ensure_ascii=False, indent=2))
+
+    def export_prometheus(self, path, prefix='ieee_crawler'):
+        """导出为Prometheus textfile collector格式"""
+        lines = []
+        with self._lock:
+            hist_name = f"{prefix}_stage_duration_seconds"
+            lines.append(f"# HELP {hist_name} Duration of crawl pipeline stages.")
+            lines.append(f"# TYPE {hist_name} histogram")
+            for (stage, kind), hist in sorted(self.histograms.items()):
+                base = f'stage="{_escape(stage)}",kind="{kind}"'
+                for bound, count in zip(hist.buckets, hist.bucket_counts):
+                    lines.append(f'{hist_name}_bucket{{{base},le="{bound}"}} {count}')
+                lines.append(f'{hist_name}_bucket{{{base},le="+Inf"}} {hist.count}')
+                lines.append(f'{hist_name}_sum{{{base}}} {hist.sum:.6f}')
+                lines.append(f'{hist_name}_count{{{base}}} {hist.count}')
+
+            declared = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                metric = f"{prefix}_{name}_total"
+                if metric not in declared:
+                    lines.append(f"# TYPE {metric} counter")
+                    declared.add(metric)
+                label_str = ','.join(f'{k}="{_escape(str(v))}"' for k, v in labels)
+                lines.append(f"{metric}{{{label_str}}} {value}" if label_str else f"{metric} {value}")
+
+            for (name, labels), value in sorted(self.gauges.items()):
+                metric = f"{prefix}_{name}"
+                if metric not in declared:
+                    lines.append(f"# TYPE {metric} gauge")
+                    declared.add(metric)
+                label_str = ','.join(f'{k}="{_escape(str(v))}"' for k, v in labels)
+                lines.append(f"{metric}{{{label_str}}} {value}" if label_str else f"{metric} {value}")
+        _atomic_write(path, '\n'.join(lines) + '\n')
+
+    def export(self, output_dir):
+        """同时导出两种格式到输出目录"""
+        self.export_prometheus(os.path.join(output_dir, 'crawl_metrics.prom'))
+        self.export_json(os.path.join(output_dir, 'crawl_metrics.json'))
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _atomic_write(path, text):
+    """先写临时文件再替换，避免采集器读到半截文件"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
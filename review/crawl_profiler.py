@@ -0,0 +1,276 @@
+"""
+剖析模式：按检索式（或分析命令）采样调用栈，生成火焰图和内存分配报告
+后台线程每隔 interval 秒采样一次所有线程的Python调用栈（sys._current_frames），不需要安装额外的包。
+每次剖析在输出目录写出三个文件：
+    <名称>.collapsed   折叠栈（每行 "线程;文件:函数;... 次数"，可直接交给 flamegraph.pl / speedscope）
+    <名称>.svg         火焰图（浏览器打开，鼠标悬停显示采样数）
+    <名称>.txt         时间分类、CPU时间和 tracemalloc 内存分配前N名
+
+时间分类按栈判断（采样看不到C函数，按最内层Python帧所在的代码行区分主动等待）：
+    自有代码CPU      最内层帧在本目录的代码中
+    第三方库CPU      最内层帧在其他库中
+    等待chromedriver 栈中有selenium的帧（浏览器命令通过HTTP发给chromedriver并等待应答）
+    网络IO           栈中有requests/urllib3/http/socket/ssl的帧（PDF下载等）
+    主动等待         最内层帧正在调用sleep或input（安全延迟、重试退避、轮询、等待用户输入）
+    锁/队列等待      最内层帧在threading/queue/selectors/concurrent中（等待后台任务或空闲的线程）
+另外用进程CPU时间和线程CPU时钟核对：墙钟时间远大于CPU时间说明时间花在等待上。
+
+用法：
+    python ieee_crawler.py --profile       # 每个检索式一份，写入 ieee_results/profiles/
+    python run_crawler.py --profile
+    python analyze_results.py --profile    # 每个分析命令一份
+"""
+
+import linecache
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+import unicodedata
+import zlib
+from collections import Counter
+from xml.sax.saxutils import escape
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+OWN_CPU = 'own_cpu'
+LIBRARY_CPU = 'library_cpu'
+CHROMEDRIVER = 'chromedriver'
+NETWORK = 'network'
+SLEEP = 'sleep'
+LOCK_WAIT = 'lock_wait'
+
+CATEGORY_LABELS = {
+    OWN_CPU: '自有代码CPU',
+    LIBRARY_CPU: '第三方库CPU',
+    CHROMEDRIVER: '等待chromedriver',
+    NETWORK: '网络IO',
+    SLEEP: '主动等待',
+    LOCK_WAIT: '锁/队列等待',
+}
+
+NETWORK_MODULES = ('requests', 'urllib3', os.path.join('http', 'client.py'), 'socket.py', 'ssl.py')
+LOCK_MODULES = ('threading.py', 'queue.py', 'selectors.py', os.path.join('concurrent', 'futures'))
+
+
+def _path_has(filename, parts):
+    return any(part in filename for part in parts)
+
+
+def classify_stack(frames):
+    """frames: 从最外层到最内层的 (文件名, 函数名, 行号) 列表 -> 时间分类"""
+    if not frames:
+        return LIBRARY_CPU
+    filename, _, lineno = frames[-1]
+    line = linecache.getline(filename, lineno)
+    if 'sleep(' in line or 'input(' in line:
+        return SLEEP
+    if any(os.sep + 'selenium' + os.sep in f for f, _, _ in frames):
+        return CHROMEDRIVER
+    if any(_path_has(f, NETWORK_MODULES) for f, _, _ in frames):
+        return NETWORK
+    if _path_has(filename, LOCK_MODULES):
+        return LOCK_WAIT
+    if os.path.dirname(os.path.abspath(filename)).startswith(HERE):
+        return OWN_CPU
+    return LIBRARY_CPU
+
+
+def thread_group(name):
+    """线程名去掉编号：sched-pdf_0 -> sched-pdf，Thread-3 (process_request_thread) -> process_request_thread"""
+    match = re.match(r'Thread-\d+ \((.+)\)$', name)
+    if match:
+        name = match.group(1)
+    return re.sub(r'[_-]?\d+$', '', name) or name
+
+
+def _thread_cpu_clock(ident):
+    """线程的CPU时钟（Linux等支持 pthread_getcpuclockid 的平台），不支持时返回None"""
+    try:
+        return time.pthread_getcpuclockid(ident)
+    except (AttributeError, OSError):
+        return None
+
+
+class CrawlProfiler:
+    """采样剖析器：start(name) 开始，stop() 结束并写出报告"""
+
+    def __init__(self, output_dir, interval=0.01, memory=True, top=15):
+        self.output_dir = output_dir
+        self.interval = interval
+        self.memory = memory
+        self.top = top
+        self.name = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self, name):
+        if self.name is not None:
+            self.stop()
+        self.name = re.sub(r'[^\w.-]+', '_', str(name))
+        self.stacks = Counter()                 # 折叠栈 -> 采样数
+        self.categories = {}                    # 线程组 -> Counter(分类 -> 采样数)
+        self.samples = 0
+        self.target = threading.get_ident()
+        self._started_tracing = False
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._cpu_clock = _thread_cpu_clock(self.target)
+        self._thread_cpu_start = time.clock_gettime(self._cpu_clock) if self._cpu_clock is not None else None
+        self._process_cpu_start = time.process_time()
+        self._wall_start = time.perf_counter()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample_loop, name='profiler', daemon=True)
+        self._thread.start()
+
+    def _sample_loop(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                frames = []
+                while frame is not None:
+                    frames.append((frame.f_code.co_filename, frame.f_code.co_name, frame.f_lineno))
+                    frame = frame.f_back
+                frames.reverse()
+                group = 'main' if ident == self.target else thread_group(names.get(ident, 'thread'))
+                category = classify_stack(frames)
+                # 空闲的线程池线程（等待任务）不计入
+                if group != 'main' and category == LOCK_WAIT:
+                    continue
+                labels = [group] + [f"{os.path.basename(f)}:{func}" for f, func, _ in frames]
+                self.stacks[';'.join(labels)] += 1
+                self.categories.setdefault(group, Counter())[category] += 1
+            self.samples += 1
+
+    def stop(self):
+        """结束剖析，写出 .collapsed/.svg/.txt，返回汇总字典；未在剖析时返回None"""
+        if self.name is None:
+            return None
+        wall = time.perf_counter() - self._wall_start
+        process_cpu = time.process_time() - self._process_cpu_start
+        thread_cpu = None
+        if self._cpu_clock is not None:
+            try:
+                thread_cpu = time.clock_gettime(self._cpu_clock) - self._thread_cpu_start
+            except OSError:
+                pass
+        self._stop.set()
+        self._thread.join()
+
+        memory = None
+        if self.memory and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, linecache.__file__),
+                tracemalloc.Filter(False, __file__),
+            ))
+            _, peak = tracemalloc.get_traced_memory()
+            memory = {'peak': peak, 'top': snapshot.statistics('lineno')[:self.top]}
+            if self._started_tracing:
+                tracemalloc.stop()
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, self.name)
+        with open(base + '.collapsed', 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        with open(base + '.svg', 'w', encoding='utf-8') as f:
+            f.write(render_flamegraph(self.stacks, f"{self.name}（{self.samples} 次采样，间隔 {self.interval * 1000:.0f} ms）"))
+
+        summary = {
+            'name': self.name,
+            'wall_seconds': round(wall, 3),
+            'process_cpu_seconds': round(process_cpu, 3),
+            'main_thread_cpu_seconds': round(thread_cpu, 3) if thread_cpu is not None else None,
+            'samples': self.samples,
+            'categories': {group: {CATEGORY_LABELS[c]: round(n * wall / max(self.samples, 1), 3)
+                                   for c, n in counts.most_common()}
+                           for group, counts in self.categories.items()},
+            'report': base + '.txt',
+        }
+        with open(base + '.txt', 'w', encoding='utf-8') as f:
+            f.write(format_report(summary, memory))
+        self.name = None
+        return summary
+
+
+def format_report(summary, memory=None):
+    lines = [f"剖析：{summary['name']}",
+             f"墙钟时间 {summary['wall_seconds']:.2f} s，进程CPU {summary['process_cpu_seconds']:.2f} s"
+             f"（{summary['process_cpu_seconds'] / max(summary['wall_seconds'], 1e-9):.0%}）"
+             + (f"，主线程CPU {summary['main_thread_cpu_seconds']:.2f} s"
+                if summary['main_thread_cpu_seconds'] is not None else ''),
+             f"采样 {summary['samples']} 次", ""]
+    for group, categories in sorted(summary['categories'].items(), key=lambda item: item[0] != 'main'):
+        total = sum(categories.values()) or 1e-9
+        lines.append("时间分类（主线程）：" if group == 'main' else f"时间分类（{group} 线程，合计各线程）：")
+        for label, seconds in categories.items():
+            pad = ' ' * max(18 - sum(2 if unicodedata.east_asian_width(ch) in 'WF' else 1 for ch in label), 0)
+            lines.append(f"  {label}{pad}{seconds:>9.2f} s  {seconds / total:>5.0%}")
+        lines.append("")
+    if memory is not None:
+        lines.append(f"内存分配（tracemalloc，剖析期间分配且未释放的前 {len(memory['top'])} 名，峰值 "
+                     f"{memory['peak'] / 1024 / 1024:.1f} MB）：")
+        for stat in memory['top']:
+            frame = stat.traceback[0]
+            lines.append(f"  {stat.size / 1024:>9.1f} KB {stat.count:>7} 块  {frame.filename}:{frame.lineno}")
+    return "\n".join(lines) + "\n"
+
+
+def _frame_color(name):
+    """自有代码为橙色，selenium为蓝色，其他为红黄色系（按名称哈希取色，同名帧颜色相同）"""
+    shade = zlib.crc32(name.encode('utf-8')) % 60
+    filename = name.split(':', 1)[0]
+    if os.path.exists(os.path.join(HERE, filename)):
+        return f"rgb(240,{130 + shade},40)"
+    if 'webdriver' in filename or 'remote_connection' in filename:
+        return f"rgb(80,{120 + shade},220)"
+    return f"rgb(220,{60 + shade},{40 + shade // 2})"
+
+
+def render_flamegraph(stacks, title='', width=1200, frame_height=16):
+    """折叠栈 -> 火焰图SVG（根在底部，宽度与采样数成正比）"""
+    root = {'count': 0, 'children': {}}
+    depth = 0
+    for stack, count in stacks.items():
+        node = root
+        node['count'] += count
+        names = stack.split(';')
+        depth = max(depth, len(names))
+        for name in names:
+            node = node['children'].setdefault(name, {'count': 0, 'children': {}})
+            node['count'] += count
+    total = root['count'] or 1
+    height = (depth + 1) * frame_height + 40
+    scale = (width - 20) / total
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+             f'font-family="monospace" font-size="11">',
+             f'<rect width="100%" height="100%" fill="#fafafa"/>',
+             f'<text x="10" y="20" font-size="14">{escape(title)}</text>']
+
+    def draw(node, x, level):
+        for name, child in sorted(node['children'].items()):
+            w = child['count'] * scale
+            if w >= 0.5:
+                y = height - (level + 1) * frame_height - 5
+                label = escape(name)
+                parts.append(f'<g><title>{label}（{child["count"]} 次采样，{child["count"] / total:.1%}）</title>'
+                             f'<rect x="{x:.1f}" y="{y}" width="{w:.1f}" height="{frame_height - 1}" '
+                             f'fill="{_frame_color(name)}"/>')
+                chars = int(w / 7)
+                if chars >= 3:
+                    text = name if len(name) <= chars else name[:chars - 2] + '..'
+                    parts.append(f'<text x="{x + 3:.1f}" y="{y + frame_height - 4}">{escape(text)}</text>')
+                parts.append('</g>')
+                draw(child, x, level + 1)
+            x += w
+
+    draw(root, 10, 0)
+    parts.append('</svg>')
+    return "\n".join(parts)
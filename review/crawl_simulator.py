@@ -0,0 +1,489 @@
+"""
+虚拟时钟爬取模拟器：评估延迟和并发策略
+用虚拟时钟运行真实的 IEEECrawler.run() 流程（检索、滚动、翻页、打开文章页和查看器、PDF传输、重试、熔断），
+浏览器换成按模型服务器应答的模拟驱动，PDF传输按调度器的并发和间隔在虚拟时间中并行。
+所有sleep只推进虚拟时间，80个检索式的完整计划几秒钟就能跑完。
+
+模型服务器：检索结果和无权限文献与 mock_ieee_server.py 相同，各端点延迟为对数正态分布；
+被封风险按最近60秒内的请求数计算：不超过 safe_rate 时为0，达到 limit_rate 时为 max_block_probability，
+之间线性增加。被封时浏览器页面显示拦截页、PDF请求返回429，由爬虫的重试策略和熔断器处理。
+
+每个策略输出：总耗时（makespan）、请求数和请求速率（平均/峰值每分钟）、期望被封次数、
+至少被封一次的概率（被封风险）、实际抽样被封次数和熔断次数。
+
+用法：
+    python crawl_simulator.py                            # 内置策略，全部检索式
+    python crawl_simulator.py --policies my_policies.json --queries 20 --seed 2
+    python crawl_simulator.py --safe-rate 15 --limit-rate 40 --output simulation_report.json
+
+策略文件格式（每个策略覆盖爬虫参数和调度器端点设置）：
+    {"慢速": {"min_delay": 90, "max_delay": 150},
+     "PDF并发4": {"pdf": {"concurrency": 4, "min_interval": 1, "max_interval": 3}}}
+"""
+
+import bisect
+import json
+import logging
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import unicodedata
+from collections import Counter
+from contextlib import contextmanager
+from urllib.parse import urlsplit, parse_qs
+
+from selenium.common.exceptions import NoSuchElementException
+
+from crawl_clock import VirtualClock
+from ieee_crawler import IEEECrawler
+from mock_ieee_server import MockSettings, MockCorpus, DEFAULT_LATENCY
+from retry_policy import CrawlError, HttpStatusError, NOT_PDF
+from scheduler import classify, DEFAULT_ENDPOINTS
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CSV = os.path.join(HERE, 'IEEE_Xplore_检索式汇总_修正版.csv')
+RATE_WINDOW = 60
+
+# 爬虫属性（其余键视为调度器端点设置）
+CRAWLER_PARAMS = ('min_delay', 'max_delay', 'small_delay_min', 'small_delay_max', 'max_pages', 'download_pdf')
+
+DEFAULT_POLICIES = {
+    '当前设置': {},
+    '检索式间隔30-60秒': {'min_delay': 30, 'max_delay': 60},
+    '不下载PDF': {'download_pdf': False},
+    'PDF并发4': {'pdf': {'concurrency': 4, 'min_interval': 1, 'max_interval': 3}},
+    '页面内延迟1-3秒': {'small_delay_min': 1, 'small_delay_max': 3},
+}
+
+
+class ServerModel:
+    """模型服务器：应答延迟和被封概率"""
+
+    def __init__(self, settings=None, safe_rate=20, limit_rate=60, max_block_probability=0.05,
+                 latency=None, seed=1):
+        self.settings = settings or MockSettings(pdf_size=2000, seed=seed)
+        self.corpus = MockCorpus(self.settings)
+        self.latency = dict(DEFAULT_LATENCY)
+        self.latency.update(latency or {})
+        self.safe_rate = safe_rate                      # 每分钟请求数
+        self.limit_rate = limit_rate
+        self.max_block_probability = max_block_probability
+        self.rng = random.Random(seed)
+        self.times = []                                 # 所有请求的时刻（有序）
+        self.requests = Counter()
+        self.expected_blocks = 0.0
+        self.log_survival = 0.0                         # log(一次都不被封的概率)
+        self.blocks = 0
+
+    def block_probability(self, rate):
+        if rate <= self.safe_rate:
+            return 0.0
+        share = (rate - self.safe_rate) / max(self.limit_rate - self.safe_rate, 1e-9)
+        return min(1.0, share) * self.max_block_probability
+
+    def request(self, endpoint, now):
+        """记录一次请求，返回 (应答延迟秒, 是否被封)"""
+        rate = bisect.bisect_right(self.times, now) - bisect.bisect_left(self.times, now - RATE_WINDOW) + 1
+        bisect.insort(self.times, now)
+        self.requests[endpoint] += 1
+        p = self.block_probability(rate)
+        self.expected_blocks += p
+        if p:
+            self.log_survival += math.log1p(-p) if p < 1 else -math.inf
+        blocked = p > 0 and self.rng.random() < p
+        self.blocks += blocked
+        median_ms, sigma = self.latency.get(endpoint, (0, 0))
+        latency = self.rng.lognormvariate(math.log(median_ms), sigma) / 1000 if median_ms else 0.0
+        return latency, blocked
+
+    def peak_rate(self):
+        """任意60秒窗口内的最大请求数"""
+        peak, left = 0, 0
+        for right, moment in enumerate(self.times):
+            while moment - self.times[left] > RATE_WINDOW:
+                left += 1
+            peak = max(peak, right - left + 1)
+        return peak
+
+
+class FakeElement:
+    """模拟的页面元素"""
+
+    def __init__(self, text='', attrs=None, children=None, on_click=None):
+        self.text = text
+        self.attrs = attrs or {}
+        self.children = children or {}
+        self.on_click = on_click
+
+    def get_attribute(self, name):
+        return self.attrs.get(name)
+
+    def find_element(self, by, value):
+        if value not in self.children:
+            raise NoSuchElementException(value)
+        return self.children[value]
+
+    def is_enabled(self):
+        return True
+
+    def is_displayed(self):
+        return True
+
+    def click(self):
+        if self.on_click:
+            self.on_click()
+
+
+class FakeDriver:
+    """按模型服务器应答的模拟浏览器（只实现爬虫用到的接口）"""
+
+    def __init__(self, model, clock, site_url):
+        self.model = model
+        self.clock = clock
+        self.site_url = site_url
+        self.kind = None
+        self.query_text = ''
+        self.page_number = 1
+        self.doc_id = None
+        self.blocked = False
+        self.scrolls = 0
+
+    def _load(self, endpoint):
+        latency, self.blocked = self.model.request(endpoint, self.clock.monotonic())
+        self.clock.sleep(latency)
+        self.scrolls = 0
+
+    def get(self, url):
+        parts = urlsplit(url)
+        params = parse_qs(parts.query)
+        self.kind = classify(url)
+        if self.kind == 'search':
+            self.query_text = (params.get('queryText') or [''])[0]
+            self.page_number = int((params.get('pageNumber') or ['1'])[0] or 1)
+        elif self.kind == 'stamp':
+            self.doc_id = (params.get('arnumber') or [''])[0]
+        else:
+            self.doc_id = parts.path.rstrip('/').split('/')[-1]
+        self._load(self.kind)
+
+    def _next_page(self):
+        self.page_number += 1
+        self._load('search')
+
+    @property
+    def title(self):
+        return "Request Rejected - Unusual Traffic" if self.blocked else "IEEE Xplore"
+
+    @property
+    def page_source(self):
+        return ''
+
+    def _page_ids(self):
+        ids = self.model.corpus.result_ids(self.query_text)
+        per_page = self.model.settings.results_per_page
+        return ids, ids[(self.page_number - 1) * per_page:self.page_number * per_page]
+
+    def find_element(self, by, value):
+        if self.kind == 'search' and not self.blocked:
+            ids, page_ids = self._page_ids()
+            if value == 'Dashboard-statistics':
+                return FakeElement(f"Showing 1-{len(page_ids)} of {len(ids)} results")
+            if value == 'List-results-items' and page_ids:
+                return FakeElement()
+        raise NoSuchElementException(value)
+
+    def find_elements(self, by, value):
+        if self.blocked:
+            return []
+        if self.kind == 'search':
+            ids, page_ids = self._page_ids()
+            if value == 'result-item':
+                return [self._result_item(doc_id) for doc_id in page_ids]
+            if value == "//button[@aria-label='Next page']" and \
+                    self.page_number * self.model.settings.results_per_page < len(ids):
+                return [FakeElement('Next', on_click=self._next_page)]
+        elif self.kind == 'document' and 'stamp.jsp' in value:
+            return [FakeElement('PDF', {'href': f"{self.site_url}/stamp/stamp.jsp?tp=&arnumber={self.doc_id}"})]
+        elif self.kind == 'stamp' and value == 'iframe':
+            return [FakeElement(attrs={'src': f"{self.site_url}/stampPDF/getPDF.jsp?tp=&arnumber={self.doc_id}"})]
+        return []
+
+    def _result_item(self, doc_id):
+        doc = self.model.corpus.document(doc_id)
+        return FakeElement(children={
+            'h3 a': FakeElement(doc['title'], {'href': f"{self.site_url}/document/{doc_id}/"}),
+            'author': FakeElement("; ".join(doc['authors'])),
+            'publisher-info-container': FakeElement(f"Year: {doc['year']} | Conference Paper"),
+            'description': FakeElement(doc['venue']),
+        })
+
+    def execute_script(self, script, *args):
+        if 'scrollHeight' in script and script.startswith('return'):
+            # 懒加载：第一次滚动后页面变长，之后不再变化
+            self.scrolls += 1
+            return 1000 if self.scrolls == 1 else 2000
+        return None
+
+    def get_cookies(self):
+        return []
+
+    def execute_cdp_cmd(self, cmd, params):
+        return {}
+
+    def quit(self):
+        pass
+
+
+class _VirtualFuture:
+    def __init__(self, clock, end, result=None, error=None):
+        self.clock = clock
+        self.end = end
+        self._result = result
+        self._error = error
+
+    def done(self):
+        return self.clock.monotonic() >= self.end
+
+    def result(self):
+        self.clock.advance_to(self.end)
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+class _VirtualLane:
+    def __init__(self, endpoint, concurrency, min_interval, max_interval):
+        self.endpoint = endpoint
+        self.concurrency = max(1, int(concurrency))
+        self.interval = (min_interval, max(min_interval, max_interval))
+        self.free_at = [0.0] * self.concurrency
+        self.next_start = 0.0
+        self.started = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+
+class VirtualScheduler:
+    """EndpointScheduler 的虚拟时间版本：后台任务在时钟分支中执行，按并发上限和请求间隔排队"""
+
+    def __init__(self, endpoints, clock, metrics=None):
+        self.endpoints = dict(DEFAULT_ENDPOINTS)
+        self.endpoints.update(endpoints or {})
+        self.clock = clock
+        self.metrics = metrics
+        self._lanes = {}
+
+    def _lane(self, endpoint, host):
+        key = (endpoint, host or '')
+        if key not in self._lanes:
+            self._lanes[key] = _VirtualLane(endpoint, *self.endpoints.get(endpoint, (1, 0, 0)))
+        return self._lanes[key]
+
+    def _start(self, lane, ready):
+        slot = min(range(lane.concurrency), key=lambda i: lane.free_at[i])
+        start = max(ready, lane.free_at[slot], lane.next_start)
+        lane.next_start = start + random.uniform(*lane.interval)
+        lane.started += 1
+        wait = start - ready
+        lane.wait_total += wait
+        lane.wait_max = max(lane.wait_max, wait)
+        if self.metrics is not None:
+            self.metrics.observe(f'scheduler.wait.{lane.endpoint}', wait, kind='wait')
+        return slot, start
+
+    @contextmanager
+    def slot(self, endpoint, host=None, since=None):
+        lane = self._lane(endpoint, host)
+        now = self.clock.monotonic()
+        slot, start = self._start(lane, now)
+        self.clock.sleep(start - now)
+        try:
+            yield
+        finally:
+            lane.free_at[slot] = self.clock.monotonic()
+
+    def submit(self, endpoint, host, fn, *args, **kwargs):
+        lane = self._lane(endpoint, host)
+        slot, start = self._start(lane, self.clock.monotonic())
+        result = error = None
+        with self.clock.branch(start):
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                error = e
+            end = self.clock.monotonic()
+        lane.free_at[slot] = end
+        return _VirtualFuture(self.clock, end, result, error)
+
+    def stats(self):
+        result = {}
+        for lane in self._lanes.values():
+            entry = result.setdefault(lane.endpoint, {
+                'queue_depth': 0, 'running': 0, 'started': 0, 'wait_total': 0.0, 'max_wait_seconds': 0.0,
+                'concurrency': lane.concurrency, 'interval_seconds': list(lane.interval), 'hosts': 0,
+            })
+            entry['started'] += lane.started
+            entry['wait_total'] += lane.wait_total
+            entry['max_wait_seconds'] = round(max(entry['max_wait_seconds'], lane.wait_max), 3)
+            entry['hosts'] += 1
+        for entry in result.values():
+            wait_total = entry.pop('wait_total')
+            entry['avg_wait_seconds'] = round(wait_total / entry['started'], 3) if entry['started'] else 0.0
+        return result
+
+    def shutdown(self, wait=True):
+        pass
+
+
+class SimulatedCrawler(IEEECrawler):
+    """使用虚拟时钟、模拟浏览器和模型服务器的爬虫（爬取流程与 IEEECrawler 完全相同）"""
+
+    def __init__(self, model, policy=None, csv_file=DEFAULT_CSV, clock=None):
+        super().__init__(csv_file, clock=clock or VirtualClock())
+        self.model = model
+        self.status_port = None
+        self.proxy_pool = None
+        self.extract_fulltext = False
+        self.scheduler = VirtualScheduler(self.scheduler.endpoints, self.clock, self.metrics)
+        self.status.scheduler_source = self.scheduler
+        apply_policy(self, policy or {})
+
+    def init_driver(self):
+        if self.driver is None:
+            self.driver = FakeDriver(self.model, self.clock, self.site_url)
+
+    def fetch_pdf(self, pdf_download_url, headers, cookies):
+        latency, blocked = self.model.request('pdf', self.clock.monotonic())
+        self.clock.sleep(latency)
+        if blocked:
+            raise HttpStatusError(429)
+        doc_id = (parse_qs(urlsplit(pdf_download_url).query).get('arnumber') or [''])[0]
+        if self.model.corpus.document(doc_id)['paywalled']:
+            raise CrawlError(NOT_PDF, "响应不是PDF文件")
+        return self.model.corpus.pdf_bytes(doc_id)
+
+
+def apply_policy(crawler, policy):
+    """把策略中的参数设置到爬虫和调度器上"""
+    for name, value in policy.items():
+        if name in CRAWLER_PARAMS:
+            setattr(crawler, name, value)
+        elif isinstance(value, dict):
+            default = crawler.scheduler.endpoints.get(name, (1, 0, 0))
+            crawler.scheduler.endpoints[name] = (value.get('concurrency', default[0]),
+                                                 value.get('min_interval', default[1]),
+                                                 value.get('max_interval', value.get('min_interval', default[2])))
+        else:
+            raise ValueError(f"未知的策略参数：{name}")
+
+
+@contextmanager
+def _quiet_workdir():
+    """在临时目录中运行（结果、进度和PDF不写入当前目录），运行期间不输出INFO/WARNING日志"""
+    cwd = os.getcwd()
+    config = os.path.join(HERE, 'config.json')
+    with tempfile.TemporaryDirectory() as tmp:
+        if os.path.exists(config):
+            shutil.copy(config, tmp)
+        os.chdir(tmp)
+        logging.disable(logging.WARNING)
+        try:
+            yield tmp
+        finally:
+            logging.disable(logging.NOTSET)
+            os.chdir(cwd)
+
+
+def simulate(policy=None, queries=None, seed=1, csv_file=DEFAULT_CSV, **model_options):
+    """用一个策略模拟完整的爬取计划，返回报告字典"""
+    wall_start = time.perf_counter()
+    with _quiet_workdir():
+        random.seed(seed)
+        clock = VirtualClock()
+        model = ServerModel(seed=seed, **model_options)
+        crawler = SimulatedCrawler(model, policy, csv_file, clock)
+        query_ids = None
+        if queries:
+            query_ids = [q['id'] for q in crawler.load_queries()[:queries]]
+        crawler.run(query_ids=query_ids)
+        counters = {(c['name'], tuple(sorted(c['labels'].items()))): c['value']
+                    for c in crawler.metrics.snapshot()['counters']}
+
+    makespan = clock.now
+    total = sum(model.requests.values())
+    return {
+        'makespan_seconds': round(makespan, 1),
+        'makespan_hours': round(makespan / 3600, 2),
+        'queries_completed': len(crawler.progress['completed']),
+        'queries_failed': len(crawler.progress['failed']),
+        'articles': counters.get(('articles_extracted', ()), 0),
+        'pdfs_downloaded': counters.get(('pdf_results', (('result', 'downloaded'),)), 0),
+        'requests': dict(model.requests),
+        'total_requests': total,
+        'requests_per_minute': round(total / (makespan / 60), 2) if makespan else 0.0,
+        'peak_requests_per_minute': model.peak_rate(),
+        'expected_blocks': round(model.expected_blocks, 3),
+        'block_risk': round(1 - math.exp(model.log_survival), 4),
+        'blocks': model.blocks,
+        'breaker_trips': crawler.retry.breaker.trips,
+        'retries': sum(v for (name, _), v in counters.items() if name == 'retries'),
+        'scheduler': crawler.scheduler.stats(),
+        'wall_seconds': round(time.perf_counter() - wall_start, 2),
+    }
+
+
+def _pad(text, width, left=False):
+    """按显示宽度补齐（中文字符占两列）"""
+    text = str(text)
+    gap = max(width - sum(2 if unicodedata.east_asian_width(ch) in 'WF' else 1 for ch in text), 0)
+    return text + ' ' * gap if left else ' ' * gap + text
+
+
+def format_report(reports):
+    headers = ['总耗时(时)', '完成', 'PDF', '请求', '平均/分', '峰值/分', '期望被封', '被封风险', '被封', '熔断', '耗时(秒)']
+    lines = [_pad('策略', 20, left=True) + ''.join(_pad(h, 11) for h in headers)]
+    for name, r in reports.items():
+        cells = [f"{r['makespan_hours']:.2f}", r['queries_completed'], r['pdfs_downloaded'], r['total_requests'],
+                 f"{r['requests_per_minute']:.1f}", r['peak_requests_per_minute'], f"{r['expected_blocks']:.2f}",
+                 f"{r['block_risk']:.1%}", r['blocks'], r['breaker_trips'], f"{r['wall_seconds']:.1f}"]
+        lines.append(_pad(name, 20, left=True) + ''.join(_pad(c, 11) for c in cells))
+    return "\n".join(lines)
+
+
+def main():
+    args = sys.argv[1:]
+    options = {'--policies': None, '--queries': None, '--seed': '1', '--output': None,
+               '--safe-rate': '20', '--limit-rate': '60', '--max-block': '0.05'}
+    for name in options:
+        if name in args and args.index(name) + 1 < len(args):
+            options[name] = args[args.index(name) + 1]
+
+    policies = DEFAULT_POLICIES
+    if options['--policies']:
+        with open(options['--policies'], 'r', encoding='utf-8') as f:
+            policies = json.load(f)
+
+    queries = int(options['--queries']) if options['--queries'] else None
+    print(f"🧮 模拟 {len(policies)} 个策略（{'前 ' + str(queries) if queries else '全部'} 个检索式，"
+          f"安全速率 {options['--safe-rate']} 次/分，上限 {options['--limit-rate']} 次/分）\n")
+    reports = {}
+    for name, policy in policies.items():
+        reports[name] = simulate(policy, queries, int(options['--seed']),
+                                 safe_rate=float(options['--safe-rate']),
+                                 limit_rate=float(options['--limit-rate']),
+                                 max_block_probability=float(options['--max-block']))
+        print(f"  ✓ {name}：{reports[name]['makespan_hours']:.2f} 小时（模拟用时 {reports[name]['wall_seconds']:.1f} 秒）")
+
+    print("\n" + format_report(reports))
+    if options['--output']:
+        with open(options['--output'], 'w', encoding='utf-8') as f:
+            json.dump(reports, f, ensure_ascii=False, indent=2)
+        print(f"\n✓ 报告已保存：{options['--output']}")
+
+
+if __name__ == '__main__':
+    main()
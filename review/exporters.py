@@ -0,0 +1,312 @@
+"""
+流式导出
+从文献记录迭代器逐条写出，不在内存中构造完整表格：
+- CSV
+- XLSX（openpyxl 只写模式，需要 pip install openpyxl）
+- BibTeX（.bib）
+- RIS（.ris，EndNote/Zotero/Mendeley 均可导入）
+可选在写出时流式去重（MinHash/LSH，见 near_duplicates.StreamingDeduplicator）
+
+用法：
+    python exporters.py export <csv|xlsx|bib|ris> [输出文件] [--dedupe]
+    python exporters.py bench [--records 200000] [--formats csv,xlsx,bib,ris]
+"""
+
+import csv
+import os
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+import unicodedata
+
+from columnar_store import split_authors, venue_of
+
+EXPORT_FIELDS = [
+    'title', 'authors', 'year', 'publisher_info',
+    'abstract', 'link', 'source_query_id', 'source_query_text'
+]
+# 有主题聚类结果时追加的列
+TOPIC_FIELDS = ['topic_cluster', 'topic_terms']
+FORMATS = ('csv', 'xlsx', 'bib', 'ris')
+# Excel单元格最多32767个字符
+XLSX_MAX_CELL = 32767
+
+RE_BIB_SPECIAL = re.compile(r'([&%$#_{}])')
+RE_KEY_CHARS = re.compile(r'[^A-Za-z0-9]')
+RE_CONFERENCE = re.compile(r'conference|symposium|workshop|proceedings|congress', re.IGNORECASE)
+
+
+def _value(record, field):
+    value = record.get(field)
+    return '' if value in (None, 'N/A') else str(value)
+
+
+def is_conference(record):
+    return bool(RE_CONFERENCE.search(_value(record, 'publisher_info')))
+
+
+class CsvWriter:
+    """CSV（UTF-8 BOM，Excel可直接打开）"""
+
+    def __init__(self, path, fields=EXPORT_FIELDS):
+        self.fields = fields
+        self.file = open(path, 'w', encoding='utf-8-sig', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(fields)
+
+    def write(self, record):
+        self.writer.writerow([record.get(field, 'N/A') for field in self.fields])
+
+    def close(self):
+        self.file.close()
+
+
+class XlsxWriter:
+    """XLSX（openpyxl只写模式，行写出后即刷到临时文件，内存占用与行数无关）"""
+
+    def __init__(self, path, fields=EXPORT_FIELDS):
+        from openpyxl import Workbook
+
+        self.path = path
+        self.fields = fields
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet('articles')
+        self.sheet.append(fields)
+
+    def write(self, record):
+        row = []
+        for field in self.fields:
+            value = record.get(field, 'N/A')
+            if isinstance(value, str) and len(value) > XLSX_MAX_CELL:
+                value = value[:XLSX_MAX_CELL]
+            row.append(value)
+        self.sheet.append(row)
+
+    def close(self):
+        self.workbook.save(self.path)
+
+
+class BibTeXWriter:
+    """BibTeX：期刊论文为 @article，会议论文为 @inproceedings；主题簇高频词写入 keywords"""
+
+    def __init__(self, path, fields=None):
+        self.file = open(path, 'w', encoding='utf-8')
+        self.keys = {}
+
+    def _cite_key(self, record):
+        authors = split_authors(record.get('authors'))
+        surname = authors[0].split()[-1] if authors else 'anon'
+        words = [w for w in _value(record, 'title').split() if len(w) > 3]
+        base = f"{surname}{_value(record, 'year')}{words[0] if words else ''}"
+        base = unicodedata.normalize('NFKD', base).encode('ascii', 'ignore').decode('ascii')
+        base = RE_KEY_CHARS.sub('', base).lower() or 'ref'
+        # 同名键追加 a、b、c...
+        n = self.keys.get(base, 0)
+        self.keys[base] = n + 1
+        return base if n == 0 else f"{base}{_suffix(n)}"
+
+    def write(self, record):
+        conference = is_conference(record)
+        fields = [
+            ('title', _value(record, 'title')),
+            ('author', ' and '.join(split_authors(record.get('authors')))),
+            ('booktitle' if conference else 'journal', venue_of(record.get('publisher_info')) or ''),
+            ('year', _value(record, 'year')),
+            ('abstract', _value(record, 'abstract')),
+            ('url', _value(record, 'link')),
+            ('keywords', _value(record, 'topic_terms').replace('; ', ', ')),
+            ('note', f"IEEE Xplore document {_value(record, 'doc_id')}" if _value(record, 'doc_id') else ''),
+        ]
+        lines = [f"@{'inproceedings' if conference else 'article'}{{{self._cite_key(record)},"]
+        for name, value in fields:
+            if value:
+                lines.append(f"  {name} = {{{_bib_escape(value)}}},")
+        lines.append('}\n')
+        self.file.write('\n'.join(lines) + '\n')
+
+    def close(self):
+        self.file.close()
+
+
+class RisWriter:
+    """RIS：期刊论文 TY JOUR，会议论文 TY CONF；主题簇高频词写为 KW"""
+
+    def __init__(self, path, fields=None):
+        self.file = open(path, 'w', encoding='utf-8')
+
+    def write(self, record):
+        lines = [f"TY  - {'CONF' if is_conference(record) else 'JOUR'}"]
+        title = _value(record, 'title')
+        if title:
+            lines.append(f"TI  - {_ris_line(title)}")
+        for author in split_authors(record.get('authors')):
+            lines.append(f"AU  - {author}")
+        year = _value(record, 'year')
+        if year:
+            lines.append(f"PY  - {year}")
+        venue = venue_of(record.get('publisher_info'))
+        if venue:
+            lines.append(f"T2  - {_ris_line(venue)}")
+        abstract = _value(record, 'abstract')
+        if abstract:
+            lines.append(f"AB  - {_ris_line(abstract)}")
+        for keyword in _value(record, 'topic_terms').split('; '):
+            if keyword:
+                lines.append(f"KW  - {keyword}")
+        link = _value(record, 'link')
+        if link:
+            lines.append(f"UR  - {link}")
+        doc_id = _value(record, 'doc_id')
+        if doc_id:
+            lines.append(f"AN  - {doc_id}")
+        lines.append('ER  - \n')
+        self.file.write('\n'.join(lines) + '\n')
+
+    def close(self):
+        self.file.close()
+
+
+WRITERS = {'csv': CsvWriter, 'xlsx': XlsxWriter, 'bib': BibTeXWriter, 'ris': RisWriter}
+
+
+def _suffix(n):
+    letters = ''
+    while n > 0:
+        n, r = divmod(n - 1, 26)
+        letters = chr(ord('a') + r) + letters
+    return letters
+
+
+def _bib_escape(text):
+    return RE_BIB_SPECIAL.sub(r'\\\1', ' '.join(text.split()))
+
+
+def _ris_line(text):
+    return ' '.join(text.split())
+
+
+def export_records(records, output_file, fmt=None, deduplicator=None, fields=EXPORT_FIELDS):
+    """把记录迭代器写入文件，返回 (写出数, 跳过的重复数)
+
+    fmt 缺省时按扩展名判断；deduplicator 为 StreamingDeduplicator 时边写边去重；
+    fields 为CSV/XLSX的列
+    """
+    fmt = fmt or os.path.splitext(output_file)[1].lstrip('.').lower()
+    if fmt not in WRITERS:
+        raise ValueError(f"不支持的导出格式：{fmt}（可选 {', '.join(FORMATS)}）")
+
+    writer = WRITERS[fmt](output_file, fields)
+    written = skipped = 0
+    try:
+        for record in records:
+            if deduplicator is not None and deduplicator.is_duplicate(record):
+                skipped += 1
+                continue
+            writer.write(record)
+            written += 1
+    finally:
+        writer.close()
+    return written, skipped
+
+
+def synthetic_records(n, seed=1, pool_size=1000):
+    """基准测试用的合成记录（从预生成的记录池中循环取用，避免生成开销计入导出耗时）"""
+    import random
+
+    rng = random.Random(seed)
+    words = ('deep learning radar channel estimation beamforming federated transformer lidar '
+             'vehicle sensing network graph optimization wireless mmwave attention').split()
+    venues = ('IEEE Access', 'IEEE Transactions on Signal Processing',
+              '2023 IEEE International Conference on Communications (ICC)')
+    pool = [{
+        'title': ' '.join(rng.choice(words) for _ in range(10)).capitalize(),
+        'authors': '; '.join(f"Author{rng.randrange(5000)} Name{rng.randrange(5000)}" for _ in range(4)),
+        'year': str(rng.randrange(2010, 2025)),
+        'publisher_info': rng.choice(venues),
+        'abstract': ' '.join(rng.choice(words) for _ in range(150)),
+        'source_query_text': '("deep learning" OR "neural network") AND radar',
+    } for _ in range(pool_size)]
+    for i in range(n):
+        record = dict(pool[i % pool_size])
+        record['link'] = f"https://ieeexplore.ieee.org/document/{i}/"
+        record['doc_id'] = str(i)
+        record['source_query_id'] = str(i % 80 + 1)
+        yield record
+
+
+def benchmark(n=200000, formats=FORMATS, memory_sample=20000):
+    """测量各格式的导出吞吐量，以及峰值内存（tracemalloc，单独在 memory_sample 条记录上测量）"""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in formats:
+            if fmt == 'xlsx':
+                try:
+                    import openpyxl  # noqa: F401
+                except ImportError:
+                    print("  跳过 xlsx（未安装 openpyxl）")
+                    continue
+            path = os.path.join(tmp, f"bench.{fmt}")
+            start = time.perf_counter()
+            written, _ = export_records(synthetic_records(n), path, fmt)
+            elapsed = time.perf_counter() - start
+            file_mb = os.path.getsize(path) / 1024 / 1024
+
+            # tracemalloc会显著拖慢执行，峰值内存单独测量；写出是逐条进行的，峰值与记录数无关
+            tracemalloc.start()
+            export_records(synthetic_records(min(n, memory_sample)), path, fmt)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            results.append({
+                'format': fmt,
+                'records': written,
+                'seconds': elapsed,
+                'records_per_sec': written / elapsed if elapsed else 0,
+                'peak_mb': peak / 1024 / 1024,
+                'file_mb': file_mb,
+            })
+            r = results[-1]
+            print(f"  {fmt:<5} {r['records']:>8} 条  {r['seconds']:>7.2f} 秒  "
+                  f"{r['records_per_sec']:>9.0f} 条/秒  峰值内存 {r['peak_mb']:>6.1f} MB  文件 {r['file_mb']:>7.1f} MB")
+    return results
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] not in ('export', 'bench'):
+        print(__doc__)
+        return
+
+    if args[0] == 'bench':
+        n = int(args[args.index('--records') + 1]) if '--records' in args else 200000
+        formats = args[args.index('--formats') + 1].split(',') if '--formats' in args else FORMATS
+        print(f"📏 导出基准测试：{n} 条合成记录")
+        benchmark(n, formats)
+        return
+
+    positional = [a for a in args[1:] if not a.startswith('--')]
+    if not positional or positional[0] not in FORMATS:
+        print(__doc__)
+        return
+    fmt = positional[0]
+    output_file = positional[1] if len(positional) > 1 else f"all_articles.{fmt}"
+
+    from article_records import iter_articles
+    from near_duplicates import StreamingDeduplicator
+
+    deduplicator = StreamingDeduplicator() if '--dedupe' in args else None
+    start = time.perf_counter()
+    try:
+        written, skipped = export_records(iter_articles(), output_file, fmt, deduplicator)
+    except ImportError:
+        print("✗ 需要安装 openpyxl：")
+        print("  pip install openpyxl")
+        return
+    print(f"✓ 导出完成：{written} 篇文献（跳过重复 {skipped} 篇），耗时 {time.perf_counter() - start:.1f} 秒")
+    print(f"  文件位置：{os.path.abspath(output_file)}")
+
+
+if __name__ == "__main__":
+    main()
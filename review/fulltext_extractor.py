@@ -0,0 +1,182 @@
+"""
+PDF全文提取（下载后处理阶段）
+从 ieee_pdfs/ 中的PDF提取全文、章节标题和DOI，按doc_id保存为压缩的sidecar文件：
+
+    ieee_fulltext/<doc_id>.json.gz
+
+只处理内容哈希（SHA-256，来自语料清单）发生变化的文件，提取在进程池中并行执行
+需要安装 pypdf：pip install pypdf
+
+用法：
+    python fulltext_extractor.py          # 提取新增/变化的PDF
+    python fulltext_extractor.py --force  # 全部重新提取
+"""
+
+import gzip
+import json
+import logging
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+DEFAULT_FULLTEXT_DIR = 'ieee_fulltext'
+
+RE_DOI = re.compile(r'\b(10\.\d{4,9}/[-._;()/:A-Za-z0-9]+)')
+# IEEE论文常见的章节标题："I. INTRODUCTION"、"2.1 Related Work"、"REFERENCES"
+RE_HEADINGS = [
+    re.compile(r'^(?:[IVX]{1,6})\.\s+[A-Z][A-Z0-9 ,:&\-/]{2,80}$'),
+    re.compile(r'^\d{1,2}(?:\.\d{1,2}){0,2}\.?\s+[A-Z][A-Za-z0-9 ,:&\-/]{2,80}$'),
+    re.compile(r'^(?:ABSTRACT|Abstract|INDEX TERMS|Index Terms|REFERENCES|References|ACKNOWLEDGMENT|Acknowledgment|APPENDIX|Appendix|CONCLUSIONS?|Conclusions?)\b.{0,60}$'),
+]
+
+
+def doc_id_from_filename(filename):
+    """PDF文件名为 {doc_id}_{标题}.pdf"""
+    return os.path.splitext(filename)[0].split('_', 1)[0]
+
+
+def find_doi(text):
+    """在文本中查找第一个DOI"""
+    m = RE_DOI.search(text)
+    if not m:
+        return None
+    return m.group(1).rstrip('.,;)')
+
+
+def find_headings(lines, limit=100):
+    """识别章节标题"""
+    headings = []
+    for line in lines:
+        line = line.strip()
+        if 3 <= len(line) <= 90 and any(p.match(line) for p in RE_HEADINGS):
+            if not headings or headings[-1] != line:
+                headings.append(line)
+                if len(headings) >= limit:
+                    break
+    return headings
+
+
+def sidecar_path(fulltext_dir, doc_id):
+    return os.path.join(fulltext_dir, f"{doc_id}.json.gz")
+
+
+def load_fulltext(doc_id, fulltext_dir=DEFAULT_FULLTEXT_DIR):
+    """读取一篇文献的全文记录，不存在时返回None"""
+    path = sidecar_path(fulltext_dir, doc_id)
+    if not os.path.exists(path):
+        return None
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def extract_pdf(task):
+    """提取单个PDF（在子进程中运行），写入sidecar文件并返回元数据"""
+    pdf_path, doc_id, sha256, fulltext_dir = task
+    record = {
+        'doc_id': doc_id,
+        'filename': os.path.basename(pdf_path),
+        'sha256': sha256,
+        'pages': 0,
+        'chars': 0,
+        'doi': None,
+        'headings': 0,
+        'error': None
+    }
+    try:
+        from pypdf import PdfReader
+
+        logging.getLogger('pypdf').setLevel(logging.ERROR)
+        reader = PdfReader(pdf_path)
+        if reader.is_encrypted:
+            reader.decrypt('')
+        pages = []
+        for page in reader.pages:
+            try:
+                pages.append(page.extract_text() or '')
+            except Exception:
+                pages.append('')
+
+        text = '\n'.join(pages)
+        # 从第一页（IEEE在页眉/页脚印DOI）开始查找，找不到再搜全文
+        doi = find_doi(pages[0] if pages else '') or find_doi(text)
+        headings = find_headings(text.splitlines())
+
+        with gzip.open(sidecar_path(fulltext_dir, doc_id), 'wt', encoding='utf-8', compresslevel=6) as f:
+            json.dump({
+                'doc_id': doc_id,
+                'filename': record['filename'],
+                'sha256': sha256,
+                'doi': doi,
+                'headings': headings,
+                'pages': pages
+            }, f, ensure_ascii=False)
+
+        record.update(pages=len(pages), chars=len(text), doi=doi, headings=len(headings))
+    except Exception as e:
+        record['error'] = str(e)[:200]
+    return record
+
+
+def extract_new_pdfs(manifest, fulltext_dir=DEFAULT_FULLTEXT_DIR, workers=None, force=False, verbose=True):
+    """提取所有新增或内容变化的PDF，返回本次处理的记录列表"""
+    try:
+        import pypdf  # noqa: F401
+    except ImportError:
+        print("✗ 需要安装 pypdf：")
+        print("  pip install pypdf")
+        return []
+
+    os.makedirs(fulltext_dir, exist_ok=True)
+
+    # 先同步PDF目录（只对大小/修改时间变化的文件重新计算哈希）
+    manifest.sync_pdfs()
+    done = {} if force else manifest.fulltext_hashes()
+
+    tasks = []
+    for pdf in manifest.pdf_files():
+        doc_id = doc_id_from_filename(pdf['filename'])
+        prev = done.get(doc_id)
+        # 内容未变：成功的需要sidecar仍然存在，失败的不再重复尝试
+        if prev and prev[0] == pdf['sha256'] and (prev[1] or os.path.exists(sidecar_path(fulltext_dir, doc_id))):
+            continue
+        pdf_path = os.path.join(manifest.pdf_dir, pdf['filename'])
+        tasks.append((pdf_path, doc_id, pdf['sha256'], fulltext_dir))
+
+    if not tasks:
+        if verbose:
+            print("✓ 没有需要提取全文的新PDF")
+        return []
+
+    if verbose:
+        print(f"📄 正在提取 {len(tasks)} 个PDF的全文...")
+
+    if len(tasks) == 1 or workers == 1:
+        records = [extract_pdf(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            records = list(pool.map(extract_pdf, tasks, chunksize=max(1, len(tasks) // 64)))
+
+    manifest.save_fulltext_records(records)
+
+    if verbose:
+        failed = [r for r in records if r['error']]
+        with_doi = sum(1 for r in records if r['doi'])
+        print(f"✓ 全文提取完成：成功 {len(records) - len(failed)} 个，失败 {len(failed)} 个，识别DOI {with_doi} 个")
+        for r in failed[:10]:
+            print(f"  ✗ {r['filename'][:60]}：{r['error']}")
+    return records
+
+
+def main():
+    from corpus_manifest import CorpusManifest
+
+    manifest = CorpusManifest()
+    start = datetime.now()
+    extract_new_pdfs(manifest, force='--force' in sys.argv)
+    print(f"  耗时：{(datetime.now() - start).total_seconds():.1f} 秒")
+
+
+if __name__ == "__main__":
+    main()
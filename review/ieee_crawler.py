@@ -8,7 +8,11 @@ import time
 import random
 import json
 import os
+import sys
+import threading
+from collections import deque
 from datetime import datetime
+from urllib.parse import urlsplit
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
@@ -17,6 +21,21 @@ from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
 import logging
+from crawl_clock import SYSTEM_CLOCK
+from crawl_metrics import CrawlMetrics
+from crawl_profiler import CrawlProfiler
+from status_server import CrawlStatus, StatusLogHandler, StatusServer, DEFAULT_STATUS_PORT
+from corpus_manifest import CorpusManifest, MANIFEST_FILENAME
+from article_records import ResultWriter
+from fulltext_extractor import extract_new_pdfs, DEFAULT_FULLTEXT_DIR
+from query_overlap import load_recrawl_plan
+from citation_graph import CitationGraph
+from scheduler import EndpointScheduler, classify
+from proxy_pool import ProxyPool, chrome_proxy_argument, looks_blocked
+from work_queue import open_queue, default_worker_id, Heartbeat
+from snowball import SnowballFrontier, SnowballClient, SnowballCrawler, RelevanceScorer, add_seeds, SNOWBALL_FILENAME
+from page_parser import SITE_URL, PDF_URL_SCRIPT, safe_pdf_filename, doc_id_from_link
+from retry_policy import RetryEngine, CrawlError, HttpStatusError, classify_error, STALE_ELEMENT, DRIVER_CRASH, BLOCKED, NOT_PDF
 
 # 配置日志
 logging.basicConfig(
@@ -29,10 +48,16 @@ logging.basicConfig(
 )
 
 class IEEECrawler:
-    def __init__(self, csv_file='IEEE_Xplore_检索式汇总_修正版.csv'):
-        """初始化爬虫"""
+    def __init__(self, csv_file='IEEE_Xplore_检索式汇总_修正版.csv', site_url=SITE_URL, clock=None):
+        """初始化爬虫
+
+        site_url: 网站地址，测试时可指向本地模拟服务器（mock_ieee_server.py）
+        clock: 所有等待和计时使用的时钟（默认系统时钟；模拟器传入虚拟时钟）
+        """
         self.csv_file = csv_file
-        self.base_url = "https://ieeexplore.ieee.org/search/searchresult.jsp"
+        self.clock = clock or SYSTEM_CLOCK
+        self.site_url = site_url.rstrip('/')
+        self.base_url = f"{self.site_url}/search/searchresult.jsp"
         
         # 频率控制：60-120秒随机间隔（安全2倍）
         self.min_delay = 60  
@@ -51,14 +76,51 @@ class IEEECrawler:
         self.pdf_dir = 'ieee_pdfs'  # PDF保存目录
         os.makedirs(self.pdf_dir, exist_ok=True)
         
+        # 爬取结束后提取新PDF的全文（需要pypdf）
+        self.extract_fulltext = True
+        self.fulltext_dir = DEFAULT_FULLTEXT_DIR
+        # 全文提取后抽取参考文献，更新引用图
+        self.extract_references = True
+        
         # 结果保存目录
         self.output_dir = 'ieee_results'
         os.makedirs(self.output_dir, exist_ok=True)
         
-        # 进度文件
+        # 语料清单（检查脚本直接查询，无需重新解析结果文件）
+        self.manifest = CorpusManifest(os.path.join(self.output_dir, MANIFEST_FILENAME), self.output_dir, self.pdf_dir)
+        
+        # 进度文件（PDF传输线程也会写入失败记录，读写时加锁）
         self.progress_file = 'crawl_progress.json'
+        self._progress_lock = threading.RLock()
         self.load_progress()
         
+        # 阶段计时与指标（导出到结果目录）
+        self.metrics = CrawlMetrics(clock=self.clock)
+        
+        # 剖析模式（--profile）：每个检索式一份火焰图和内存报告，None表示不剖析
+        self.profiler = None
+        
+        # 增量模式（--incremental）：按最新排序，遇到已有的文献就停止翻页，只抓新发表的文献
+        self.incremental = False
+        
+        # 实时状态接口（None表示不启动）
+        self.status_port = DEFAULT_STATUS_PORT
+        self.status = CrawlStatus()
+        self.status.stage_source = self.metrics
+        self.status_server = None
+        
+        # 按端点类型和主机调度请求（PDF传输在后台线程中进行）
+        self.scheduler = EndpointScheduler.from_config(metrics=self.metrics)
+        self.status.scheduler_source = self.scheduler
+        
+        # 代理池（config.json 的 proxy_settings；未启用时为None）
+        self.proxy_pool = ProxyPool.from_config()
+        if self.proxy_pool is not None:
+            logging.info(f"已启用代理池：{len(self.proxy_pool)} 个代理，轮换方式：{self.proxy_pool.rotate}")
+        
+        # 重试策略与熔断器（crawler_settings.max_retries 和 retry_settings）
+        self.retry = RetryEngine.from_config(metrics=self.metrics, clock=self.clock)
+        
         # 初始化浏览器（延迟到实际使用时）
         self.driver = None
         
@@ -70,11 +132,62 @@ class IEEECrawler:
             logging.info(f"加载进度：已完成 {len(self.progress.get('completed', []))} 个检索式")
         else:
             self.progress = {'completed': [], 'failed': [], 'last_query_time': None}
+        self._progress_defaults()
+    
+    def _progress_defaults(self):
+        self.progress.setdefault('failed_pdfs', [])
+        # 增量爬取的高水位：检索式 -> 最新的doc_id、检查时间、本次新增篇数
+        self.progress.setdefault('high_water', {})
+    
+    def reset_progress(self):
+        """清除进度（从头开始）"""
+        self.progress = {'completed': [], 'failed': [], 'last_query_time': None}
+        self._progress_defaults()
+        self.save_progress()
     
     def save_progress(self):
         """保存爬取进度"""
-        with open(self.progress_file, 'w', encoding='utf-8') as f:
-            json.dump(self.progress, f, ensure_ascii=False, indent=2)
+        with self._progress_lock:
+            with open(self.progress_file, 'w', encoding='utf-8') as f:
+                json.dump(self.progress, f, ensure_ascii=False, indent=2)
+    
+    def record_failed_query(self, query_id, result):
+        """记录失败的检索式（同一检索式只保留最近一次）"""
+        with self._progress_lock:
+            self.progress['failed'] = [f for f in self.progress['failed'] if f.get('query_id') != query_id]
+            self.progress['failed'].append({
+                'query_id': query_id,
+                'error': result.get('error', 'unknown'),
+                'category': result.get('category', 'other'),
+                'attempts': result.get('attempts', 1),
+                'time': datetime.now().isoformat()
+            })
+    
+    def clear_failed_query(self, query_id):
+        with self._progress_lock:
+            self.progress['failed'] = [f for f in self.progress['failed'] if f.get('query_id') != query_id]
+    
+    def record_failed_pdf(self, article, category):
+        """记录下载失败、以后值得重试的PDF（没有订阅权限的不记录）"""
+        if category == NOT_PDF:
+            return
+        doc_id = article.get('doc_id')
+        with self._progress_lock:
+            failed = [f for f in self.progress['failed_pdfs'] if f.get('doc_id') != doc_id]
+            failed.append({
+                'query_id': self.status.current_query_id,
+                'doc_id': doc_id,
+                'title': article.get('title'),
+                'link': article.get('link'),
+                'category': category,
+                'time': datetime.now().isoformat()
+            })
+            self.progress['failed_pdfs'] = failed
+    
+    def clear_failed_pdf(self, article):
+        with self._progress_lock:
+            self.progress['failed_pdfs'] = [f for f in self.progress['failed_pdfs']
+                                            if f.get('doc_id') != article.get('doc_id')]
     
     def init_driver(self):
         """初始化Selenium WebDriver"""
@@ -106,6 +219,10 @@ class IEEECrawler:
         }
         options.add_experimental_option('prefs', prefs)
         
+        # 代理（每个浏览器会话固定一个）
+        if self.proxy_pool is not None:
+            options.add_argument(chrome_proxy_argument(self.proxy_pool.acquire_session()))
+        
         try:
             # 使用 webdriver-manager 自动管理 ChromeDriver
             service = Service(ChromeDriverManager().install())
@@ -119,6 +236,51 @@ class IEEECrawler:
             logging.info("提示：请确保已安装Chrome浏览器")
             raise
     
+    def browser_get(self, url):
+        """浏览器打开页面（经过调度器对应端点的队列）；使用代理池时记录延迟和被封信号
+
+        页面疑似被拦截时抛出 CrawlError(blocked)，由重试策略退避并计入熔断器
+        """
+        proxy = self.proxy_pool.session_proxy if self.proxy_pool is not None else None
+        with self.scheduler.slot(classify(url), urlsplit(url).hostname):
+            start = self.clock.perf_counter()
+            try:
+                self.driver.get(url)
+            except Exception:
+                if proxy:
+                    self.proxy_pool.record(proxy, self.clock.perf_counter() - start, ok=False)
+                raise
+        blocked = looks_blocked(text=self.driver.title)
+        if proxy:
+            self.proxy_pool.record(proxy, self.clock.perf_counter() - start, blocked=blocked)
+        if blocked:
+            logging.warning(f"页面疑似被拦截（{self.driver.title[:50]}）")
+            raise CrawlError(BLOCKED, f"页面疑似被拦截：{self.driver.title[:50]}")
+    
+    def restart_driver(self):
+        """关闭并重新启动浏览器"""
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception as e:
+                logging.debug(f"关闭浏览器出错：{e}")
+            self.driver = None
+        self.init_driver()
+    
+    def recover_driver(self, category):
+        """重试前的恢复动作：浏览器崩溃时重启浏览器"""
+        if category == DRIVER_CRASH:
+            logging.warning("浏览器会话已失效，重启浏览器")
+            self.metrics.inc('driver_restarts')
+            self.restart_driver()
+    
+    def rotate_browser_proxy(self):
+        """浏览器所用的代理被隔离时，重启浏览器换一个代理"""
+        if self.proxy_pool is None or self.driver is None or self.proxy_pool.session_healthy():
+            return
+        logging.info("当前代理已被隔离，重启浏览器更换代理")
+        self.restart_driver()
+    
     def load_queries(self):
         """从CSV加载检索式"""
         queries = []
@@ -144,16 +306,37 @@ class IEEECrawler:
             # 页面操作间隔：3-8秒
             delay = random.uniform(self.small_delay_min, self.small_delay_max)
         
-        time.sleep(delay)
+        with self.metrics.span(f'delay.{delay_type}', kind='wait'):
+            self.clock.sleep(delay)
+    
+    def search_url(self, query_text, page_number=1):
+        """检索结果页地址（第2页起带 pageNumber，下载PDF后用它回到结果列表；增量模式按最新排序）"""
+        url = f"{self.base_url}?queryText={query_text}&newsearch=true"
+        if self.incremental:
+            url += "&sortType=newest"
+        return url if page_number == 1 else f"{url}&pageNumber={page_number}"
+    
+    def result_filename(self, query_id):
+        return f"{self.output_dir}/query_{query_id}_results.json"
     
-    def search_query(self, query_text):
-        """执行单个检索（支持多页）"""
+    def search_query(self, query_text, query_id=None, known_ids=None):
+        """执行单个检索（支持多页）
+
+        逐页处理：提取一页 -> 下载这一页的PDF -> 写出这一页的文献并释放，内存与页数无关。
+        给出 query_id 时文献逐页追加到结果文件（检索失败时保留原有文件），返回值中没有 articles；
+        否则收集到返回值的 articles 中（工作者模式要把整个结果提交给协调者）
+
+        known_ids：增量模式下该检索式已有的doc_id。遇到第一篇已有的文献就停止翻页，
+        新文献写在结果文件前面、原有文献接在后面，返回值的 new_articles 为新文献
+        """
+        writer = None
         try:
             # 构建搜索URL
-            search_url = f"{self.base_url}?queryText={query_text}&newsearch=true"
+            search_url = self.search_url(query_text)
             
             logging.info(f"正在访问：{search_url[:100]}...")
-            self.driver.get(search_url)
+            with self.metrics.span('search.driver_get'):
+                self.browser_get(search_url)
             
             # 等待页面加载
             self.safe_delay('small')
@@ -163,105 +346,272 @@ class IEEECrawler:
             
             # 尝试获取结果数量
             try:
-                result_stats = wait.until(
-                    EC.presence_of_element_located((By.CLASS_NAME, "Dashboard-statistics"))
-                )
+                with self.metrics.span('search.wait_statistics', kind='wait'):
+                    result_stats = wait.until(
+                        EC.presence_of_element_located((By.CLASS_NAME, "Dashboard-statistics"))
+                    )
                 total_results = result_stats.text
                 logging.info(f"找到结果：{total_results}")
             except TimeoutException:
                 logging.warning("未能获取结果统计信息")
                 total_results = "未知"
             
-            # 提取多页文献列表
-            all_articles = []
+            # 文献的去向：结果文件（逐页追加）或内存列表
+            collected = []
+            if query_id is not None:
+                writer = ResultWriter(self.result_filename(query_id), {
+                    'query_id': query_id,
+                    'query_text': query_text,
+                    'crawl_time': datetime.now().isoformat(),
+                    'total_results': total_results,
+                })
+                emit = writer.write_articles
+            else:
+                emit = collected.extend
+            
+            articles_count = 0
+            pages = 0
+            new_articles = []
+            reached_known = False
+            title_hashes = set()
+            downloaded_count = 0
+            # 已提交PDF下载、等待写出的文献（按顺序，传输完成后才写出，保证PDF标记正确）
+            pending = deque()
             
             for page_num in range(1, self.max_pages + 1):
                 logging.info(f"正在提取第 {page_num} 页...")
                 
-                # 提取当前页的文献
-                page_articles = self.extract_articles()
+                # 提取当前页的文献（元素失效时重新提取本页）
+                with self.metrics.span('search.extract_page'):
+                    page_articles = self.retry.call('page', self.extract_articles, raise_errors=True)
                 
                 if not page_articles:
                     logging.warning(f"第 {page_num} 页没有找到文献，停止翻页")
                     break
+                pages += 1
+                
+                # 增量模式：结果按最新排序，第一篇已有的文献之后都是已爬取过的
+                if known_ids is not None:
+                    for position, article in enumerate(page_articles):
+                        if article['doc_id'] in known_ids:
+                            logging.info(f"第 {page_num} 页第 {position + 1} 篇已在语料中（{article['doc_id']}），停止翻页")
+                            page_articles = page_articles[:position]
+                            reached_known = True
+                            break
+                    new_articles.extend(page_articles)
+                    if not page_articles:
+                        break
                 
-                all_articles.extend(page_articles)
-                logging.info(f"第 {page_num} 页提取了 {len(page_articles)} 篇文献（累计：{len(all_articles)} 篇）")
+                articles_count += len(page_articles)
+                title_hashes.update(hash(a['title']) for a in page_articles)
+                self.status.page_extracted(page_num, len(page_articles))
+                self.metrics.inc('pages_extracted')
+                self.metrics.inc('articles_extracted', len(page_articles))
+                logging.info(f"第 {page_num} 页提取了 {len(page_articles)} 篇文献（累计：{articles_count} 篇）")
+                
+                has_next = page_num < self.max_pages and not reached_known
+                if self.download_pdf:
+                    # 下载PDF会离开结果页，先确认有没有下一页
+                    if has_next:
+                        with self.metrics.span('search.next_page'):
+                            has_next = self.find_next_button() is not None
+                    
+                    logging.info(f"开始下载第 {page_num} 页 {len(page_articles)} 篇文献的PDF...")
+                    for idx, article in enumerate(page_articles, 1):
+                        with self.metrics.span('search.download_pdf'):
+                            pending.append((article, self.download_article_pdf(article, idx, len(page_articles), wait=False)))
+                        
+                        # 每篇文章的浏览器步骤之后等待（PDF传输在后台按pdf队列的间隔进行）
+                        if idx < len(page_articles):
+                            self.safe_delay('small')
+                    
+                    # 写出传输已完成的文献（其余的留到后面，不等待）
+                    downloaded_count += self.flush_pending(pending, emit, block=False)
+                else:
+                    emit(page_articles)
+                del page_articles
                 
                 # 如果不是最后一页，尝试翻页
-                if page_num < self.max_pages:
-                    if not self.go_to_next_page():
+                if not has_next:
+                    if page_num < self.max_pages and not reached_known:
+                        logging.info("没有下一页了，停止翻页")
+                    break
+                with self.metrics.span('search.next_page'):
+                    if self.download_pdf:
+                        self.browser_get(self.search_url(query_text, page_num + 1))
+                    elif not self.go_to_next_page():
                         logging.info("没有下一页了，停止翻页")
                         break
-                    
-                    # 翻页后等待
-                    self.safe_delay('small')
+                
+                # 翻页后等待
+                self.safe_delay('small')
             
-            logging.info(f"✓ 共提取了 {len(all_articles)} 篇文献（{len(set(a['title'] for a in all_articles))} 篇去重）")
+            # 等待后台传输完成，写出剩余的文献
+            with self.metrics.span('search.wait_pdf_transfers', kind='wait'):
+                downloaded_count += self.flush_pending(pending, emit, block=True)
             
-            # 下载PDF（如果启用）
-            downloaded_count = 0
-            if self.download_pdf and all_articles:
-                logging.info(f"\n开始下载 {len(all_articles)} 篇文献的PDF...")
-                
-                for idx, article in enumerate(all_articles, 1):
-                    success = self.download_article_pdf(article, idx, len(all_articles))
-                    if success:
-                        downloaded_count += 1
-                    
-                    # 每篇文章下载后等待
-                    if idx < len(all_articles):
-                        self.safe_delay('small')
-                
-                logging.info(f"✓ PDF下载完成：成功 {downloaded_count}/{len(all_articles)} 篇")
+            if known_ids is not None:
+                logging.info(f"✓ 新文献 {len(new_articles)} 篇（{pages} 页）")
+                # 原有文献接在新文献后面（只读这一个检索式的结果文件）
+                new_ids = {a['doc_id'] for a in new_articles}
+                previous = [a for a in self.previous_articles(query_id) if a.get('doc_id') not in new_ids]
+                emit(previous)
+                articles_count += len(previous)
+                del previous
+            
+            logging.info(f"✓ 共提取了 {articles_count} 篇文献（{len(title_hashes)} 篇去重）")
+            if self.download_pdf and articles_count:
+                logging.info(f"✓ PDF下载完成：成功 {downloaded_count}/{articles_count} 篇")
             
-            return {
+            result = {
                 'success': True,
                 'total_results': total_results,
-                'articles_count': len(all_articles),
-                'articles': all_articles,
+                'articles_count': articles_count,
+                'pages': pages,
                 'pdfs_downloaded': downloaded_count
             }
+            if known_ids is not None:
+                result['new_articles'] = new_articles
+                result['reached_known'] = reached_known
+            if writer is not None:
+                result['result_file'] = writer.close()
+                self.record_result_file(writer)
+            else:
+                result['articles'] = collected
+            return result
             
         except TimeoutException:
             logging.error("页面加载超时")
-            return {'success': False, 'error': 'timeout'}
+            return {'success': False, 'error': 'timeout', 'category': 'timeout'}
         except Exception as e:
             logging.error(f"搜索出错：{e}")
-            return {'success': False, 'error': str(e)}
+            return {'success': False, 'error': str(e), 'category': classify_error(e)}
+        finally:
+            if writer is not None:
+                writer.discard()
+    
+    def previous_articles(self, query_id):
+        """检索式原有结果文件中的文献（没有结果文件时为空）"""
+        filename = self.result_filename(query_id)
+        if not os.path.exists(filename):
+            return []
+        with open(filename, 'r', encoding='utf-8') as f:
+            return json.load(f).get('articles', [])
+    
+    def known_doc_ids(self, query_id):
+        """检索式已有的doc_id：优先查语料清单，清单中没有时读结果文件"""
+        known = self.manifest.query_doc_ids(query_id)
+        if not known:
+            known = {a.get('doc_id') for a in self.previous_articles(query_id)}
+        return known
     
-    def extract_articles(self):
-        """提取当前页面的文献信息"""
+    def record_high_water(self, query_id, result):
+        """记录检索式的高水位（最新的doc_id），下次增量爬取从这里往后看"""
+        entry = self.progress['high_water'].get(query_id, {})
+        if result['new_articles']:
+            entry['newest_doc_id'] = result['new_articles'][0]['doc_id']
+        entry['checked_at'] = datetime.now().isoformat()
+        entry['new_items'] = len(result['new_articles'])
+        entry['pages'] = result['pages']
+        self.progress['high_water'][query_id] = entry
+    
+    def write_delta_report(self, entries):
+        """写出本次增量爬取的新增文献报告（JSON + CSV），返回JSON文件名"""
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        json_file = os.path.join(self.output_dir, f"delta_{stamp}.json")
+        report = {
+            'generated_at': datetime.now().isoformat(),
+            'queries': len(entries),
+            'new_items': sum(len(e['new_articles']) for e in entries),
+            'pages': sum(e['pages'] for e in entries),
+            'entries': entries,
+        }
+        with open(json_file, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        
+        fields = ['query_id', 'doc_id', 'title', 'authors', 'year', 'link', 'pdf_downloaded']
+        with open(json_file[:-5] + '.csv', 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fields, extrasaction='ignore')
+            writer.writeheader()
+            for entry in entries:
+                for article in entry['new_articles']:
+                    writer.writerow(dict(article, query_id=entry['query_id']))
+        
+        logging.info(f"📈 增量爬取：{report['queries']} 个检索式，{report['pages']} 页，"
+                     f"新增 {report['new_items']} 篇 | 报告：{json_file}")
+        return json_file
+    
+    @staticmethod
+    def flush_pending(pending, emit, block):
+        """按顺序写出PDF传输已结束的文献，返回其中下载成功的篇数；block=True 时等待全部传输结束"""
+        downloaded = 0
+        while pending:
+            article, item = pending[0]
+            if not block and not isinstance(item, bool) and not item.done():
+                break
+            pending.popleft()
+            if item is True or (not isinstance(item, bool) and item.result()):
+                downloaded += 1
+            emit([article])
+        return downloaded
+    
+    def search_with_retry(self, query_text, query_id=None, known_ids=None):
+        """执行检索，失败时按错误类别退避后重新检索（浏览器崩溃时先重启浏览器）"""
+        attempt = 0
+        while True:
+            self.retry.breaker.before_request()
+            result = self.search_query(query_text, query_id, known_ids)
+            category = None if result['success'] else result.get('category', 'other')
+            self.retry.record('query', category)
+            if category is None or not self.retry.should_retry(category, attempt):
+                result['attempts'] = attempt + 1
+                return result
+            self.retry.wait('query', category, attempt)
+            self.recover_driver(category)
+            attempt += 1
+    
+    def extract_articles(self, raise_errors=False):
+        """提取当前页面的文献信息
+
+        raise_errors=True 时元素失效、浏览器崩溃等错误向上抛出（由重试策略重新提取本页），
+        等待列表超时仍视为本页没有结果
+        """
         articles = []
         
         try:
             # 等待文献列表加载
             wait = WebDriverWait(self.driver, 10)
-            wait.until(EC.presence_of_element_located((By.CLASS_NAME, "List-results-items")))
+            with self.metrics.span('extract.wait_list', kind='wait'):
+                wait.until(EC.presence_of_element_located((By.CLASS_NAME, "List-results-items")))
             
             # 滚动页面以加载所有结果（IEEE使用懒加载）
             logging.info("正在滚动页面加载所有结果...")
-            last_height = self.driver.execute_script("return document.body.scrollHeight")
-            
-            for _ in range(3):  # 最多滚动3次
-                # 滚动到页面底部
-                self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(2)  # 等待加载
+            with self.metrics.span('extract.scroll'):
+                last_height = self.driver.execute_script("return document.body.scrollHeight")
                 
-                # 计算新的滚动高度
-                new_height = self.driver.execute_script("return document.body.scrollHeight")
-                if new_height == last_height:
-                    break  # 没有新内容了
-                last_height = new_height
-            
-            # 滚回顶部
-            self.driver.execute_script("window.scrollTo(0, 0);")
-            time.sleep(1)
+                for _ in range(3):  # 最多滚动3次
+                    # 滚动到页面底部
+                    self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                    with self.metrics.span('extract.scroll_sleep', kind='wait'):
+                        self.clock.sleep(2)  # 等待加载
+                    
+                    # 计算新的滚动高度
+                    new_height = self.driver.execute_script("return document.body.scrollHeight")
+                    if new_height == last_height:
+                        break  # 没有新内容了
+                    last_height = new_height
+                
+                # 滚回顶部
+                self.driver.execute_script("window.scrollTo(0, 0);")
+                with self.metrics.span('extract.scroll_sleep', kind='wait'):
+                    self.clock.sleep(1)
             
             # 获取所有文献项
-            article_elements = self.driver.find_elements(By.CLASS_NAME, "result-item")
+            with self.metrics.span('extract.find_items'):
+                article_elements = self.driver.find_elements(By.CLASS_NAME, "result-item")
             logging.info(f"在页面中找到 {len(article_elements)} 个文献项")
             
+            parse_start = self.clock.perf_counter()
             for idx, element in enumerate(article_elements, 1):
                 try:
                     # 提取标题（优先使用h3 a）
@@ -300,7 +650,7 @@ class IEEECrawler:
                         abstract = "N/A"
                     
                     # 提取文档ID（用于命名PDF）
-                    doc_id = link.split('/')[-2] if '/' in link else f"doc_{idx}"
+                    doc_id = doc_id_from_link(link, idx)
                     
                     article = {
                         'title': title,
@@ -317,20 +667,26 @@ class IEEECrawler:
                     articles.append(article)
                     
                 except Exception as e:
+                    if raise_errors and classify_error(e) in (STALE_ELEMENT, DRIVER_CRASH):
+                        raise
                     logging.warning(f"提取第 {idx} 篇文献时出错：{e}")
                     continue
             
+            self.metrics.observe('extract.parse_items', self.clock.perf_counter() - parse_start)
             logging.info(f"成功提取 {len(articles)} 篇文献信息")
             
         except Exception as e:
+            if raise_errors and not isinstance(e, TimeoutException):
+                raise
             logging.error(f"提取文献列表失败：{e}")
+            self.metrics.inc('extract_failed')
         
         return articles
     
-    def go_to_next_page(self):
-        """翻到下一页"""
-        try:
-            # 方法1：查找并点击"下一页"按钮
+    def find_next_button(self):
+        """查找可用的下一页按钮，没有时返回None"""
+        with self.metrics.span('next_page.find_button'):
+            # 方法1：查找"下一页"按钮
             next_buttons = self.driver.find_elements(By.XPATH, "//button[@aria-label='Next page']")
             
             if not next_buttons:
@@ -344,151 +700,434 @@ class IEEECrawler:
             if not next_buttons:
                 # 方法4：通过CSS选择器查找
                 next_buttons = self.driver.find_elements(By.CSS_SELECTOR, ".pagination .next, .pagination li:last-child a")
+        
+        for button in next_buttons:
+            try:
+                # 检查按钮是否可用（没有disabled属性）
+                if button.is_enabled() and button.is_displayed():
+                    return button
+            except Exception as e:
+                logging.debug(f"检查翻页按钮失败：{e}")
+        
+        logging.warning("未找到可用的下一页按钮")
+        self.metrics.inc('next_page_missing')
+        return None
+    
+    def go_to_next_page(self):
+        """点击下一页按钮翻页"""
+        try:
+            button = self.find_next_button()
+            if button is None:
+                return False
             
-            for button in next_buttons:
-                try:
-                    # 检查按钮是否可用（没有disabled属性）
-                    if button.is_enabled() and button.is_displayed():
-                        # 滚动到按钮位置
-                        self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", button)
-                        time.sleep(1)
-                        
-                        # 点击
-                        button.click()
-                        logging.info("✓ 成功翻页")
-                        return True
-                except Exception as e:
-                    logging.debug(f"尝试点击按钮失败：{e}")
-                    continue
+            # 滚动到按钮位置
+            self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", button)
+            with self.metrics.span('next_page.scroll_sleep', kind='wait'):
+                self.clock.sleep(1)
             
-            logging.warning("未找到可用的下一页按钮")
-            return False
+            # 点击
+            with self.metrics.span('next_page.click'):
+                button.click()
+            logging.info("✓ 成功翻页")
+            return True
             
         except Exception as e:
             logging.error(f"翻页失败：{e}")
             return False
     
-    def download_article_pdf(self, article, current_idx, total_count):
-        """下载单篇文章的PDF（两步流程：打开查看器 -> 下载）"""
+    def download_article_pdf(self, article, current_idx, total_count, wait=True):
+        """下载单篇文章的PDF（两步流程：打开查看器 -> 下载）
+
+        浏览器步骤在当前线程执行；PDF传输交给调度器的pdf队列，wait=False 时返回Future，不等待传输完成
+        """
         doc_id = article.get('doc_id', 'unknown')
         title = article.get('title', 'Untitled')[:50]  # 限制标题长度
         link = article.get('link', '')
         
         # 生成安全的文件名（移除特殊字符）
-        safe_filename = "".join(c for c in f"{doc_id}_{title}" if c.isalnum() or c in (' ', '-', '_')).strip()
-        safe_filename = safe_filename[:100]  # 限制文件名长度
+        safe_filename = safe_pdf_filename(doc_id, title)
         pdf_path = os.path.join(self.pdf_dir, f"{safe_filename}.pdf")
         
         # 检查是否已下载
         if os.path.exists(pdf_path) and os.path.getsize(pdf_path) > 1000:  # 至少1KB
             logging.info(f"[{current_idx}/{total_count}] PDF已存在：{safe_filename}.pdf")
+            self.metrics.inc('pdf_results', result='exists')
             article['pdf_downloaded'] = True
             article['pdf_path'] = pdf_path
+            self.manifest.record_pdf(pdf_path)
+            self.clear_failed_pdf(article)
             return True
         
         try:
             logging.info(f"[{current_idx}/{total_count}] 正在下载：{title[:40]}...")
-            
-            # 第一步：访问文章页面，找到PDF查看器链接
-            self.driver.get(link)
-            time.sleep(3)
-            
-            # 查找PDF查看器链接（stamp.jsp）
-            pdf_viewer_link = None
+            # 浏览器步骤出错（超时、被拦截、浏览器崩溃等）时按重试策略重新打开
+            resolved = self.retry.call('article', self.resolve_pdf_url, link, title, on_retry=self.recover_driver)
+        except Exception as e:
+            category = classify_error(e)
+            logging.error(f"  ✗ 下载失败（{category}）：{str(e)[:100]}")
+            self.metrics.inc('pdf_results', result='error')
+            self.record_failed_pdf(article, category)
+            return False
+        
+        if resolved is None:
+            return False
+        pdf_download_url, headers, cookies = resolved
+        
+        future = self.scheduler.submit('pdf', urlsplit(pdf_download_url).hostname, self.transfer_pdf,
+                                       article, pdf_download_url, headers, cookies, pdf_path, safe_filename)
+        return future.result() if wait else future
+    
+    def resolve_pdf_url(self, link, title):
+        """打开文章页和PDF查看器，找到getPDF.jsp下载地址
+
+        返回 (下载地址, 请求头, cookies)；页面上没有PDF链接时返回None
+        """
+        # 第一步：访问文章页面，找到PDF查看器链接
+        with self.metrics.span('pdf.open_document'):
+            self.browser_get(link)
+        with self.metrics.span('pdf.document_sleep', kind='wait'):
+            self.clock.sleep(3)
+        
+        # 查找PDF查看器链接（stamp.jsp）
+        pdf_viewer_link = None
+        with self.metrics.span('pdf.find_viewer_link'):
             try:
                 # 方法1：查找包含stamp.jsp的链接
                 pdf_links = self.driver.find_elements(By.XPATH, "//a[contains(@href, 'stamp.jsp')]")
                 if pdf_links:
                     pdf_viewer_link = pdf_links[0].get_attribute('href')
                     logging.info(f"  ✓ 找到PDF查看器链接")
-            except:
-                pass
+            except Exception as e:
+                if classify_error(e) == DRIVER_CRASH:
+                    raise
             
             if not pdf_viewer_link:
                 # 方法2：查找PDF按钮
                 try:
                     pdf_button = self.driver.find_element(By.CSS_SELECTOR, "[class*='pdf']")
                     pdf_viewer_link = pdf_button.get_attribute('href')
-                except:
-                    pass
-            
-            if not pdf_viewer_link:
-                logging.warning(f"  ✗ 未找到PDF查看器链接：{title[:40]}")
-                return False
+                except Exception as e:
+                    if classify_error(e) == DRIVER_CRASH:
+                        raise
+        
+        if not pdf_viewer_link:
+            logging.warning(f"  ✗ 未找到PDF查看器链接：{title[:40]}")
+            self.metrics.inc('pdf_results', result='no_viewer_link')
+            return None
+        
+        # 第二步：打开PDF查看器页面并提取iframe中的PDF URL
+        logging.info(f"  → 打开PDF查看器...")
+        with self.metrics.span('pdf.open_viewer'):
+            self.browser_get(pdf_viewer_link)
+        with self.metrics.span('pdf.viewer_sleep', kind='wait'):
+            self.clock.sleep(3)  # 等待页面加载
+        
+        # 第三步：查找iframe中的getPDF.jsp链接
+        pdf_download_url = None
+        resolve_start = self.clock.perf_counter()
+        try:
+            # 方法1：查找iframe的src属性
+            iframes = self.driver.find_elements(By.TAG_NAME, "iframe")
+            for iframe in iframes:
+                src = iframe.get_attribute('src')
+                if src and 'getPDF.jsp' in src:
+                    pdf_download_url = src
+                    logging.info(f"  ✓ 找到PDF下载URL（iframe）")
+                    break
             
-            # 第二步：打开PDF查看器页面并提取iframe中的PDF URL
-            logging.info(f"  → 打开PDF查看器...")
-            self.driver.get(pdf_viewer_link)
-            time.sleep(3)  # 等待页面加载
+            # 方法2：在页面源码中查找（在浏览器中匹配，不把整页源码传回）
+            if not pdf_download_url:
+                pdf_download_url = self.driver.execute_script(PDF_URL_SCRIPT)
+                if pdf_download_url:
+                    logging.info(f"  ✓ 找到PDF下载URL（源码）")
+                    
+        except Exception as e:
+            if classify_error(e) == DRIVER_CRASH:
+                raise
+            logging.debug(f"  查找PDF URL失败：{e}")
+        self.metrics.observe('pdf.resolve_url', self.clock.perf_counter() - resolve_start)
+        
+        if not pdf_download_url:
+            logging.warning(f"  ✗ 未找到PDF下载URL：{title[:40]}")
+            self.metrics.inc('pdf_results', result='no_download_url')
+            return None
+        
+        # 第四步的准备：复制浏览器的cookies以保持会话（传输交给调度器的pdf队列，浏览器可以继续处理下一篇）
+        cookies = {}
+        for cookie in self.driver.get_cookies():
+            cookies[cookie['name']] = cookie['value']
+        
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+            'Referer': pdf_viewer_link
+        }
+        return pdf_download_url, headers, cookies
+    
+    def transfer_pdf(self, article, pdf_download_url, headers, cookies, pdf_path, safe_filename):
+        """下载PDF文件（在调度器的pdf线程中执行，不使用浏览器）
+
+        超时、HTTP 5xx/429、被拦截时按重试策略退避后重新下载；仍失败的记录到进度文件，可用 --retry-failed 重试
+        """
+        logging.info(f"  → 开始下载PDF：{safe_filename[:40]}...")
+        try:
+            content = self.retry.call('article', self.fetch_pdf, pdf_download_url, headers, cookies)
+        except Exception as e:
+            category = classify_error(e)
+            if category == NOT_PDF:
+                logging.warning(f"  ✗ 响应不是PDF文件（可能需要订阅）")
+            else:
+                logging.error(f"  ✗ 下载失败（{category}）：{str(e)[:100]}")
+            self.metrics.inc('pdf_results', result=category)
+            self.record_failed_pdf(article, category)
+            return False
+        
+        with self.metrics.span('pdf.write_file'):
+            with open(pdf_path, 'wb') as f:
+                f.write(content)
+        article['pdf_downloaded'] = True
+        article['pdf_path'] = pdf_path
+        self.manifest.record_pdf(pdf_path, content)
+        self.clear_failed_pdf(article)
+        file_size = len(content) / 1024
+        logging.info(f"  ✓ 下载成功：{safe_filename}.pdf ({file_size:.1f} KB)")
+        self.status.pdf_downloaded()
+        self.metrics.inc('pdf_results', result='downloaded')
+        return True
+    
+    def fetch_pdf(self, pdf_download_url, headers, cookies):
+        """请求一次PDF，返回文件内容；失败时抛出带类别的错误"""
+        import requests
+        
+        proxy = self.proxy_pool.get() if self.proxy_pool is not None else None
+        transfer_start = self.clock.perf_counter()
+        try:
+            with self.metrics.span('pdf.transfer'):
+                response = requests.get(pdf_download_url, headers=headers, cookies=cookies, timeout=30,
+                                        proxies=ProxyPool.requests_proxies(proxy))
+        except Exception:
+            if proxy:
+                self.proxy_pool.record(proxy, self.clock.perf_counter() - transfer_start, ok=False)
+            raise
+        self.metrics.inc('pdf_bytes', len(response.content))
+        is_html = 'html' in response.headers.get('Content-Type', '')
+        blocked = looks_blocked(response.status_code, response.text if is_html else None)
+        if proxy:
+            self.proxy_pool.record(
+                proxy, self.clock.perf_counter() - transfer_start, ok=response.status_code == 200,
+                blocked=blocked, nbytes=len(response.content))
+        
+        if response.status_code != 200:
+            raise HttpStatusError(response.status_code)
+        if blocked:
+            raise CrawlError(BLOCKED, "PDF请求被拦截（验证码页面）")
+        # 检查是否真的是PDF文件
+        if len(response.content) <= 1000 or response.content[:4] != b'%PDF':
+            raise CrawlError(NOT_PDF, "响应不是PDF文件")
+        return response.content
+    
+    def run_fulltext_stage(self):
+        """提取新增/变化PDF的全文、章节标题和DOI"""
+        try:
+            with self.metrics.span('fulltext.extract'):
+                records = extract_new_pdfs(self.manifest, self.fulltext_dir)
+            self.metrics.inc('fulltext_extracted', len(records))
+        except Exception as e:
+            logging.error(f"全文提取失败：{e}")
+    
+    def run_citation_stage(self):
+        """抽取新PDF的参考文献，更新引用图"""
+        try:
+            with self.metrics.span('citations.extract'):
+                graph = CitationGraph(self.output_dir, self.pdf_dir, self.fulltext_dir)
+                results = graph.build(self.manifest, verbose=False)
+                graph.close()
+            self.metrics.inc('references_extracted', sum(len(r['refs']) for r in results))
+        except Exception as e:
+            logging.error(f"参考文献抽取失败：{e}")
+    
+    def run_worker(self, queue_target, worker_id=None, poll_interval=30):
+        """作为分布式工作者运行：从协调者租用检索式，完成后提交结果（见 work_queue.py）
+
+        queue_target: 协调者地址（http://host:8777）或本机的队列数据库路径
+        本机的爬取进度文件不再使用，进度以协调者的队列为准；检索式之间仍按本机的安全延迟限速
+        """
+        worker_id = worker_id or default_worker_id()
+        queue = open_queue(queue_target, self.output_dir, self.manifest)
+        completed = 0
+        try:
+            self.start_status_server()
+            self.init_driver()
+            lease_seconds = queue.stats()['lease_seconds']
+            logging.info(f"工作者 {worker_id} 已连接：{queue_target}（租约 {lease_seconds} 秒）")
             
-            # 第三步：查找iframe中的getPDF.jsp链接
-            pdf_download_url = None
-            try:
-                # 方法1：查找iframe的src属性
-                iframes = self.driver.find_elements(By.TAG_NAME, "iframe")
-                for iframe in iframes:
-                    src = iframe.get_attribute('src')
-                    if src and 'getPDF.jsp' in src:
-                        pdf_download_url = src
-                        logging.info(f"  ✓ 找到PDF下载URL（iframe）")
+            while True:
+                try:
+                    leases = queue.lease(worker_id, 1)
+                except Exception as e:
+                    logging.warning(f"租用任务失败：{e}，{poll_interval} 秒后重试")
+                    self.clock.sleep(poll_interval)
+                    continue
+                
+                if not leases:
+                    stats = queue.stats()
+                    if stats['pending'] == 0 and stats['leased'] == 0:
                         break
+                    # 其他工作者仍在处理，等待它们完成或租约到期后被回收
+                    logging.info(f"暂无待处理任务（{stats['leased']} 个租用中），{poll_interval} 秒后重试")
+                    self.clock.sleep(poll_interval)
+                    continue
                 
-                # 方法2：从页面源码中提取
-                if not pdf_download_url:
-                    page_source = self.driver.page_source
-                    import re
-                    match = re.search(r'https://[^"\']*?getPDF\.jsp[^"\']*', page_source)
-                    if match:
-                        pdf_download_url = match.group(0).replace('&amp;', '&')
-                        logging.info(f"  ✓ 找到PDF下载URL（源码）")
-                        
-            except Exception as e:
-                logging.debug(f"  查找PDF URL失败：{e}")
-            
-            if not pdf_download_url:
-                logging.warning(f"  ✗ 未找到PDF下载URL：{title[:40]}")
-                return False
-            
-            # 第四步：使用requests直接下载PDF
-            logging.info(f"  → 开始下载PDF...")
-            try:
-                import requests
-                # 复制浏览器的cookies以保持会话
-                cookies = {}
-                for cookie in self.driver.get_cookies():
-                    cookies[cookie['name']] = cookie['value']
+                task = leases[0]
+                query_id = task['payload']['id']
+                query_text = task['payload']['text']
+                logging.info(f"\n{'='*60}")
+                logging.info(f"工作者 {worker_id} | 检索式 #{query_id}")
+                logging.info(f"检索式：{query_text[:100]}...")
+                logging.info(f"{'='*60}\n")
                 
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                    'Referer': pdf_viewer_link
-                }
+                self.start_profile(query_id)
+                self.rotate_browser_proxy()
+                self.metrics.begin_query(query_id)
+                self.status.query_started(query_id, query_text)
+                with Heartbeat(queue, worker_id, task['token'], max(5, lease_seconds / 3)) as heartbeat:
+                    try:
+                        with self.metrics.span('query.search'):
+                            result = self.search_with_retry(query_text)
+                    except KeyboardInterrupt:
+                        queue.release(task['task_id'], task['token'])
+                        raise
                 
-                response = requests.get(pdf_download_url, headers=headers, cookies=cookies, timeout=30)
+                if heartbeat.lost:
+                    outcome = 'stale'
+                elif result['success']:
+                    outcome = queue.complete(task['task_id'], task['token'],
+                                             self.result_document(query_id, query_text, result), worker_id)
+                else:
+                    outcome = queue.fail(task['task_id'], task['token'], result.get('error', 'unknown'), worker_id)
                 
-                if response.status_code == 200 and len(response.content) > 1000:
-                    # 检查是否真的是PDF文件
-                    if response.content[:4] == b'%PDF':
-                        with open(pdf_path, 'wb') as f:
-                            f.write(response.content)
-                        article['pdf_downloaded'] = True
-                        article['pdf_path'] = pdf_path
-                        file_size = len(response.content) / 1024
-                        logging.info(f"  ✓ 下载成功：{safe_filename}.pdf ({file_size:.1f} KB)")
-                        return True
-                    else:
-                        logging.warning(f"  ✗ 响应不是PDF文件（可能需要订阅）")
-                        return False
+                if outcome == 'committed':
+                    completed += 1
+                    logging.info(f"✓ 检索式 #{query_id} 已提交")
+                elif outcome == 'stale':
+                    logging.warning(f"检索式 #{query_id} 的租约已失效，结果已丢弃（由其他工作者重新处理）")
                 else:
-                    logging.warning(f"  ✗ 下载失败：HTTP {response.status_code}")
-                    return False
-                    
-            except Exception as e:
-                logging.error(f"  ✗ 下载出错：{str(e)[:100]}")
-                return False
+                    logging.error(f"✗ 检索式 #{query_id} 失败（{outcome}）")
+                
+                self.metrics.inc('queries', status='completed' if outcome == 'committed' else 'failed')
+                self.status.query_finished(outcome == 'committed')
+                summary = self.metrics.end_query()
+                if summary:
+                    logging.info(self.metrics.format_summary(summary))
+                self.export_metrics()
+                self.stop_profile()
+                
+                # 本机限速
+                self.safe_delay('large')
             
+            logging.info(f"✅ 队列已清空，本工作者提交 {completed} 个检索式")
+        except KeyboardInterrupt:
+            logging.info("\n用户中断（当前任务已归还队列）")
         except Exception as e:
-            logging.error(f"  ✗ 下载失败：{str(e)[:100]}")
-            return False
+            logging.error(f"工作者运行出错：{e}")
+        finally:
+            self.stop_profile()
+            queue.close()
+            self.scheduler.shutdown()
+            self.export_metrics()
+            self.stop_status_server()
+            if self.driver:
+                self.driver.quit()
+                self.driver = None
+                logging.info("浏览器已关闭")
+    
+    def run_snowball(self, seed_ids=None, max_depth=2, max_docs=None, mode='indegree', criteria=None, use_browser=True):
+        """滚雪球检索：从种子文献沿参考文献和被引列表扩展（前沿队列持久化，可断点续爬）
+
+        criteria: 纳入标准字典（mode='relevance' 时按标题命中的纳入词排序）
+        use_browser: 先用浏览器打开IEEE Xplore获取Cookie，再用requests调用REST接口
+        """
+        frontier = SnowballFrontier(os.path.join(self.output_dir, SNOWBALL_FILENAME), RelevanceScorer(criteria))
+        try:
+            self.start_status_server()
+            if seed_ids:
+                added = add_seeds(frontier, seed_ids)
+                logging.info(f"添加种子文献 {added} 篇")
+            
+            client = SnowballClient(self.site_url, proxy_pool=self.proxy_pool, scheduler=self.scheduler)
+            if use_browser:
+                self.init_driver()
+                self.driver.get(self.site_url)
+                self.safe_delay('small')
+                client.copy_cookies(self.driver)
+            
+            snowball = SnowballCrawler(frontier, client, delay=self.safe_delay, metrics=self.metrics,
+                                       save_results=self.save_results, results_dir=self.output_dir)
+            snowball.run(max_depth=max_depth, max_docs=max_docs, mode=mode)
+        except KeyboardInterrupt:
+            logging.info("\n用户中断滚雪球检索（已展开的文献已保存，重新运行将从中断处继续）")
+        except Exception as e:
+            logging.error(f"滚雪球检索出错：{e}")
+        finally:
+            frontier.close()
+            self.export_metrics()
+            self.stop_status_server()
+            if self.driver:
+                self.driver.quit()
+                self.driver = None
+                logging.info("浏览器已关闭")
+    
+    def enable_profiling(self, interval=0.01):
+        """打开剖析模式：报告写入 <输出目录>/profiles/"""
+        self.profiler = CrawlProfiler(os.path.join(self.output_dir, 'profiles'), interval=interval)
+    
+    def start_profile(self, query_id):
+        if self.profiler is not None:
+            self.profiler.start(f"query_{query_id}")
+    
+    def stop_profile(self):
+        """结束当前检索式的剖析，日志中输出时间分类"""
+        if self.profiler is None:
+            return
+        summary = self.profiler.stop()
+        if summary:
+            main = summary['categories'].get('main', {})
+            top = '，'.join(f"{label} {seconds:.1f}s" for label, seconds in list(main.items())[:4])
+            logging.info(f"🔬 剖析 {summary['name']}：{top or '无采样'} | 报告：{summary['report']}")
+    
+    def start_status_server(self):
+        """启动本地状态接口（端口被占用时只记录警告，不影响爬取）"""
+        if self.status_port is None or self.status_server is not None:
+            return
+        
+        # 日志同时写入内存缓冲区，供状态页显示最近日志和错误
+        handler = StatusLogHandler(self.status)
+        logging.getLogger().addHandler(handler)
+        self._status_log_handler = handler
+        
+        try:
+            self.status_server = StatusServer(self.status, port=self.status_port).start()
+            logging.info(f"状态接口：{self.status_server.url}（JSON：{self.status_server.url}status.json）")
+        except OSError as e:
+            logging.warning(f"状态接口启动失败（端口 {self.status_port}）：{e}")
+    
+    def stop_status_server(self):
+        """关闭状态接口"""
+        if self.status_server is not None:
+            self.status_server.stop()
+            self.status_server = None
+        handler = getattr(self, '_status_log_handler', None)
+        if handler is not None:
+            logging.getLogger().removeHandler(handler)
+            self._status_log_handler = None
+    
+    def export_metrics(self):
+        """导出阶段耗时指标（Prometheus文本文件 + JSON），以及各代理的统计"""
+        try:
+            self.metrics.export(self.output_dir)
+            if self.proxy_pool is not None:
+                self.proxy_pool.export(self.output_dir)
+        except Exception as e:
+            logging.warning(f"导出指标失败：{e}")
     
     def wait_for_download(self, expected_path, filename, timeout=30):
         """等待文件下载完成"""
@@ -496,7 +1135,7 @@ class IEEECrawler:
         
         # 等待下载开始和完成
         for i in range(timeout):
-            time.sleep(1)
+            self.clock.sleep(1)
             
             # 检查目标文件是否存在
             if os.path.exists(expected_path) and os.path.getsize(expected_path) > 1000:
@@ -522,11 +1161,9 @@ class IEEECrawler:
         logging.warning(f"  下载超时：{filename}")
         return False
     
-    def save_results(self, query_id, query_text, result_data):
-        """保存单个检索式的结果"""
-        filename = f"{self.output_dir}/query_{query_id}_results.json"
-        
-        output_data = {
+    def result_document(self, query_id, query_text, result_data):
+        """结果文件内容"""
+        return {
             'query_id': query_id,
             'query_text': query_text,
             'crawl_time': datetime.now().isoformat(),
@@ -534,23 +1171,125 @@ class IEEECrawler:
             'articles_count': result_data.get('articles_count', 0),
             'articles': result_data.get('articles', [])
         }
+    
+    def save_results(self, query_id, query_text, result_data):
+        """保存单个检索式的结果"""
+        filename = self.result_filename(query_id)
         
+        output_data = self.result_document(query_id, query_text, result_data)
+        self.write_result_document(filename, output_data)
+    
+    def write_result_document(self, filename, output_data):
+        """写入结果文件并更新语料清单"""
         with open(filename, 'w', encoding='utf-8') as f:
             json.dump(output_data, f, ensure_ascii=False, indent=2)
         
+        try:
+            self.manifest.record_query(output_data, filename)
+        except Exception as e:
+            logging.warning(f"更新语料清单失败（可运行 python corpus_manifest.py rebuild 修复）：{e}")
+        
         logging.info(f"结果已保存到：{filename}")
     
-    def run(self, start_from=1):
-        """运行爬虫"""
+    def record_result_file(self, writer):
+        """逐页写出的结果文件写完后更新语料清单（文献从文件中流式读回）"""
         try:
+            self.manifest.record_query(writer.document(), writer.filename)
+        except Exception as e:
+            logging.warning(f"更新语料清单失败（可运行 python corpus_manifest.py rebuild 修复）：{e}")
+        
+        logging.info(f"结果已保存到：{writer.filename}")
+    
+    def retry_failed_pdfs(self, entries):
+        """重新下载失败的PDF（按检索式读取结果文件，下载后写回该文件）"""
+        by_query = {}
+        for entry in entries:
+            by_query.setdefault(entry.get('query_id'), set()).add(entry.get('doc_id'))
+        
+        downloaded = 0
+        try:
+            self.init_driver()
+            for query_id, doc_ids in by_query.items():
+                filename = self.result_filename(query_id)
+                if not os.path.exists(filename):
+                    logging.warning(f"找不到检索式 #{query_id} 的结果文件，跳过 {len(doc_ids)} 篇PDF")
+                    continue
+                with open(filename, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                articles = [a for a in data.get('articles', []) if a.get('doc_id') in doc_ids]
+                logging.info(f"检索式 #{query_id}：重试 {len(articles)} 篇PDF")
+                
+                self.status.query_started(query_id, data.get('query_text', ''))
+                for idx, article in enumerate(articles, 1):
+                    if self.download_article_pdf(article, idx, len(articles)):
+                        downloaded += 1
+                    self.save_progress()
+                    if idx < len(articles):
+                        self.safe_delay('small')
+                self.write_result_document(filename, data)
+            logging.info(f"✓ PDF重试完成：成功 {downloaded}/{len(entries)} 篇")
+        finally:
+            self.scheduler.shutdown()
+            self.save_progress()
+            if self.driver:
+                self.driver.quit()
+                self.driver = None
+        return downloaded
+    
+    def retry_failed(self):
+        """只重新处理失败的条目：失败的检索式重新爬取，其余检索式中下载失败的PDF重新下载"""
+        query_ids = []
+        for entry in self.progress['failed']:
+            if entry.get('query_id') and entry['query_id'] not in query_ids:
+                query_ids.append(entry['query_id'])
+        # 重新爬取的检索式会重新下载其中的PDF
+        pdf_entries = [e for e in self.progress['failed_pdfs'] if e.get('query_id') not in query_ids]
+        
+        if not query_ids and not pdf_entries:
+            logging.info("没有失败的条目")
+            return
+        logging.info(f"重试失败条目：{len(query_ids)} 个检索式，{len(pdf_entries)} 篇PDF")
+        if pdf_entries:
+            try:
+                self.retry_failed_pdfs(pdf_entries)
+            except KeyboardInterrupt:
+                logging.info("\n用户中断重试")
+                return
+            except Exception as e:
+                logging.error(f"重试PDF下载出错：{e}")
+        if query_ids:
+            self.run(query_ids=query_ids)
+    
+    def run(self, start_from=1, query_ids=None):
+        """运行爬虫
+
+        query_ids: 只爬取这些检索式（包括已完成的，用于按重爬计划重新爬取）
+        增量模式（self.incremental）：默认检查所有检索式，只抓上次之后新发表的文献，结束时写出新增报告
+        """
+        delta_entries = []
+        try:
+            # 启动状态接口
+            self.start_status_server()
+            
             # 初始化浏览器
             self.init_driver()
             
             # 加载检索式
             queries = self.load_queries()
+            self.status.set_totals(
+                len(queries),
+                [q['id'] for q in queries if q['id'] in self.progress['completed']],
+                {e['query_id'] for e in self.progress['failed'] if e.get('query_id')}
+            )
             
-            # 过滤已完成的
-            remaining_queries = [q for q in queries if q['id'] not in self.progress['completed']]
+            # 过滤已完成的（指定了检索式时按指定列表重爬）
+            if query_ids is not None:
+                wanted = {str(q) for q in query_ids}
+                remaining_queries = [q for q in queries if q['id'] in wanted]
+            elif self.incremental:
+                remaining_queries = list(queries)
+            else:
+                remaining_queries = [q for q in queries if q['id'] not in self.progress['completed']]
             
             if start_from > 1:
                 remaining_queries = [q for q in remaining_queries if int(q['id']) >= start_from]
@@ -566,29 +1305,52 @@ class IEEECrawler:
                 logging.info(f"检索式：{query_text[:100]}...")
                 logging.info(f"{'='*60}\n")
                 
-                # 执行搜索
-                result = self.search_query(query_text)
+                # 执行搜索（代理被隔离时先换代理）
+                self.start_profile(query_id)
+                self.rotate_browser_proxy()
+                self.metrics.begin_query(query_id)
+                self.status.query_started(query_id, query_text)
+                known_ids = self.known_doc_ids(query_id) if self.incremental else None
+                with self.metrics.span('query.search'):
+                    # 文献逐页写入结果文件
+                    result = self.search_with_retry(query_text, query_id, known_ids)
                 
                 if result['success']:
-                    # 保存结果
-                    self.save_results(query_id, query_text, result)
+                    if self.incremental:
+                        self.record_high_water(query_id, result)
+                        delta_entries.append({
+                            'query_id': query_id,
+                            'query_text': query_text,
+                            'pages': result['pages'],
+                            'reached_known': result['reached_known'],
+                            'new_articles': [{k: a.get(k) for k in ('doc_id', 'title', 'authors', 'year', 'link', 'pdf_downloaded')}
+                                             for a in result['new_articles']],
+                        })
                     
                     # 标记为完成
-                    self.progress['completed'].append(query_id)
+                    if query_id not in self.progress['completed']:
+                        self.progress['completed'].append(query_id)
+                    self.clear_failed_query(query_id)
                     self.progress['last_query_time'] = datetime.now().isoformat()
                     self.save_progress()
                     
                     logging.info(f"✓ 检索式 #{query_id} 完成")
                 else:
-                    # 标记为失败
-                    self.progress['failed'].append({
-                        'query_id': query_id,
-                        'error': result.get('error', 'unknown'),
-                        'time': datetime.now().isoformat()
-                    })
+                    # 标记为失败（可用 --retry-failed 重新爬取）
+                    self.record_failed_query(query_id, result)
                     self.save_progress()
                     
-                    logging.error(f"✗ 检索式 #{query_id} 失败")
+                    logging.error(f"✗ 检索式 #{query_id} 失败（{result.get('category', 'other')}，"
+                                  f"尝试 {result.get('attempts', 1)} 次）")
+                
+                # 本检索式的等待/工作耗时汇总，并刷新指标文件
+                self.metrics.inc('queries', status='completed' if result['success'] else 'failed')
+                self.status.query_finished(result['success'])
+                summary = self.metrics.end_query()
+                if summary:
+                    logging.info(self.metrics.format_summary(summary))
+                self.export_metrics()
+                self.stop_profile()
                 
                 # 如果不是最后一个，则等待
                 if idx < len(remaining_queries):
@@ -598,13 +1360,31 @@ class IEEECrawler:
             logging.info("✅ 所有检索式爬取完成！")
             logging.info(f"成功：{len(self.progress['completed'])} 个")
             logging.info(f"失败：{len(self.progress['failed'])} 个")
+            if self.progress['failed_pdfs']:
+                logging.info(f"PDF下载失败（可重试）：{len(self.progress['failed_pdfs'])} 篇")
+            if self.retry.breaker.trips:
+                logging.info(f"熔断器触发：{self.retry.breaker.trips} 次")
             logging.info("="*60)
+            if self.proxy_pool is not None:
+                logging.info("代理统计：\n" + self.proxy_pool.format_report())
+            
+            # 下载后处理：提取新PDF的全文
+            if self.download_pdf and self.extract_fulltext:
+                self.run_fulltext_stage()
+                if self.extract_references:
+                    self.run_citation_stage()
             
         except KeyboardInterrupt:
             logging.info("\n用户中断爬取")
         except Exception as e:
             logging.error(f"爬虫运行出错：{e}")
         finally:
+            self.stop_profile()
+            if delta_entries:
+                self.write_delta_report(delta_entries)
+            self.scheduler.shutdown()
+            self.export_metrics()
+            self.stop_status_server()
             if self.driver:
                 self.driver.quit()
                 logging.info("浏览器已关闭")
@@ -627,8 +1407,70 @@ def main():
     ╚═══════════════════════════════════════════════════════════╝
     """)
     
-    # 创建爬虫实例
-    crawler = IEEECrawler()
+    # 创建爬虫实例（--site-url 指向本地模拟服务器做端到端测试）
+    if '--site-url' in sys.argv and sys.argv.index('--site-url') + 1 < len(sys.argv):
+        crawler = IEEECrawler(site_url=sys.argv[sys.argv.index('--site-url') + 1])
+        print(f"🧪 网站地址：{crawler.site_url}\n")
+    else:
+        crawler = IEEECrawler()
+    
+    # 剖析模式：python ieee_crawler.py --profile
+    if '--profile' in sys.argv:
+        crawler.enable_profiling()
+        print(f"🔬 剖析模式：每个检索式的火焰图和内存报告写入 {crawler.profiler.output_dir}/\n")
+    
+    # 增量爬取：python ieee_crawler.py --incremental（只抓上次之后新发表的文献）
+    if '--incremental' in sys.argv:
+        crawler.incremental = True
+        print(f"\n📈 增量爬取：按最新排序，遇到已有文献即停止翻页（已记录高水位 {len(crawler.progress['high_water'])} 个检索式）\n")
+        crawler.run()
+        return
+    
+    # 按重爬计划（query_overlap.py 生成）重新爬取
+    if '--recrawl-plan' in sys.argv:
+        idx = sys.argv.index('--recrawl-plan')
+        plan_file = sys.argv[idx + 1] if idx + 1 < len(sys.argv) else None
+        query_ids = load_recrawl_plan(plan_file, crawler.output_dir)
+        if not query_ids:
+            print("⚠️  没有找到重爬计划，请先运行 python query_overlap.py")
+            return
+        print(f"\n🔁 按重爬计划重新爬取 {len(query_ids)} 个检索式\n")
+        crawler.run(query_ids=query_ids)
+        return
+    
+    # 只重试失败的检索式和PDF：python ieee_crawler.py --retry-failed
+    if '--retry-failed' in sys.argv:
+        print(f"\n🔁 重试失败的条目：{len(crawler.progress['failed'])} 个检索式，"
+              f"{len(crawler.progress['failed_pdfs'])} 篇PDF\n")
+        crawler.retry_failed()
+        return
+    
+    # 分布式工作者：python ieee_crawler.py --worker http://协调者:8777 [--worker-id 名称]
+    if '--worker' in sys.argv:
+        idx = sys.argv.index('--worker')
+        target = sys.argv[idx + 1] if idx + 1 < len(sys.argv) else 'http://127.0.0.1:8777'
+        worker_id = sys.argv[sys.argv.index('--worker-id') + 1] if '--worker-id' in sys.argv else None
+        print(f"\n🛰️  以工作者身份运行，协调者：{target}\n")
+        crawler.run_worker(target, worker_id)
+        return
+    
+    # 滚雪球检索：python ieee_crawler.py --snowball [种子doc_id ...] [--depth 2] [--max-docs 100] [--mode relevance]
+    if '--snowball' in sys.argv:
+        args = sys.argv[sys.argv.index('--snowball') + 1:]
+        options = {'--depth': 2, '--max-docs': None, '--mode': 'indegree'}
+        for name in options:
+            if name in sys.argv and sys.argv.index(name) + 1 < len(sys.argv):
+                options[name] = sys.argv[sys.argv.index(name) + 1]
+        seed_ids = [a for i, a in enumerate(args) if a.isdigit() and (i == 0 or args[i - 1] not in options)]
+        criteria = None
+        if options['--mode'] == 'relevance' and os.path.exists('screening_criteria.json'):
+            with open('screening_criteria.json', 'r', encoding='utf-8') as f:
+                criteria = json.load(f)
+        print(f"\n❄️  滚雪球检索（深度 {options['--depth']}，排序：{options['--mode']}）\n")
+        crawler.run_snowball(seed_ids, max_depth=int(options['--depth']),
+                             max_docs=int(options['--max-docs']) if options['--max-docs'] else None,
+                             mode=options['--mode'], criteria=criteria)
+        return
     
     # 检查是否有未完成的任务
     if crawler.progress['completed']:
@@ -640,8 +1482,7 @@ def main():
         if choice != 'y':
             choice = input("是否从头开始？这将清除之前的进度 (y/n): ").strip().lower()
             if choice == 'y':
-                crawler.progress = {'completed': [], 'failed': [], 'last_query_time': None}
-                crawler.save_progress()
+                crawler.reset_progress()
                 print("✓ 进度已重置")
     
     print("\n🚀 开始爬取...\n")
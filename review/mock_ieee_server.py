@@ -0,0 +1,378 @@
+"""
+本地模拟的IEEE Xplore服务器（端到端测试和压测用，不访问外网）
+模拟爬虫经过的四类页面，页面结构与 extract_articles / go_to_next_page / download_article_pdf 使用的选择器一致：
+
+    /search/searchresult.jsp?queryText=...&pageNumber=N   检索结果页（Dashboard-statistics、result-item、Next page按钮）
+    /document/{id}/                                        文章页（stamp.jsp链接）
+    /stamp/stamp.jsp?tp=&arnumber={id}                     PDF查看器页（iframe指向getPDF.jsp）
+    /stampPDF/getPDF.jsp?tp=&arnumber={id}                 PDF文件；无订阅权限的文献返回HTML页面
+
+可配置每个检索式的结果数、每页条数、各端点的延迟分布（对数正态）、无权限文献比例、
+限流（令牌桶，超过速率返回429拦截页）和随机故障（500/503）。
+/__stats 返回各端点的请求数、状态码、并发峰值，可用于检查吞吐、并发和恢复行为
+
+爬虫通过 site_url 指向本服务器：
+    python mock_ieee_server.py 8902 --results 30-80 --paywall 0.2 --fail 0.02 --rate 5
+    python ieee_crawler.py --site-url http://127.0.0.1:8902
+"""
+
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, quote
+
+DEFAULT_MOCK_PORT = 8902
+FIRST_DOC_ID = 10000000
+
+RE_DOCUMENT = re.compile(r'^/document/(\d+)/?$')
+
+# 端点 -> (延迟中位数毫秒, 对数正态sigma)
+DEFAULT_LATENCY = {
+    'search': (800, 0.4),
+    'document': (300, 0.4),
+    'stamp': (300, 0.4),
+    'pdf': (600, 0.6),
+}
+
+WORDS = ('adaptive neural network stress detection students learning deep model prediction wearable sensor '
+         'signal analysis emotion recognition mental health framework classification transformer graph '
+         'federated optimization').split()
+
+BLOCK_PAGE = ("<html><head><title>Request Rejected - Unusual Traffic</title></head>"
+              "<body><h1>Request Rejected</h1><p>unusual traffic from your network</p></body></html>")
+ERROR_PAGE = "<html><head><title>{code} {reason}</title></head><body><h1>{code} {reason}</h1></body></html>"
+ERROR_REASONS = {500: 'Internal Server Error', 503: 'Service Unavailable'}
+PAYWALL_PAGE = ("<html><head><title>IEEE Xplore - Purchase</title></head>"
+                "<body><h1>Sign in or purchase</h1><p>Your institution does not have access.</p></body></html>")
+
+
+class MockSettings:
+    """模拟服务器的行为参数"""
+
+    def __init__(self, results=(30, 80), results_per_page=25, corpus_size=5000, paywall_ratio=0.2,
+                 failure_ratio=0.0, rate_limit=None, burst=10, latency=None, latency_scale=1.0,
+                 pdf_size=50000, seed=1):
+        self.results = results if isinstance(results, tuple) else (results, results)
+        self.results_per_page = results_per_page
+        self.corpus_size = corpus_size              # 所有检索式共享的文献池（不同检索式的结果会重叠）
+        self.paywall_ratio = paywall_ratio          # 无订阅权限的文献比例（getPDF返回HTML）
+        self.failure_ratio = failure_ratio          # 随机返回500/503的比例
+        self.rate_limit = rate_limit                # 每秒请求数上限（None表示不限流），超过返回429
+        self.burst = burst
+        self.latency = dict(DEFAULT_LATENCY)
+        self.latency.update(latency or {})
+        self.latency_scale = latency_scale          # 0表示不模拟延迟
+        self.pdf_size = pdf_size
+        self.seed = seed
+
+
+class MockCorpus:
+    """确定性的检索结果和文献：同样的检索式和种子总是得到同样的结果"""
+
+    def __init__(self, settings):
+        self.settings = settings
+
+    def result_ids(self, query_text):
+        s = self.settings
+        rng = random.Random(f"{s.seed}-query-{query_text}")
+        count = rng.randint(*s.results)
+        return [str(FIRST_DOC_ID + i) for i in rng.sample(range(s.corpus_size), min(count, s.corpus_size))]
+
+    def document(self, doc_id):
+        rng = random.Random(f"{self.settings.seed}-doc-{doc_id}")
+        return {
+            'title': " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 12))).capitalize(),
+            'authors': [f"Author{rng.randrange(900)} Name{rng.randrange(900)}" for _ in range(rng.randint(1, 5))],
+            'year': rng.randint(2015, 2025),
+            'venue': rng.choice(('IEEE Access', 'IEEE Transactions on Affective Computing',
+                                 '2024 International Conference on Sensing Systems')),
+            'paywalled': rng.random() < self.settings.paywall_ratio,
+        }
+
+    def is_document(self, doc_id):
+        return doc_id.isdigit() and 0 <= int(doc_id) - FIRST_DOC_ID < self.settings.corpus_size
+
+    def pdf_bytes(self, doc_id):
+        header = f"%PDF-1.4\n% mock document {doc_id}\n".encode('ascii')
+        return header + b'0' * max(0, self.settings.pdf_size - len(header) - 6) + b'\n%%EOF'
+
+
+class _TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class MockIEEEServer:
+    """在后台线程中运行的模拟服务器"""
+
+    def __init__(self, settings=None, host='127.0.0.1', port=DEFAULT_MOCK_PORT):
+        self.settings = settings or MockSettings()
+        self.corpus = MockCorpus(self.settings)
+        self.host = host
+        self.port = port
+        self.requests = Counter()       # 端点 -> 请求数
+        self.path_requests = Counter()  # 路径（含参数） -> 请求数，用于按路径决定随机故障
+        self.statuses = Counter()       # (端点, 状态码) -> 次数
+        self.bytes_sent = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.started_at = None
+        self._lock = threading.Lock()
+        self._rng = random.Random(self.settings.seed)
+        self._bucket = _TokenBucket(self.settings.rate_limit, self.settings.burst) \
+            if self.settings.rate_limit else None
+        self.httpd = None
+        self.thread = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def stats(self):
+        with self._lock:
+            elapsed = time.time() - self.started_at if self.started_at else 0
+            total = sum(self.requests.values())
+            return {
+                'elapsed_seconds': round(elapsed, 3),
+                'requests': dict(self.requests),
+                'statuses': {f"{endpoint} {code}": n for (endpoint, code), n in sorted(self.statuses.items())},
+                'total_requests': total,
+                'requests_per_second': round(total / elapsed, 3) if elapsed else 0.0,
+                'bytes_sent': self.bytes_sent,
+                'in_flight': self.in_flight,
+                'max_in_flight': self.max_in_flight,
+            }
+
+    def set_rate_limit(self, rate, burst=10):
+        """运行中修改限流（rate为None时取消限流）"""
+        self.settings.rate_limit = rate
+        self.settings.burst = burst
+        self._bucket = _TokenBucket(rate, burst) if rate else None
+
+    def _latency(self, endpoint):
+        median_ms, sigma = self.settings.latency.get(endpoint, (0, 0))
+        if not median_ms or not self.settings.latency_scale:
+            return 0.0
+        with self._lock:
+            value = self._rng.lognormvariate(math.log(median_ms), sigma)
+        return value / 1000 * self.settings.latency_scale
+
+    def _fails(self, request_key):
+        """该请求是否返回随机故障：同一路径第n次请求的结果只由种子决定，与并发线程的先后顺序无关"""
+        ratio = self.settings.failure_ratio
+        if not ratio:
+            return None
+        with self._lock:
+            self.path_requests[request_key] += 1
+            n = self.path_requests[request_key]
+        rng = random.Random(f"{self.settings.seed}-fail-{request_key}-{n}")
+        if rng.random() >= ratio:
+            return None
+        return 503 if rng.random() < 0.5 else 500
+
+    def search_page(self, query_text, page_number):
+        ids = self.corpus.result_ids(query_text)
+        per_page = self.settings.results_per_page
+        pages = max(1, math.ceil(len(ids) / per_page))
+        page_ids = ids[(page_number - 1) * per_page:page_number * per_page]
+        items = []
+        for doc_id in page_ids:
+            doc = self.corpus.document(doc_id)
+            authors = "".join(f'<span class="text-base-md-lh"><a href="/author/{zlib.crc32(a.encode())}">'
+                              f'<span>{a}</span></a><span class="separator">;</span></span>' for a in doc['authors'])
+            items.append(
+                f'<xpl-results-item><div class="hide-mobile"><div class="d-flex result-item">'
+                f'<div class="col result-item-align px-3"><h3 class="text-md-md-lh">'
+                f'<a class="fw-bold" href="/document/{doc_id}/">{doc["title"]}</a></h3>'
+                f'<xpl-authors-name-list><p class="author text-base-md-lh">{authors}</p></xpl-authors-name-list>'
+                f'<div class="description text-base-md-lh"><a href="/xpl/conhome/1/proceeding">{doc["venue"]}</a>'
+                f'<div class="publisher-info-container"><span>Year: {doc["year"]}</span>'
+                f'<span> | </span><span>Conference Paper</span></div></div></div></div></div></xpl-results-item>')
+        start = (page_number - 1) * per_page
+        if page_ids:
+            stats = f'Showing {start + 1}-{start + len(page_ids)} of {len(ids):,} results for {query_text}'
+            listing = f'<div class="List-results-items">{"".join(items)}</div>'
+        else:
+            stats = f'No results found for {query_text}'
+            listing = ''
+        pager = ''
+        if page_number < pages:
+            next_url = f"/search/searchresult.jsp?queryText={quote(query_text)}&pageNumber={page_number + 1}"
+            pager = (f'<div class="pagination"><button aria-label="Next page" '
+                     f'onclick="window.location.href=\'{next_url}\'">Next</button></div>')
+        return (f'<html><head><title>IEEE Xplore Search Results</title></head><body>'
+                f'<div class="ng-Dashboard"><div class="Dashboard-statistics"><span>{stats}</span></div></div>'
+                f'<div class="List-results">{listing}</div>{pager}</body></html>')
+
+    def document_page(self, doc_id):
+        doc = self.corpus.document(doc_id)
+        return (f'<html><head><title>{doc["title"]} | IEEE Journals &amp; Magazine | IEEE Xplore</title></head>'
+                f'<body><h1 class="document-title">{doc["title"]}</h1>'
+                f'<a aria-label="PDF" class="stats_PDF_{doc_id}" href="/stamp/stamp.jsp?tp=&amp;arnumber={doc_id}">'
+                f'PDF</a><div class="abstract-text">Abstract of {doc_id}</div></body></html>')
+
+    def stamp_page(self, doc_id, host):
+        return (f'<html><head><title>IEEE Xplore Full-Text PDF: </title></head><body>'
+                f'<iframe src="http://{host}/stampPDF/getPDF.jsp?tp=&amp;arnumber={doc_id}&amp;ref=" '
+                f'frameborder="0"></iframe></body></html>')
+
+    def start(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                params = parse_qs(parts.query)
+                path = parts.path
+                if path == '/__stats':
+                    self._send(200, json.dumps(mock.stats()).encode('utf-8'), 'application/json', '__stats')
+                    return
+                endpoint = mock.endpoint_of(path)
+                with mock._lock:
+                    mock.requests[endpoint] += 1
+                    mock.in_flight += 1
+                    mock.max_in_flight = max(mock.max_in_flight, mock.in_flight)
+                try:
+                    self._handle(endpoint, path, params)
+                finally:
+                    with mock._lock:
+                        mock.in_flight -= 1
+
+            def _handle(self, endpoint, path, params):
+                delay = mock._latency(endpoint)
+                if delay:
+                    time.sleep(delay)
+                if mock._bucket is not None and not mock._bucket.take():
+                    self._send(429, BLOCK_PAGE.encode('utf-8'), 'text/html; charset=utf-8', endpoint,
+                               {'Retry-After': '60'})
+                    return
+                code = mock._fails(self.path) if endpoint != 'other' else None
+                if code:
+                    page = ERROR_PAGE.format(code=code, reason=ERROR_REASONS[code])
+                    self._send(code, page.encode('utf-8'), 'text/html; charset=utf-8', endpoint)
+                    return
+                doc_id = (params.get('arnumber') or [''])[0]
+                if endpoint == 'search':
+                    query_text = (params.get('queryText') or [''])[0]
+                    page_number = max(1, int((params.get('pageNumber') or ['1'])[0] or 1))
+                    self._html(mock.search_page(query_text, page_number), endpoint)
+                elif endpoint == 'document' and mock.corpus.is_document(RE_DOCUMENT.match(path).group(1)):
+                    self._html(mock.document_page(RE_DOCUMENT.match(path).group(1)), endpoint)
+                elif endpoint == 'stamp' and mock.corpus.is_document(doc_id):
+                    self._html(mock.stamp_page(doc_id, self.headers.get('Host', f"{mock.host}:{mock.port}")), endpoint)
+                elif endpoint == 'pdf' and mock.corpus.is_document(doc_id):
+                    if mock.corpus.document(doc_id)['paywalled']:
+                        self._html(PAYWALL_PAGE, endpoint)
+                    else:
+                        self._send(200, mock.corpus.pdf_bytes(doc_id), 'application/pdf', endpoint)
+                else:
+                    self._send(404, b'<html><head><title>Page Not Found</title></head></html>',
+                               'text/html; charset=utf-8', endpoint)
+
+            def _html(self, text, endpoint):
+                self._send(200, text.encode('utf-8'), 'text/html; charset=utf-8', endpoint)
+
+            def _send(self, code, body, content_type, endpoint, headers=None):
+                with mock._lock:
+                    mock.statuses[(endpoint, code)] += 1
+                    mock.bytes_sent += len(body)
+                self.send_response(code)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self.started_at = time.time()
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    @staticmethod
+    def endpoint_of(path):
+        if path == '/search/searchresult.jsp':
+            return 'search'
+        if RE_DOCUMENT.match(path):
+            return 'document'
+        if path == '/stamp/stamp.jsp':
+            return 'stamp'
+        if path == '/stampPDF/getPDF.jsp':
+            return 'pdf'
+        return 'other'
+
+    def stop(self):
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+
+
+def parse_args(args):
+    """命令行参数 -> (端口, MockSettings)"""
+    options = {'--results': '30-80', '--paywall': '0.2', '--fail': '0', '--rate': None,
+               '--latency-scale': '1', '--seed': '1', '--per-page': '25'}
+    for name in options:
+        if name in args and args.index(name) + 1 < len(args):
+            options[name] = args[args.index(name) + 1]
+    positional = [a for i, a in enumerate(args) if not a.startswith('--') and (i == 0 or args[i - 1] not in options)]
+    low, _, high = options['--results'].partition('-')
+    settings = MockSettings(
+        results=(int(low), int(high or low)),
+        results_per_page=int(options['--per-page']),
+        paywall_ratio=float(options['--paywall']),
+        failure_ratio=float(options['--fail']),
+        rate_limit=float(options['--rate']) if options['--rate'] else None,
+        latency_scale=float(options['--latency-scale']),
+        seed=int(options['--seed']),
+    )
+    return (int(positional[0]) if positional else DEFAULT_MOCK_PORT), settings
+
+
+def main():
+    port, settings = parse_args(sys.argv[1:])
+    server = MockIEEEServer(settings, port=port).start()
+    print(f"✓ 模拟IEEE Xplore服务器已启动：{server.url}")
+    print(f"  每个检索式 {settings.results[0]}-{settings.results[1]} 条结果，每页 {settings.results_per_page} 条，"
+          f"无权限 {settings.paywall_ratio:.0%}，随机故障 {settings.failure_ratio:.0%}，"
+          f"限流 {settings.rate_limit or '无'} 次/秒")
+    print(f"  爬虫：python ieee_crawler.py --site-url {server.url}")
+    print(f"  统计：{server.url}/__stats")
+    try:
+        server.thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+        print(json.dumps(server.stats(), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+"""
+近似重复文献检测（MinHash + LSH）
+替代基于标题字符串完全相等的去重：
+- 规范化：Unicode NFKC、大小写折叠、去除标点/符号、合并空白
+- 分片：标题字符5-gram + 摘要词3-gram
+- MinHash签名 + LSH分段找候选对，再用签名估计的Jaccard相似度确认
+  （标题+摘要相似度达到阈值；或者标题足够长且相似度达到阈值、同时一方缺摘要或摘要部分相似）
+- doc_id / DOI 完全一致的直接合并
+整体为近似线性时间，返回重复簇（并查集）
+"""
+
+import re
+import unicodedata
+import zlib
+
+import numpy as np
+
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_NUM_PERM = 128
+MAX_BUCKET_PAIRS = 50
+# 仅凭标题判定重复时标题的最短长度（避免 "Editorial"、"Introduction" 之类的通用标题被合并）
+MIN_TITLE_CHARS = 20
+
+_MERSENNE_PRIME = (1 << 31) - 1
+RE_SPACES = re.compile(r'\s+')
+
+
+def normalize_text(text):
+    """规范化文本：NFKC、大小写折叠，标点和符号替换为空格"""
+    if not text or text == 'N/A':
+        return ''
+    text = unicodedata.normalize('NFKC', text).casefold()
+    text = ''.join(' ' if unicodedata.category(ch)[0] in 'PSZC' else ch for ch in text)
+    return RE_SPACES.sub(' ', text).strip()
+
+
+def title_shingles(normalized_title, char_k=5):
+    """标题字符k-gram（32位哈希集合）"""
+    t = normalized_title
+    if not t:
+        return set()
+    if len(t) <= char_k:
+        return {zlib.crc32(('t:' + t).encode('utf-8'))}
+    return {zlib.crc32(('t:' + t[i:i + char_k]).encode('utf-8')) for i in range(len(t) - char_k + 1)}
+
+
+def abstract_shingles(normalized_abstract, word_k=3):
+    """摘要词k-gram（32位哈希集合）"""
+    words = normalized_abstract.split()
+    return {zlib.crc32(('a:' + ' '.join(words[i:i + word_k])).encode('utf-8'))
+            for i in range(len(words) - word_k + 1)}
+
+
+def shingles(title, abstract, char_k=5, word_k=3):
+    """标题字符k-gram + 摘要词k-gram"""
+    return title_shingles(normalize_text(title), char_k) | abstract_shingles(normalize_text(abstract), word_k)
+
+
+def normalize_doi(doi):
+    if not doi:
+        return None
+    doi = doi.strip().lower()
+    for prefix in ('https://doi.org/', 'http://doi.org/', 'doi:'):
+        if doi.startswith(prefix):
+            doi = doi[len(prefix):]
+    return doi or None
+
+
+def _false_probabilities(threshold, bands, rows):
+    """LSH在阈值两侧的假阳性/假阴性面积（数值积分）"""
+    xs = np.linspace(0, 1, 201)
+    step = xs[1] - xs[0]
+    p = 1 - (1 - xs ** rows) ** bands
+    below = xs < threshold
+    fp = p[below].sum() * step
+    fn = (1 - p[~below]).sum() * step
+    return fp, fn
+
+
+def optimal_bands(threshold, num_perm, fn_weight=0.7):
+    """选择分段参数 (bands, rows)，偏向召回（漏报权重更高）"""
+    best, best_cost = (num_perm, 1), float('inf')
+    for bands in range(1, num_perm + 1):
+        if num_perm % bands:
+            continue
+        rows = num_perm // bands
+        fp, fn = _false_probabilities(threshold, bands, rows)
+        cost = (1 - fn_weight) * fp + fn_weight * fn
+        if cost < best_cost:
+            best, best_cost = (bands, rows), cost
+    return best
+
+
+class UnionFind:
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, x):
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            # 保留较小的下标作为根（即最早出现的文献）
+            if ra < rb:
+                self.parent[rb] = ra
+            else:
+                self.parent[ra] = rb
+
+
+class NearDuplicateDetector:
+    """MinHash/LSH近似重复检测"""
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, num_perm=DEFAULT_NUM_PERM, seed=1):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.bands, self.rows = optimal_bands(threshold, num_perm)
+
+    def signature(self, shingle_set):
+        """计算MinHash签名；空集合返回None"""
+        if not shingle_set:
+            return None
+        x = np.fromiter(shingle_set, dtype=np.uint64, count=len(shingle_set)) & np.uint64(_MERSENNE_PRIME)
+        hashed = (np.outer(self.a, x) + self.b[:, None]) % np.uint64(_MERSENNE_PRIME)
+        return hashed.min(axis=1).astype(np.uint32)
+
+    def exact_keys(self, article):
+        """完全匹配的键：doc_id 和 DOI"""
+        keys = []
+        doc_id = article.get('doc_id')
+        if doc_id and not str(doc_id).startswith('doc_'):
+            keys.append(('id', str(doc_id)))
+        doi = normalize_doi(article.get('doi'))
+        if doi:
+            keys.append(('doi', doi))
+        return keys
+
+    def features(self, article):
+        """(标题+摘要签名, 标题签名, 是否有摘要)；签名不可用时为None"""
+        title = normalize_text(article.get('title', ''))
+        t_set = title_shingles(title)
+        a_set = abstract_shingles(normalize_text(article.get('abstract', '')))
+        full_sig = self.signature(t_set | a_set)
+        title_sig = self.signature(t_set) if len(title) >= MIN_TITLE_CHARS else None
+        return full_sig, title_sig, bool(a_set)
+
+    def is_match(self, fa, fb):
+        """根据两篇文献的特征判断是否重复"""
+        full_a, title_a, abs_a = fa
+        full_b, title_b, abs_b = fb
+        full_sim = 0.0
+        if full_a is not None and full_b is not None:
+            full_sim = np.count_nonzero(full_a == full_b) / self.num_perm
+            if abs_a and abs_b and full_sim >= self.threshold:
+                return True
+        if title_a is not None and title_b is not None:
+            title_sim = np.count_nonzero(title_a == title_b) / self.num_perm
+            abstract_ok = not (abs_a and abs_b) or full_sim >= self.threshold / 2
+            return title_sim >= self.threshold and abstract_ok
+        return False
+
+    def band_keys(self, sig):
+        """签名按LSH分段后的桶键"""
+        return [sig[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def find_clusters(self, articles):
+        """返回重复簇列表（每个簇是文献下标列表，按出现顺序，长度>=2）"""
+        n = len(articles)
+        uf = UnionFind(n)
+
+        # 1. doc_id / DOI 完全一致
+        exact = {}
+        for i, article in enumerate(articles):
+            for key in self.exact_keys(article):
+                if key in exact:
+                    uf.union(exact[key], i)
+                else:
+                    exact[key] = i
+
+        # 2. MinHash签名：标题+摘要、仅标题各一份
+        features = [self.features(article) for article in articles]
+
+        # 3. LSH分段找候选对，再用签名估计的相似度确认
+        candidates = self._lsh_candidates([f[0] for f in features])
+        candidates |= self._lsh_candidates([f[1] for f in features])
+        for i, j in candidates:
+            if uf.find(i) != uf.find(j) and self.is_match(features[i], features[j]):
+                uf.union(i, j)
+
+        clusters = {}
+        for i in range(n):
+            clusters.setdefault(uf.find(i), []).append(i)
+        return [members for members in clusters.values() if len(members) > 1]
+
+    def _lsh_candidates(self, signatures):
+        """LSH分段：任意一段签名完全相同的文献对作为候选"""
+        candidates = set()
+        buckets = [{} for _ in range(self.bands)]
+        for idx, sig in enumerate(signatures):
+            if sig is None:
+                continue
+            for band, key in enumerate(self.band_keys(sig)):
+                buckets[band].setdefault(key, []).append(idx)
+        for band_buckets in buckets:
+            for members in band_buckets.values():
+                if len(members) < 2:
+                    continue
+                if len(members) <= MAX_BUCKET_PAIRS:
+                    for x in range(len(members)):
+                        for y in range(x + 1, len(members)):
+                            candidates.add((members[x], members[y]))
+                else:
+                    # 异常大的桶（如大量相同的模板文本）只与首元素比较，避免退化为平方复杂度
+                    for other in members[1:]:
+                        candidates.add((members[0], other))
+        return candidates
+
+    def deduplicate(self, articles):
+        """去重：每个簇保留最早出现的文献，返回 (去重后文献列表, 重复簇列表)"""
+        clusters = self.find_clusters(articles)
+        dropped = set()
+        for members in clusters:
+            dropped.update(members[1:])
+        unique = [a for i, a in enumerate(articles) if i not in dropped]
+        return unique, clusters
+
+
+class StreamingDeduplicator:
+    """流式去重：逐篇加入，立即判断是否与之前出现的文献重复
+
+    只为每个簇的代表文献保存签名和LSH桶，不保存文献本身，
+    适合在导出、统计时边读边去重
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, num_perm=DEFAULT_NUM_PERM, seed=1, detector=None):
+        self.detector = detector or NearDuplicateDetector(threshold, num_perm, seed)
+        self.exact = {}                      # 完全匹配键 -> 代表文献序号
+        self.rep_features = {}               # 代表文献序号 -> 特征
+        # LSH桶：段哈希 -> 代表序号（单个成员时直接存int，多个时存列表，节省内存）
+        self.full_buckets = {}
+        self.title_buckets = {}
+        self.representative = []             # 每篇文献所属簇的代表序号
+        self.cluster_sizes = {}              # 代表序号 -> 簇大小
+
+    def add(self, article):
+        """加入一篇文献，返回其代表文献序号（等于自身序号表示不是重复）"""
+        idx = len(self.representative)
+        detector = self.detector
+        keys = detector.exact_keys(article)
+
+        rep = next((self.exact[k] for k in keys if k in self.exact), None)
+        features = None
+        if rep is None:
+            features = detector.features(article)
+            rep = self._match(features)
+
+        if rep is None:
+            rep = idx
+            self.rep_features[idx] = features
+            self._index(idx, features)
+            self.cluster_sizes[idx] = 1
+        else:
+            self.cluster_sizes[rep] += 1
+        for key in keys:
+            self.exact.setdefault(key, rep)
+        self.representative.append(rep)
+        return rep
+
+    def is_duplicate(self, article):
+        """加入一篇文献，返回它是否与之前的文献重复"""
+        return self.add(article) != len(self.representative) - 1
+
+    def _bucket_keys(self, sig):
+        return [hash((band, key)) for band, key in enumerate(self.detector.band_keys(sig))]
+
+    def _match(self, features):
+        candidates = []
+        for sig, buckets in ((features[0], self.full_buckets), (features[1], self.title_buckets)):
+            if sig is None:
+                continue
+            for key in self._bucket_keys(sig):
+                members = buckets.get(key)
+                if members is None:
+                    continue
+                if isinstance(members, int):
+                    candidates.append(members)
+                else:
+                    candidates.extend(members)
+        seen = set()
+        for rep in candidates:
+            if rep in seen:
+                continue
+            seen.add(rep)
+            if self.detector.is_match(features, self.rep_features[rep]):
+                return rep
+        return None
+
+    def _index(self, idx, features):
+        for sig, buckets in ((features[0], self.full_buckets), (features[1], self.title_buckets)):
+            if sig is None:
+                continue
+            for key in self._bucket_keys(sig):
+                members = buckets.get(key)
+                if members is None:
+                    buckets[key] = idx
+                elif isinstance(members, int):
+                    buckets[key] = [members, idx]
+                elif len(members) < MAX_BUCKET_PAIRS:
+                    members.append(idx)
+
+    @property
+    def duplicate_count(self):
+        return len(self.representative) - len(self.cluster_sizes)
+
+    def clusters(self):
+        """重复簇：代表序号 -> 成员序号列表（只包含大小>=2的簇）"""
+        result = {}
+        for idx, rep in enumerate(self.representative):
+            if self.cluster_sizes[rep] > 1:
+                result.setdefault(rep, []).append(idx)
+        return result
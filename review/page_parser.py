@@ -0,0 +1,185 @@
+"""
+离线解析已保存的IEEE页面
+与 IEEECrawler.extract_articles 使用相同的选择器（result-item、h3 a、author、publisher-info-container、
+detail-info-year、description），不需要浏览器，用于解析 ieee_page_source.html 等保存的页面和基准测试。
+PDF文件名、文档ID和getPDF地址的规则也在这里，爬虫和离线解析共用。
+
+用法：
+    python page_parser.py ieee_page_source.html     # 解析检索结果页
+    python page_parser.py debug_page_source.html    # PDF查看器页：输出getPDF地址
+"""
+
+import json
+import re
+import sys
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+SITE_URL = 'https://ieeexplore.ieee.org'
+PDF_URL_PATTERN = re.compile(r'https?://[^"\']*?getPDF\.jsp[^"\']*')
+# 在浏览器中按同样的模式查找（只把匹配到的地址传回Python，不取整页源码）
+PDF_URL_SCRIPT = (r"var m = document.documentElement.outerHTML.match(/https?:\/\/[^\"']*?getPDF\.jsp[^\"']*/);"
+                  "return m ? m[0].replace(/&amp;/g, '&') : null;")
+
+# 没有结束标签的元素
+VOID_ELEMENTS = frozenset(('area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+                           'param', 'source', 'track', 'wbr'))
+
+# 类名 -> 文献字段（与 extract_articles 一致，取每个文献项中第一个匹配的元素的文本）
+TEXT_FIELDS = (('author', 'authors'), ('publisher-info-container', 'publisher_info'),
+               ('detail-info-year', 'year'), ('description', 'abstract'))
+
+
+def safe_pdf_filename(doc_id, title):
+    """PDF文件名（不含扩展名）：移除特殊字符，限制长度"""
+    safe_filename = "".join(c for c in f"{doc_id}_{title[:50]}" if c.isalnum() or c in (' ', '-', '_')).strip()
+    return safe_filename[:100]
+
+
+def doc_id_from_link(link, idx):
+    """文章链接 -> 文档ID（/document/10763288/ -> 10763288）"""
+    return link.split('/')[-2] if '/' in link else f"doc_{idx}"
+
+
+def find_pdf_url(page_source):
+    """从PDF查看器页面源码中提取getPDF.jsp地址"""
+    match = PDF_URL_PATTERN.search(page_source)
+    return match.group(0).replace('&amp;', '&') if match else None
+
+
+class _Item:
+    """正在解析的一个文献项"""
+
+    def __init__(self, depth):
+        self.depth = depth
+        self.title = None
+        self.link = None
+        self.text = {}          # 字段 -> 文本片段
+
+    def article(self, idx, base_url):
+        link = urljoin(base_url, self.link)
+        fields = {field: " ".join("".join(chunks).split()) or "N/A" for field, chunks in self.text.items()}
+        return {
+            'title': " ".join("".join(self.title).split()),
+            'link': link,
+            'authors': fields.get('authors', "N/A"),
+            'publisher_info': fields.get('publisher_info', "N/A"),
+            'year': fields.get('year', "N/A"),
+            'abstract': fields.get('abstract', "N/A"),
+            'doc_id': doc_id_from_link(link, idx),
+            'pdf_downloaded': False,
+            'pdf_path': None
+        }
+
+
+class ResultPageParser(HTMLParser):
+    """检索结果页 -> 文献列表"""
+
+    def __init__(self, base_url=SITE_URL):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.articles = []
+        self.stack = []         # 每个打开的元素：(标签, 在该元素结束时停止采集的字段)
+        self.item = None
+        self.h3_depth = None
+        self.title_depth = None
+        self.active = []        # 正在采集文本的字段
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_ELEMENTS:
+            return
+        classes = ()
+        href = None
+        for name, value in attrs:
+            if name == 'class' and value:
+                classes = value.split()
+            elif name == 'href':
+                href = value
+        closes = []
+        depth = len(self.stack)
+        item = self.item
+        if item is None:
+            if 'result-item' in classes:
+                self.item = _Item(depth)
+        else:
+            if tag == 'h3' and self.h3_depth is None:
+                self.h3_depth = depth
+            if 'result-item-title' in classes and self.title_depth is None:
+                self.title_depth = depth
+            if (tag == 'a' and item.title is None and href
+                    and (self.h3_depth is not None or self.title_depth is not None)):
+                item.title = []
+                item.link = href
+                closes.append('title')
+            for class_name, field in TEXT_FIELDS:
+                if class_name in classes and field not in item.text:
+                    item.text[field] = []
+                    closes.append(field)
+            self.active.extend(closes)
+        self.stack.append((tag, closes))
+
+    def handle_endtag(self, tag):
+        if tag in VOID_ELEMENTS:
+            return
+        # 容错：结束标签不匹配时弹出到最近的同名元素
+        for pos in range(len(self.stack) - 1, -1, -1):
+            if self.stack[pos][0] == tag:
+                break
+        else:
+            return
+        while len(self.stack) > pos:
+            _, closes = self.stack.pop()
+            for field in closes:
+                self.active.remove(field)
+            depth = len(self.stack)
+            if self.h3_depth == depth:
+                self.h3_depth = None
+            if self.title_depth == depth:
+                self.title_depth = None
+            if self.item is not None and self.item.depth == depth:
+                self._finish_item()
+
+    def handle_data(self, data):
+        if not self.active:
+            return
+        item = self.item
+        for field in self.active:
+            if field == 'title':
+                item.title.append(data)
+            else:
+                item.text[field].append(data)
+
+    def _finish_item(self):
+        item = self.item
+        self.item = None
+        self.h3_depth = self.title_depth = None
+        self.active = []
+        if item.title is not None:
+            self.articles.append(item.article(len(self.articles) + 1, self.base_url))
+
+
+def parse_result_page(html, base_url=SITE_URL):
+    """解析检索结果页源码，返回与 extract_articles 相同格式的文献列表"""
+    parser = ResultPageParser(base_url)
+    parser.feed(html)
+    parser.close()
+    return parser.articles
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("用法：python page_parser.py 页面文件.html")
+        return
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        html = f.read()
+    pdf_url = find_pdf_url(html)
+    if pdf_url:
+        print(f"PDF下载地址：{pdf_url}")
+    articles = parse_result_page(html)
+    print(f"解析到 {len(articles)} 篇文献")
+    for article in articles:
+        print(json.dumps(article, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
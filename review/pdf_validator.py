@@ -0,0 +1,339 @@
+"""
+PDF深度校验
+不只检查文件头 %PDF，还检查 %%EOF 结尾、startxref / xref 表（或xref流）、
+页数和加密状态，可以识别文件头正常但下载被截断的PDF
+
+校验在进程池中并行执行，使用内存映射读取文件；
+结果按 (路径, 大小, 修改时间) 缓存在语料清单中，重复运行只检查新增或变化的文件
+"""
+
+import mmap
+import os
+import re
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+# 文件头可以出现在前1024字节内，%%EOF 需要出现在最后1024字节内（PDF规范的宽松要求）
+HEADER_WINDOW = 1024
+TRAILER_WINDOW = 1024
+# 判定规则变化时递增：清单里缓存的旧版本结论会被重新校验
+CHECKER_VERSION = 2
+
+RE_HEADER = re.compile(rb'%PDF-(\d\.\d)')
+RE_STARTXREF = re.compile(rb'startxref\s+(\d+)')
+RE_SUBSECTION = re.compile(rb'(\d+)\s+(\d+)\s*[\r\n]')
+RE_XREF_ENTRY = re.compile(rb'(\d{10}) (\d{5}) ([nf])')
+RE_OBJ_HEADER = re.compile(rb'(\d+)\s+(\d+)\s+obj\b')
+RE_REF = rb'\s+(\d+)\s+(\d+)\s+R'
+RE_ROOT = re.compile(rb'/Root' + RE_REF)
+RE_PAGES = re.compile(rb'/Pages' + RE_REF)
+RE_COUNT = re.compile(rb'/Count\s+(\d+)')
+RE_PREV = re.compile(rb'/Prev\s+(\d+)')
+RE_PAGES_COUNT = re.compile(rb'/Type\s*/Pages\b[^>]*?/Count\s+(\d+)|/Count\s+(\d+)[^>]*?/Type\s*/Pages\b', re.S)
+RE_PAGE = re.compile(rb'/Type\s*/Page\b(?!s)')
+RE_STREAM = re.compile(rb'stream\r?\n')
+
+
+def _read_dict(buf, start, limit=8192):
+    """从start开始读取一个 << ... >> 字典（支持嵌套），返回字节串"""
+    begin = buf.find(b'<<', start, start + limit)
+    if begin < 0:
+        return b''
+    depth = 0
+    i = begin
+    end = min(len(buf), begin + limit)
+    while i < end - 1:
+        pair = buf[i:i + 2]
+        if pair == b'<<':
+            depth += 1
+            i += 2
+            continue
+        if pair == b'>>':
+            depth -= 1
+            i += 2
+            if depth == 0:
+                return buf[begin:i]
+            continue
+        i += 1
+    return buf[begin:end]
+
+
+def _parse_xref_table(buf, offset, offsets, errors):
+    """解析传统xref表，返回 trailer 字典字节串"""
+    pos = offset + 4  # 跳过 'xref'
+    size = len(buf)
+    entries = 0
+    while pos < size:
+        while pos < size and buf[pos:pos + 1] in b' \r\n\t':
+            pos += 1
+        if buf[pos:pos + 7] == b'trailer':
+            break
+        m = RE_SUBSECTION.match(buf, pos)
+        if not m:
+            errors.append('xref子段格式错误')
+            return None
+        first, count = int(m.group(1)), int(m.group(2))
+        pos = m.end()
+        for n in range(count):
+            e = RE_XREF_ENTRY.match(buf, pos)
+            if not e:
+                errors.append('xref条目格式错误')
+                return None
+            if e.group(3) == b'n':
+                offsets.setdefault(first + n, int(e.group(1)))
+            entries += 1
+            pos = e.end()
+            # 条目固定20字节，行尾可能是 "\r\n"、" \n" 或 " \r"
+            while pos < size and buf[pos:pos + 1] in b' \r\n':
+                pos += 1
+    if entries == 0:
+        errors.append('xref表为空')
+    return _read_dict(buf, pos)
+
+
+def _parse_xref_stream(buf, offset, offsets, errors):
+    """解析xref流（PDF 1.5+），返回其字典字节串"""
+    if not RE_OBJ_HEADER.match(buf, offset):
+        errors.append('startxref未指向xref表或xref流')
+        return None
+    stream_dict = _read_dict(buf, offset)
+    if b'/XRef' not in stream_dict:
+        errors.append('startxref指向的对象不是xref流')
+        return None
+
+    # 解码xref流，取出未压缩对象的偏移量（用于查找页树）
+    try:
+        w = [int(x) for x in re.search(rb'/W\s*\[\s*(\d+)\s+(\d+)\s+(\d+)\s*\]', stream_dict).groups()]
+        size_match = re.search(rb'/Size\s+(\d+)', stream_dict)
+        index = re.search(rb'/Index\s*\[([\d\s]+)\]', stream_dict)
+        if index:
+            nums = [int(x) for x in index.group(1).split()]
+            ranges = list(zip(nums[0::2], nums[1::2]))
+        else:
+            ranges = [(0, int(size_match.group(1)))]
+        _, data = _stream_data(buf, offset)
+        if b'/DecodeParms' in stream_dict and b'/Predictor' in stream_dict:
+            data = _undo_png_predictor(data, sum(w))
+        row = sum(w)
+        i = 0
+        for first, count in ranges:
+            for n in range(count):
+                rec = data[i * row:(i + 1) * row]
+                i += 1
+                if len(rec) < row:
+                    break
+                fields, p = [], 0
+                for width in w:
+                    fields.append(int.from_bytes(rec[p:p + width], 'big') if width else None)
+                    p += width
+                kind = fields[0] if w[0] else 1
+                if kind == 1:
+                    offsets.setdefault(first + n, fields[1])
+                elif kind == 2:
+                    # 压缩在对象流中的对象：(对象流编号, 流内序号)
+                    offsets.setdefault(first + n, (fields[1], fields[2]))
+    except Exception:
+        # 无法解码时仍然认为xref流存在，只是无法通过偏移量定位页树
+        pass
+    return stream_dict
+
+
+def _undo_png_predictor(data, columns):
+    """xref流常用的PNG Up预测器"""
+    row_len = columns + 1
+    out = bytearray()
+    prev = bytearray(columns)
+    for i in range(0, len(data) - row_len + 1, row_len):
+        filter_type = data[i]
+        row = bytearray(data[i + 1:i + row_len])
+        if filter_type == 2:
+            for j in range(columns):
+                row[j] = (row[j] + prev[j]) & 0xFF
+        out.extend(row)
+        prev = row
+    return bytes(out)
+
+
+def _stream_data(buf, offset):
+    """读取offset处对象的流数据（只支持FlateDecode或无压缩）"""
+    stream_dict = _read_dict(buf, offset)
+    length = re.search(rb'/Length\s+(\d+)', stream_dict)
+    s = RE_STREAM.search(buf, offset + len(stream_dict))
+    if not length or not s:
+        return stream_dict, None
+    raw = buf[s.end():s.end() + int(length.group(1))]
+    return stream_dict, zlib.decompress(raw) if b'/FlateDecode' in stream_dict else raw
+
+
+def _object_body(buf, offsets, obj_num):
+    offset = offsets.get(obj_num)
+    if isinstance(offset, tuple):
+        # 对象位于对象流中：解码对象流后按 /First 和头部偏移量定位
+        stm_offset = offsets.get(offset[0])
+        if not isinstance(stm_offset, int):
+            return None
+        try:
+            stream_dict, data = _stream_data(buf, stm_offset)
+            first = int(re.search(rb'/First\s+(\d+)', stream_dict).group(1))
+            header = data[:first].split()
+            pairs = list(zip(header[0::2], header[1::2]))
+            start = first + int(pairs[offset[1]][1])
+            end = first + int(pairs[offset[1] + 1][1]) if offset[1] + 1 < len(pairs) else len(data)
+            return _read_dict(data[start:end], 0)
+        except Exception:
+            return None
+    if offset is None or offset >= len(buf):
+        return None
+    return _read_dict(buf, offset)
+
+
+def _count_pages(buf, offsets, root_ref):
+    """页数：优先从 Catalog -> Pages -> /Count 读取，失败时退回扫描"""
+    if root_ref is not None:
+        catalog = _object_body(buf, offsets, root_ref)
+        if catalog:
+            m = RE_PAGES.search(catalog)
+            if m:
+                pages = _object_body(buf, offsets, int(m.group(1)))
+                if pages:
+                    c = RE_COUNT.search(pages)
+                    if c:
+                        return int(c.group(1)), 'page_tree'
+
+    # 退回：取所有 /Type /Pages 节点中最大的 /Count（根节点）
+    counts = [int(a or b) for a, b in RE_PAGES_COUNT.findall(buf)]
+    if counts:
+        return max(counts), 'pages_scan'
+
+    # 最后：统计 /Type /Page 对象（对象流压缩时可能为0）
+    n = len(RE_PAGE.findall(buf))
+    return (n, 'page_scan') if n else (None, None)
+
+
+def validate_pdf(path):
+    """校验单个PDF，返回结果字典"""
+    verdict = {
+        'path': path,
+        'valid': False,
+        'version': None,
+        'has_header': False,
+        'has_eof': False,
+        'xref': None,           # 'table' / 'stream' / None
+        'pages': None,
+        'pages_method': None,
+        'encrypted': False,
+        'errors': [],
+        'checker_version': CHECKER_VERSION
+    }
+    errors = verdict['errors']
+
+    try:
+        size = os.path.getsize(path)
+        if size == 0:
+            errors.append('空文件')
+            return verdict
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            # 1. 文件头
+            m = RE_HEADER.search(buf, 0, min(size, HEADER_WINDOW))
+            if not m:
+                errors.append('缺少%PDF文件头')
+                return verdict
+            verdict['has_header'] = True
+            verdict['version'] = m.group(1).decode()
+
+            # 2. 结尾 %%EOF（截断的下载通常缺少它）
+            tail_start = max(0, size - TRAILER_WINDOW)
+            if buf.rfind(b'%%EOF', tail_start) < 0:
+                errors.append('缺少%%EOF结尾（文件可能被截断）')
+            else:
+                verdict['has_eof'] = True
+
+            # 3. startxref -> xref表/xref流
+            sx = buf.rfind(b'startxref', tail_start)
+            offsets = {}
+            trailer = None
+            xref_error = False
+            if sx < 0:
+                errors.append('缺少startxref')
+            else:
+                sm = RE_STARTXREF.match(buf, sx)
+                xref_offset = int(sm.group(1)) if sm else -1
+                if not 0 <= xref_offset < size:
+                    errors.append('startxref偏移量无效或超出文件范围')
+                seen = set()
+                while 0 <= xref_offset < size and xref_offset not in seen:
+                    seen.add(xref_offset)
+                    if buf[xref_offset:xref_offset + 4] == b'xref':
+                        section = _parse_xref_table(buf, xref_offset, offsets, errors)
+                        kind = 'table'
+                    else:
+                        section = _parse_xref_stream(buf, xref_offset, offsets, errors)
+                        kind = 'stream'
+                    # 任何一段xref解析失败（包括 /Prev 指向的旧段）都视为xref损坏
+                    if section is None:
+                        xref_error = True
+                        break
+                    verdict['xref'] = verdict['xref'] or kind
+                    if trailer is None:
+                        trailer = section
+                    # 增量更新的PDF有多个xref段，通过 /Prev 串联
+                    prev = RE_PREV.search(section)
+                    xref_offset = int(prev.group(1)) if prev else -1
+
+            # 4. 加密与页数
+            root_ref = None
+            if trailer:
+                verdict['encrypted'] = b'/Encrypt' in trailer
+                r = RE_ROOT.search(trailer)
+                root_ref = int(r.group(1)) if r else None
+                if root_ref is None:
+                    errors.append('trailer缺少/Root')
+            verdict['pages'], verdict['pages_method'] = _count_pages(buf, offsets, root_ref)
+            if not verdict['pages']:
+                errors.append('无法确定页数')
+
+        verdict['valid'] = (verdict['has_header'] and verdict['has_eof']
+                            and verdict['xref'] is not None and not xref_error)
+    except Exception as e:
+        errors.append(f'读取失败：{e}')
+    return verdict
+
+
+def validate_directory(pdf_dir='ieee_pdfs', manifest=None, workers=None, force=False):
+    """校验目录下所有PDF，返回 [(filename, size, verdict)]
+
+    manifest 为 CorpusManifest 时使用其中缓存的结果，只校验新增或变化的文件
+    """
+    files = []
+    if os.path.isdir(pdf_dir):
+        with os.scandir(pdf_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith('.pdf') and entry.is_file():
+                    stat = entry.stat()
+                    files.append((entry.name, entry.path, stat.st_size, stat.st_mtime))
+    files.sort()
+
+    cached = {} if (manifest is None or force) else manifest.pdf_verdicts()
+    results = {}
+    todo = []
+    for name, path, size, mtime in files:
+        hit = cached.get(path)
+        if (hit and hit['size'] == size and hit['mtime'] == mtime
+                and hit['verdict'].get('checker_version') == CHECKER_VERSION):
+            results[name] = hit['verdict']
+        else:
+            todo.append((name, path, size, mtime))
+
+    if todo:
+        paths = [t[1] for t in todo]
+        if len(todo) == 1 or workers == 1:
+            verdicts = [validate_pdf(p) for p in paths]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                verdicts = list(pool.map(validate_pdf, paths, chunksize=max(1, len(paths) // 64)))
+        for (name, path, size, mtime), verdict in zip(todo, verdicts):
+            results[name] = verdict
+        if manifest is not None:
+            manifest.save_pdf_verdicts([(t[1], t[2], t[3], v) for t, v in zip(todo, verdicts)])
+
+    return [(name, size, results[name]) for name, _, size, _ in files], len(todo)
@@ -0,0 +1,221 @@
+"""
+检索式重叠分析
+给每篇去重后的文献分配整数ID，每个检索式表示为一个位集（Python整数，第i位=文献i），据此计算：
+- 检索式×检索式交集矩阵（以及Jaccard相似度）
+- 每个检索式的独有贡献（只有它检索到的文献数）
+- 贪心最小检索式覆盖（按边际新增文献数依次选择，直到覆盖率达到目标）
+并给出重爬建议，写入 ieee_results/recrawl_plan.json，供 ieee_crawler.py --recrawl-plan 使用
+
+用法：
+    python query_overlap.py [--coverage 0.99] [--min-unique 0.05]
+"""
+
+import csv
+import json
+import os
+import sys
+from datetime import datetime
+
+from article_records import iter_queries
+from near_duplicates import StreamingDeduplicator
+
+RECRAWL_PLAN_FILENAME = 'recrawl_plan.json'
+DEFAULT_COVERAGE = 1.0
+# 独有文献占比达到该值的检索式即使不在最小覆盖中也建议重爬
+DEFAULT_MIN_UNIQUE_RATIO = 0.05
+
+
+def popcount(x):
+    try:
+        return x.bit_count()
+    except AttributeError:  # Python < 3.10
+        return bin(x).count('1')
+
+
+class QueryOverlap:
+    """检索式位集与重叠统计"""
+
+    def __init__(self, results_dir='ieee_results', deduplicator=None):
+        self.results_dir = results_dir
+        self.deduplicator = deduplicator or StreamingDeduplicator()
+        self.query_ids = []
+        self.bitsets = {}
+        self.article_ids = {}    # 代表文献序号 -> 紧凑整数ID
+        self.total_results = {}
+
+    def load(self):
+        """流式扫描结果文件，构建每个检索式的位集"""
+        for query, articles in iter_queries(self.results_dir):
+            bits = 0
+            for article in articles:
+                rep = self.deduplicator.add(article)
+                article_id = self.article_ids.setdefault(rep, len(self.article_ids))
+                bits |= 1 << article_id
+            if query.query_id in self.bitsets:
+                self.bitsets[query.query_id] |= bits
+            else:
+                self.query_ids.append(query.query_id)
+                self.bitsets[query.query_id] = bits
+            self.total_results[query.query_id] = query.total_results
+        return self
+
+    @property
+    def article_count(self):
+        return len(self.article_ids)
+
+    def sizes(self):
+        return {q: popcount(self.bitsets[q]) for q in self.query_ids}
+
+    def intersection_matrix(self):
+        """交集矩阵：matrix[i][j] = 检索式i与j共同检索到的文献数"""
+        bits = [self.bitsets[q] for q in self.query_ids]
+        n = len(bits)
+        matrix = [[0] * n for _ in range(n)]
+        for i in range(n):
+            matrix[i][i] = popcount(bits[i])
+            for j in range(i + 1, n):
+                matrix[i][j] = matrix[j][i] = popcount(bits[i] & bits[j])
+        return matrix
+
+    def unique_contributions(self):
+        """每个检索式独有的文献数（其他检索式都没有检索到）"""
+        seen_once = seen_more = 0
+        for q in self.query_ids:
+            bits = self.bitsets[q]
+            seen_more |= seen_once & bits
+            seen_once |= bits
+        only_once = seen_once & ~seen_more
+        return {q: popcount(self.bitsets[q] & only_once) for q in self.query_ids}
+
+    def greedy_cover(self, coverage=DEFAULT_COVERAGE):
+        """贪心最小覆盖：返回 [(检索式ID, 边际新增文献数, 累计覆盖率)]"""
+        universe = 0
+        for q in self.query_ids:
+            universe |= self.bitsets[q]
+        total = popcount(universe)
+        if not total:
+            return []
+
+        covered = 0
+        covered_count = 0
+        remaining = list(self.query_ids)
+        cover = []
+        while remaining and covered_count < coverage * total:
+            best, best_gain = None, 0
+            for q in remaining:
+                gain = popcount(self.bitsets[q] & ~covered)
+                if gain > best_gain:
+                    best, best_gain = q, gain
+            if best is None:
+                break
+            covered |= self.bitsets[best]
+            covered_count += best_gain
+            remaining.remove(best)
+            cover.append((best, best_gain, covered_count / total))
+        return cover
+
+    def report(self, coverage=DEFAULT_COVERAGE, min_unique_ratio=DEFAULT_MIN_UNIQUE_RATIO):
+        """每个检索式的重叠统计和重爬建议"""
+        sizes = self.sizes()
+        unique = self.unique_contributions()
+        matrix = self.intersection_matrix()
+        cover = {q: (rank, gain) for rank, (q, gain, _) in enumerate(self.greedy_cover(coverage), 1)}
+
+        rows = []
+        for i, q in enumerate(self.query_ids):
+            size = sizes[q]
+            # 与其他检索式的最大重叠（占本检索式的比例）
+            best_j, best_overlap = None, 0
+            for j, other in enumerate(self.query_ids):
+                if j != i and matrix[i][j] > best_overlap:
+                    best_j, best_overlap = other, matrix[i][j]
+            unique_ratio = unique[q] / size if size else 0.0
+            if q in cover or unique_ratio >= min_unique_ratio:
+                decision = 'recrawl'
+            else:
+                decision = 'skip'
+            rows.append({
+                'query_id': q,
+                'articles': size,
+                'total_results': self.total_results.get(q, 'N/A'),
+                'unique': unique[q],
+                'unique_ratio': round(unique_ratio, 4),
+                'max_overlap_query': best_j or '',
+                'max_overlap': best_overlap,
+                'max_overlap_ratio': round(best_overlap / size, 4) if size else 0.0,
+                'cover_rank': cover[q][0] if q in cover else '',
+                'cover_gain': cover[q][1] if q in cover else '',
+                'decision': decision,
+            })
+        return rows
+
+    def export(self, output_dir='.', coverage=DEFAULT_COVERAGE, min_unique_ratio=DEFAULT_MIN_UNIQUE_RATIO):
+        """导出 query_overlap.csv、query_intersections.csv，并写入重爬计划"""
+        rows = self.report(coverage, min_unique_ratio)
+        report_file = os.path.join(output_dir, 'query_overlap.csv')
+        with open(report_file, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()) if rows else ['query_id'])
+            writer.writeheader()
+            writer.writerows(rows)
+
+        matrix_file = os.path.join(output_dir, 'query_intersections.csv')
+        with open(matrix_file, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow([''] + self.query_ids)
+            for q, row in zip(self.query_ids, self.intersection_matrix()):
+                writer.writerow([q] + row)
+
+        plan = {
+            'generated_at': datetime.now().isoformat(),
+            'unique_articles': self.article_count,
+            'coverage': coverage,
+            'min_unique_ratio': min_unique_ratio,
+            'recrawl': [r['query_id'] for r in rows if r['decision'] == 'recrawl'],
+            'skip': [r['query_id'] for r in rows if r['decision'] == 'skip'],
+        }
+        plan_file = os.path.join(self.results_dir, RECRAWL_PLAN_FILENAME)
+        tmp = plan_file + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(plan, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, plan_file)
+        return rows, plan, (report_file, matrix_file, plan_file)
+
+
+def load_recrawl_plan(path=None, results_dir='ieee_results'):
+    """读取重爬计划中建议重爬的检索式ID列表；文件不存在时返回None"""
+    path = path or os.path.join(results_dir, RECRAWL_PLAN_FILENAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return [str(q) for q in json.load(f).get('recrawl', [])]
+
+
+def main():
+    args = sys.argv[1:]
+    coverage = float(args[args.index('--coverage') + 1]) if '--coverage' in args else DEFAULT_COVERAGE
+    min_unique = float(args[args.index('--min-unique') + 1]) if '--min-unique' in args else DEFAULT_MIN_UNIQUE_RATIO
+
+    print("📂 正在分析检索式重叠...")
+    overlap = QueryOverlap().load()
+    if not overlap.query_ids:
+        print("⚠️  没有找到任何结果文件")
+        return
+
+    rows, plan, files = overlap.export(coverage=coverage, min_unique_ratio=min_unique)
+
+    print(f"\n检索式：{len(overlap.query_ids)} 个，去重后文献：{overlap.article_count} 篇")
+    print(f"\n{'检索式ID':<8} {'文献数':<8} {'独有':<8} {'最大重叠':<16} {'覆盖序':<6} {'建议'}")
+    print("-" * 70)
+    for r in sorted(rows, key=lambda r: r['unique'], reverse=True):
+        overlap_text = f"#{r['max_overlap_query']} ({r['max_overlap_ratio']:.0%})" if r['max_overlap_query'] else '-'
+        print(f"{r['query_id']:<8} {r['articles']:<8} {r['unique']:<8} {overlap_text:<16} "
+              f"{str(r['cover_rank']):<6} {'重爬' if r['decision'] == 'recrawl' else '跳过'}")
+
+    print(f"\n🎯 覆盖 {coverage:.0%} 文献的最少检索式：{sum(1 for r in rows if r['cover_rank'] != '')} 个")
+    print(f"   建议重爬 {len(plan['recrawl'])} 个，跳过 {len(plan['skip'])} 个")
+    for path in files:
+        print(f"  文件位置：{os.path.abspath(path)}")
+
+
+if __name__ == "__main__":
+    main()
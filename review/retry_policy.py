@@ -0,0 +1,231 @@
+"""
+重试策略与熔断器
+把错误归类为：超时、元素失效（stale element）、HTTP 5xx、HTTP 429、被封（403/验证码）、不是PDF、浏览器崩溃、其他，
+按类别决定是否重试、最多重试几次、退避多久（指数退避 + 全抖动），重试的单位可以是一页、一篇文献或一个检索式。
+
+熔断器统计最近若干次请求中服务器侧错误（超时、5xx、429、被封）的比例，超过阈值时暂停爬取一段时间（打开），
+冷却后放行一次试探请求（半开）：成功则恢复，失败则再次打开并把冷却时间加倍，不会持续冲击正在拦截的服务器。
+
+config.json：
+    "crawler_settings": {"max_retries": 3, ...}
+    "retry_settings": {"breaker_window": 20, "breaker_error_rate": 0.5, "breaker_min_samples": 6,
+                       "breaker_cooldown": 300, "breaker_max_cooldown": 3600}
+"""
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+
+from crawl_clock import SYSTEM_CLOCK
+
+TIMEOUT = 'timeout'
+STALE_ELEMENT = 'stale_element'
+HTTP_5XX = 'http_5xx'
+HTTP_429 = 'http_429'
+BLOCKED = 'blocked'
+NOT_PDF = 'not_pdf'
+DRIVER_CRASH = 'driver_crash'
+OTHER = 'other'
+
+# 类别 -> (是否重试, 基础退避秒数, 最大退避秒数, 是否计入熔断器)
+CATEGORIES = {
+    TIMEOUT: (True, 5, 120, True),
+    STALE_ELEMENT: (True, 1, 10, False),
+    HTTP_5XX: (True, 10, 300, True),
+    HTTP_429: (True, 60, 900, True),
+    BLOCKED: (True, 300, 1800, True),
+    NOT_PDF: (False, 0, 0, False),      # 没有订阅权限，重试没有意义
+    DRIVER_CRASH: (True, 10, 60, False),
+    OTHER: (True, 5, 60, False),
+}
+
+DRIVER_CRASH_MARKERS = ('invalid session id', 'chrome not reachable', 'disconnected', 'no such window',
+                        'session deleted', 'target window already closed', 'unable to receive message from renderer')
+
+
+class CrawlError(Exception):
+    """带类别的爬取错误（由爬虫代码主动抛出，便于重试引擎分类）"""
+
+    def __init__(self, category, message=''):
+        super().__init__(message or category)
+        self.category = category
+
+
+class HttpStatusError(CrawlError):
+    def __init__(self, status_code, message=''):
+        if status_code == 429:
+            category = HTTP_429
+        elif status_code >= 500:
+            category = HTTP_5XX
+        elif status_code == 403:
+            category = BLOCKED
+        else:
+            category = OTHER
+        super().__init__(category, message or f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def classify_error(error):
+    """异常 -> 错误类别（按类名判断，不依赖selenium/requests的导入）"""
+    if isinstance(error, CrawlError):
+        return error.category
+    names = {cls.__name__ for cls in type(error).__mro__}
+    message = str(error).lower()
+    if 'StaleElementReferenceException' in names:
+        return STALE_ELEMENT
+    if names & {'InvalidSessionIdException', 'NoSuchWindowException'} or \
+            ('WebDriverException' in names and any(m in message for m in DRIVER_CRASH_MARKERS)):
+        return DRIVER_CRASH
+    if names & {'TimeoutException', 'Timeout', 'ReadTimeout', 'ConnectTimeout', 'TimeoutError', 'timeout'}:
+        return TIMEOUT
+    if 'HTTPError' in names:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+        if status:
+            return HttpStatusError(status).category
+    if names & {'ConnectionError', 'ChunkedEncodingError'}:
+        return TIMEOUT
+    return OTHER
+
+
+class CircuitBreaker:
+    """滑动窗口错误率熔断器（线程安全）"""
+
+    def __init__(self, window=20, error_rate=0.5, min_samples=6, cooldown=300, max_cooldown=3600,
+                 sleep=time.sleep, clock=time.monotonic):
+        self.outcomes = deque(maxlen=window)
+        self.error_rate = error_rate
+        self.min_samples = min_samples
+        self.base_cooldown = cooldown
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.state = 'closed'
+        self.open_until = 0.0
+        self.trips = 0
+        self._sleep = sleep
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def current_error_rate(self):
+        return sum(self.outcomes) / len(self.outcomes) if self.outcomes else 0.0
+
+    def before_request(self):
+        """请求前调用：熔断器打开时等待冷却结束（进入半开状态）"""
+        while True:
+            with self._lock:
+                if self.state != 'open':
+                    return
+                remaining = self.open_until - self._clock()
+                if remaining <= 0:
+                    self.state = 'half_open'
+                    logging.info("熔断器半开：放行一次试探请求")
+                    return
+            self._sleep(min(remaining, 30))
+
+    def record(self, failed):
+        """记录一次计入熔断器的请求结果"""
+        with self._lock:
+            if self.state == 'half_open':
+                if failed:
+                    self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+                    self._trip("试探请求失败")
+                else:
+                    logging.info("熔断器关闭：试探请求成功，恢复爬取")
+                    self.state = 'closed'
+                    self.cooldown = self.base_cooldown
+                    self.outcomes.clear()
+                return
+            self.outcomes.append(1 if failed else 0)
+            if (self.state == 'closed' and len(self.outcomes) >= self.min_samples
+                    and self.current_error_rate() >= self.error_rate):
+                self._trip(f"最近 {len(self.outcomes)} 次请求错误率 {self.current_error_rate():.0%}")
+
+    def _trip(self, reason):
+        self.state = 'open'
+        self.open_until = self._clock() + self.cooldown
+        self.trips += 1
+        logging.warning(f"⚡ 熔断器打开（{reason}），暂停 {self.cooldown:.0f} 秒")
+
+
+class RetryEngine:
+    """按错误类别重试"""
+
+    def __init__(self, max_retries=3, breaker=None, metrics=None, sleep=time.sleep):
+        self.max_retries = max_retries
+        self.breaker = breaker or CircuitBreaker(sleep=sleep)
+        self.metrics = metrics
+        self._sleep = sleep
+
+    @classmethod
+    def from_config(cls, config_file='config.json', metrics=None, clock=None):
+        settings, crawler_settings = {}, {}
+        if os.path.exists(config_file):
+            with open(config_file, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+            settings = config.get('retry_settings') or {}
+            crawler_settings = config.get('crawler_settings') or {}
+        clock = clock or SYSTEM_CLOCK
+        breaker = CircuitBreaker(
+            window=settings.get('breaker_window', 20),
+            error_rate=settings.get('breaker_error_rate', 0.5),
+            min_samples=settings.get('breaker_min_samples', 6),
+            cooldown=settings.get('breaker_cooldown', 300),
+            max_cooldown=settings.get('breaker_max_cooldown', 3600),
+            sleep=clock.sleep,
+            clock=clock.monotonic,
+        )
+        return cls(crawler_settings.get('max_retries', 3), breaker, metrics, sleep=clock.sleep)
+
+    def backoff_delay(self, category, attempt):
+        """第attempt次重试（从0开始）前的等待秒数：全抖动指数退避"""
+        _, base, cap, _ = CATEGORIES.get(category, CATEGORIES[OTHER])
+        return random.uniform(0, min(cap, base * 2 ** attempt))
+
+    def should_retry(self, category, attempt):
+        retryable = CATEGORIES.get(category, CATEGORIES[OTHER])[0]
+        return retryable and attempt < self.max_retries
+
+    def record(self, unit, category=None):
+        """记录一次尝试的结果（category为None表示成功）"""
+        counts = category is None or CATEGORIES.get(category, CATEGORIES[OTHER])[3]
+        if counts:
+            self.breaker.record(category is not None)
+        if self.metrics is not None and category is not None:
+            self.metrics.inc('errors', unit=unit, category=category)
+
+    def wait(self, unit, category, attempt):
+        """重试前等待（退避）"""
+        delay = self.backoff_delay(category, attempt)
+        logging.warning(f"  ↻ {unit} 出错（{category}），{delay:.1f} 秒后第 {attempt + 1} 次重试")
+        if self.metrics is not None:
+            self.metrics.inc('retries', unit=unit, category=category)
+            with self.metrics.span(f'retry.backoff.{unit}', kind='wait'):
+                self._sleep(delay)
+        else:
+            self._sleep(delay)
+
+    def call(self, unit, fn, *args, on_retry=None, **kwargs):
+        """执行fn，出错时按类别重试；on_retry(category) 在每次重试前调用（如重启浏览器）
+
+        不可重试或重试次数用完时抛出最后一次的异常
+        """
+        attempt = 0
+        while True:
+            self.breaker.before_request()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                category = classify_error(e)
+                self.record(unit, category)
+                if not self.should_retry(category, attempt):
+                    raise
+                self.wait(unit, category, attempt)
+                if on_retry is not None:
+                    on_retry(category)
+                attempt += 1
+                continue
+            self.record(unit)
+            return result
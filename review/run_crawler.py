@@ -42,6 +42,11 @@ def main():
     crawler.download_pdf = True
     crawler.max_pages = 5
     
+    # 剖析模式：python run_crawler.py --profile
+    if '--profile' in sys.argv:
+        crawler.enable_profiling()
+        print(f"🔬 剖析模式：每个检索式的火焰图和内存报告写入 {crawler.profiler.output_dir}/")
+    
     # 运行爬虫
     try:
         crawler.run()
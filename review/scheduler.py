@@ -0,0 +1,193 @@
+"""
+按端点类型和主机调度请求
+检索结果页、文章页、PDF查看器（stamp.jsp）、PDF传输（getPDF.jsp）和REST接口的代价和限制各不相同，
+每个 (端点类型, 主机) 有独立的队列、并发上限和请求间隔：
+
+    search    检索结果页（浏览器）
+    document  文章页（浏览器）
+    stamp     PDF查看器页（浏览器）
+    pdf       PDF传输（requests，后台线程，可并发）
+    rest      REST接口（滚雪球检索）
+
+浏览器步骤仍在主线程中按原有的安全延迟执行，PDF传输提交到 pdf 队列后立即返回，
+浏览器继续处理下一篇文献，元数据工作不会排在缓慢的PDF传输后面。
+每个类型的队列深度、正在执行数和等待时间可从 stats() 读取（状态接口和指标文件中也有）
+
+config.json 中可覆盖默认设置：
+    "scheduler_settings": {
+        "pdf": {"concurrency": 2, "min_interval": 3, "max_interval": 8}
+    }
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+# 端点类型 -> (并发上限, 最小间隔秒, 最大间隔秒)；浏览器类的间隔由爬虫的安全延迟控制，这里为0
+DEFAULT_ENDPOINTS = {
+    'search': (1, 0, 0),
+    'document': (1, 0, 0),
+    'stamp': (1, 0, 0),
+    'pdf': (2, 3, 8),
+    'rest': (1, 0, 0),
+}
+
+
+def classify(url):
+    """URL -> 端点类型"""
+    path = urlsplit(url).path.lower()
+    if 'getpdf.jsp' in path:
+        return 'pdf'
+    if 'stamp.jsp' in path or '/stamp/' in path:
+        return 'stamp'
+    if path.startswith('/rest/'):
+        return 'rest'
+    if 'searchresult' in path or path.startswith('/search'):
+        return 'search'
+    return 'document'
+
+
+class _Lane:
+    """一个 (端点类型, 主机) 的队列状态"""
+
+    def __init__(self, endpoint, host, concurrency, min_interval, max_interval):
+        self.endpoint = endpoint
+        self.host = host
+        self.concurrency = concurrency
+        self.interval = (min_interval, max_interval)
+        self.cond = threading.Condition()
+        self.waiting = 0        # 已进入slot、等待并发名额或间隔
+        self.queued = 0         # 已提交到线程池、尚未开始等待
+        self.running = 0
+        self.next_start = 0.0
+        self.started = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.executor = None
+
+
+class EndpointScheduler:
+    """每个端点类型和主机一条独立的队列"""
+
+    def __init__(self, endpoints=None, metrics=None):
+        self.endpoints = dict(DEFAULT_ENDPOINTS)
+        self.endpoints.update(endpoints or {})
+        self.metrics = metrics
+        self._lanes = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config_file='config.json', metrics=None):
+        endpoints = {}
+        if os.path.exists(config_file):
+            with open(config_file, 'r', encoding='utf-8') as f:
+                settings = json.load(f).get('scheduler_settings') or {}
+            for name, value in settings.items():
+                if not isinstance(value, dict):
+                    continue
+                default = DEFAULT_ENDPOINTS.get(name, (1, 0, 0))
+                endpoints[name] = (value.get('concurrency', default[0]),
+                                   value.get('min_interval', default[1]),
+                                   value.get('max_interval', value.get('min_interval', default[2])))
+        return cls(endpoints, metrics)
+
+    def _lane(self, endpoint, host):
+        key = (endpoint, host or '')
+        with self._lock:
+            lane = self._lanes.get(key)
+            if lane is None:
+                concurrency, min_interval, max_interval = self.endpoints.get(endpoint, (1, 0, 0))
+                lane = self._lanes[key] = _Lane(endpoint, host or '', max(1, int(concurrency)),
+                                                min_interval, max(min_interval, max_interval))
+            return lane
+
+    def _gauge(self, lane):
+        if self.metrics is not None:
+            labels = {'endpoint': lane.endpoint, 'host': lane.host}
+            self.metrics.set_gauge('scheduler_queue_depth', lane.waiting + lane.queued, **labels)
+            self.metrics.set_gauge('scheduler_running', lane.running, **labels)
+
+    @contextmanager
+    def slot(self, endpoint, host=None, since=None):
+        """在该端点的并发上限和请求间隔之内执行一段代码"""
+        lane = self._lane(endpoint, host)
+        since = since if since is not None else time.perf_counter()
+        with lane.cond:
+            lane.waiting += 1
+            self._gauge(lane)
+            while True:
+                now = time.monotonic()
+                if lane.running < lane.concurrency and now >= lane.next_start:
+                    break
+                lane.cond.wait(lane.next_start - now if lane.running < lane.concurrency else None)
+            lane.waiting -= 1
+            lane.running += 1
+            lane.started += 1
+            lane.next_start = time.monotonic() + random.uniform(*lane.interval)
+            wait = time.perf_counter() - since
+            lane.wait_total += wait
+            lane.wait_max = max(lane.wait_max, wait)
+            self._gauge(lane)
+        if self.metrics is not None:
+            self.metrics.observe(f'scheduler.wait.{endpoint}', wait, kind='wait')
+        try:
+            yield
+        finally:
+            with lane.cond:
+                lane.running -= 1
+                self._gauge(lane)
+                lane.cond.notify_all()
+
+    def submit(self, endpoint, host, fn, *args, **kwargs):
+        """在该端点的后台线程中执行 fn，返回Future"""
+        lane = self._lane(endpoint, host)
+        with lane.cond:
+            if lane.executor is None:
+                lane.executor = ThreadPoolExecutor(max_workers=lane.concurrency,
+                                                   thread_name_prefix=f"sched-{endpoint}")
+            lane.queued += 1
+            self._gauge(lane)
+        submitted = time.perf_counter()
+
+        def run():
+            with lane.cond:
+                lane.queued -= 1
+            with self.slot(endpoint, host, since=submitted):
+                return fn(*args, **kwargs)
+
+        return lane.executor.submit(run)
+
+    def stats(self):
+        """每个端点类型（合并所有主机）的队列深度、正在执行数和等待时间"""
+        result = {}
+        with self._lock:
+            lanes = list(self._lanes.values())
+        for lane in lanes:
+            with lane.cond:
+                entry = result.setdefault(lane.endpoint, {
+                    'queue_depth': 0, 'running': 0, 'started': 0, 'wait_total': 0.0, 'max_wait_seconds': 0.0,
+                    'concurrency': lane.concurrency, 'interval_seconds': list(lane.interval), 'hosts': 0,
+                })
+                entry['queue_depth'] += lane.waiting + lane.queued
+                entry['running'] += lane.running
+                entry['started'] += lane.started
+                entry['wait_total'] += lane.wait_total
+                entry['max_wait_seconds'] = round(max(entry['max_wait_seconds'], lane.wait_max), 3)
+                entry['hosts'] += 1
+        for entry in result.values():
+            wait_total = entry.pop('wait_total')
+            entry['avg_wait_seconds'] = round(wait_total / entry['started'], 3) if entry['started'] else 0.0
+        return result
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            lanes = list(self._lanes.values())
+        for lane in lanes:
+            if lane.executor is not None:
+                lane.executor.shutdown(wait=wait)
+                lane.executor = None
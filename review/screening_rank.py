@@ -0,0 +1,325 @@
+"""
+筛选排序（系统综述初筛）
+对去重后的文献（标题+摘要）构建稀疏BM25/TF-IDF矩阵，按纳入标准和种子文献打分，导出按优先级排序的筛选队列。
+矩阵缓存在 ieee_results/screening_matrix.npz，结果文件不变时直接加载；修改纳入标准后重新打分只需要一次稀疏矩阵乘法
+需要安装 numpy 和 scipy：pip install numpy scipy
+
+纳入标准文件（JSON，默认 screening_criteria.json）：
+    {
+        "include": ["channel estimation", "deep learning", "mmwave"],
+        "exclude": ["survey"],
+        "seed_doc_ids": ["9123456", "8806123"],
+        "seed_weight": 0.5
+    }
+    include 中的单词按单词匹配，多词短语按相邻二元词组匹配；
+    命中任一 exclude 词的文献排在所有未命中的文献之后（仍保留在队列中，组内按原得分排序）
+
+用法：
+    python screening_rank.py [纳入标准文件] [--output screening_queue.csv]
+"""
+
+import csv
+import json
+import os
+import re
+import sys
+import time
+
+from article_records import iter_articles, result_files
+from near_duplicates import StreamingDeduplicator, DEFAULT_THRESHOLD
+
+CRITERIA_FILENAME = 'screening_criteria.json'
+MATRIX_FILENAME = 'screening_matrix.npz'
+META_FILENAME = 'screening_matrix.json'
+BM25_K1 = 1.2
+BM25_B = 0.75
+# 标题中的词按该倍数计入词频
+TITLE_BOOST = 2
+# 命中排除词时从综合得分（0~1）中减去，使其排在所有未命中的文献之后
+EXCLUDE_PENALTY = 2.0
+
+RE_WORD = re.compile(r'[a-z0-9]+(?:-[a-z0-9]+)*')
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the this to was were will with we our
+based using via into than these those their can also which such paper propose proposed method methods approach
+results show shows study new two one not n
+""".split())
+
+
+def tokenize(text):
+    """小写、按词切分、去停用词；返回词列表"""
+    if not text or text == 'N/A':
+        return []
+    return [w for w in RE_WORD.findall(text.lower()) if len(w) > 1 and w not in STOPWORDS]
+
+
+def terms(tokens):
+    """单词 + 相邻二元词组（使 "channel estimation" 这类短语可以直接匹配）"""
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def article_terms(article):
+    title = tokenize(article.get('title'))
+    return terms(title) * TITLE_BOOST + terms(tokenize(article.get('abstract')))
+
+
+def _results_signature(results_dir):
+    signature = []
+    for path in result_files(results_dir):
+        stat = os.stat(path)
+        signature.append([os.path.basename(path), stat.st_size, stat.st_mtime])
+    return signature
+
+
+class ScreeningRanker:
+    """稀疏BM25矩阵 + 向量化打分"""
+
+    def __init__(self, results_dir='ieee_results', dedupe_threshold=DEFAULT_THRESHOLD):
+        self.results_dir = results_dir
+        self.dedupe_threshold = dedupe_threshold
+        self.matrix = None        # 文献×词 BM25权重（CSR）
+        self.normalized = None    # 行L2归一化的TF-IDF（用于与种子文献的余弦相似度）
+        self.vocab = {}
+        self.doc_ids = []
+        self.positions = []       # 每行在全部文献（未去重）中的序号
+
+    # ------------------------------------------------------------------
+    # 构建
+    # ------------------------------------------------------------------
+
+    def build(self, use_cache=True, verbose=False):
+        """构建（或从缓存加载）矩阵"""
+        import numpy as np
+        from scipy import sparse
+
+        matrix_path = os.path.join(self.results_dir, MATRIX_FILENAME)
+        meta_path = os.path.join(self.results_dir, META_FILENAME)
+        signature = _results_signature(self.results_dir)
+
+        if use_cache and os.path.exists(matrix_path) and os.path.exists(meta_path):
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('signature') == signature and meta.get('dedupe_threshold') == self.dedupe_threshold:
+                self.vocab = {t: i for i, t in enumerate(meta['terms'])}
+                self.doc_ids = meta['doc_ids']
+                self.positions = meta['positions']
+                counts = sparse.load_npz(matrix_path).tocsr()
+                self._weight(counts, np, sparse)
+                if verbose:
+                    print(f"✓ 已加载筛选矩阵缓存：{len(self.doc_ids)} 篇 × {len(self.vocab)} 个词")
+                return self
+
+        start = time.perf_counter()
+        deduplicator = StreamingDeduplicator(threshold=self.dedupe_threshold)
+        vocab = {}
+        indptr, indices, data = [0], [], []
+        doc_ids, positions = [], []
+        for position, article in enumerate(iter_articles(self.results_dir)):
+            if deduplicator.is_duplicate(article) or not article.get('title', '').strip():
+                continue
+            row = {}
+            for term in article_terms(article):
+                idx = vocab.setdefault(term, len(vocab))
+                row[idx] = row.get(idx, 0) + 1
+            indices.extend(row.keys())
+            data.extend(row.values())
+            indptr.append(len(indices))
+            doc_ids.append(article.get('doc_id') or '')
+            positions.append(position)
+
+        counts = sparse.csr_matrix(
+            (np.array(data, dtype=np.float32), np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int64)),
+            shape=(len(doc_ids), len(vocab))
+        )
+        self.vocab, self.doc_ids, self.positions = vocab, doc_ids, positions
+
+        sparse.save_npz(matrix_path, counts)
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'signature': signature,
+                'dedupe_threshold': self.dedupe_threshold,
+                'terms': sorted(vocab, key=vocab.get),
+                'doc_ids': doc_ids,
+                'positions': positions,
+            }, f, ensure_ascii=False)
+
+        self._weight(counts, np, sparse)
+        if verbose:
+            print(f"✓ 已构建筛选矩阵：{len(doc_ids)} 篇 × {len(vocab)} 个词（{time.perf_counter() - start:.1f} 秒）")
+        return self
+
+    def _weight(self, counts, np, sparse):
+        """词频矩阵 -> BM25权重矩阵和归一化TF-IDF矩阵"""
+        n_docs = counts.shape[0]
+        df = np.bincount(counts.indices, minlength=counts.shape[1])
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+        doc_len = np.asarray(counts.sum(axis=1)).ravel()
+        avg_len = doc_len.mean() if n_docs else 1.0
+        row_of = np.repeat(np.arange(n_docs), np.diff(counts.indptr))
+        tf = counts.data
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_len[row_of] / avg_len)
+        bm25 = counts.copy()
+        bm25.data = (tf * (BM25_K1 + 1) / (tf + norm) * idf[counts.indices]).astype(np.float32)
+        self.matrix = bm25
+
+        tfidf = counts.copy()
+        tfidf.data = (np.log1p(tf) * idf[counts.indices]).astype(np.float32)
+        row_norm = np.sqrt(np.asarray(tfidf.multiply(tfidf).sum(axis=1)).ravel())
+        row_norm[row_norm == 0] = 1
+        self.normalized = sparse.diags(1 / row_norm).dot(tfidf).tocsr()
+
+    # ------------------------------------------------------------------
+    # 打分
+    # ------------------------------------------------------------------
+
+    def _query_vector(self, phrases):
+        import numpy as np
+
+        q = np.zeros(len(self.vocab), dtype=np.float32)
+        matched = []
+        for phrase in phrases:
+            tokens = tokenize(phrase)
+            if len(tokens) == 1:
+                keys = tokens                                        # 单词：匹配单词
+            else:
+                keys = [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]  # 短语：匹配相邻二元词组
+            for key in keys:
+                idx = self.vocab.get(key)
+                if idx is not None:
+                    q[idx] = 1.0
+                    matched.append(idx)
+        return q, matched
+
+    def score(self, include=(), exclude=(), seed_doc_ids=(), seed_weight=0.5):
+        """按纳入标准打分，返回 (综合得分, BM25得分, 种子相似度)，均为与矩阵行对齐的numpy数组
+
+        综合得分在 [0, 1] 之间；命中排除词的文献减去 EXCLUDE_PENALTY，排在所有未命中的文献之后
+        """
+        import numpy as np
+
+        n = self.matrix.shape[0]
+        excluded = np.zeros(n, dtype=bool)
+        if exclude:
+            q_out, matched = self._query_vector(exclude)
+            if matched:
+                excluded = self.matrix.dot(q_out) > 0
+        kept = ~excluded
+        q_in, _ = self._query_vector(include)
+        bm25 = self.matrix.dot(q_in) if include else np.zeros(n, dtype=np.float32)
+        # 按未排除文献中的最高分归一化
+        top = bm25[kept].max() if kept.any() else 0
+        bm25_norm = np.minimum(bm25 / top, 1) if top > 0 else bm25
+
+        seed_sim = np.zeros(n, dtype=np.float32)
+        seeds = {str(d) for d in seed_doc_ids}
+        seed_rows = [i for i, doc_id in enumerate(self.doc_ids) if doc_id in seeds]
+        if seed_rows:
+            centroid = np.asarray(self.normalized[seed_rows].mean(axis=0)).ravel()
+            seed_sim = self.normalized.dot(centroid)
+            top = seed_sim[kept].max() if kept.any() else 0
+            if top > 0:
+                seed_sim = np.minimum(seed_sim / top, 1)
+
+        if seed_rows and include:
+            combined = (1 - seed_weight) * bm25_norm + seed_weight * seed_sim
+        elif seed_rows:
+            combined = seed_sim
+        else:
+            combined = bm25_norm
+        combined = np.where(excluded, combined - EXCLUDE_PENALTY, combined)
+        return combined, bm25, seed_sim
+
+    def matched_terms(self, include):
+        """返回函数 row -> 该行命中的纳入标准词列表"""
+        _, matched = self._query_vector(include)
+        if not matched:
+            return lambda row: []
+        wanted = set(matched)
+        names = {i: t for t, i in self.vocab.items() if i in wanted}
+        indptr, indices = self.matrix.indptr, self.matrix.indices
+
+        def lookup(row):
+            present = wanted.intersection(indices[indptr[row]:indptr[row + 1]].tolist())
+            return sorted(names[i] for i in present)
+        return lookup
+
+    # ------------------------------------------------------------------
+    # 导出
+    # ------------------------------------------------------------------
+
+    def export_queue(self, criteria, output_file='screening_queue.csv'):
+        """导出按优先级排序的筛选队列，返回写出的行数"""
+        import numpy as np
+
+        include = criteria.get('include', [])
+        combined, bm25, seed_sim = self.score(include, criteria.get('exclude', []),
+                                              criteria.get('seed_doc_ids', []), criteria.get('seed_weight', 0.5))
+        order = np.argsort(-combined, kind='stable')
+        rank_of = {int(self.positions[row]): rank for rank, row in enumerate(order)}
+        matched_terms = self.matched_terms(include)
+
+        # 再扫描一遍结果文件取出元数据，按排名写出
+        rows = [None] * len(order)
+        for position, article in enumerate(iter_articles(self.results_dir)):
+            rank = rank_of.get(position)
+            if rank is None:
+                continue
+            row = int(order[rank])
+            rows[rank] = [
+                rank + 1, round(float(combined[row]), 4), round(float(bm25[row]), 3), round(float(seed_sim[row]), 3),
+                '; '.join(matched_terms(row)),
+                article.get('title', ''), article.get('authors', ''), article.get('year', ''),
+                article.get('publisher_info', ''), article.get('abstract', ''), article.get('link', ''),
+                article.get('doc_id', ''), article.source_query_id, ''
+            ]
+
+        with open(output_file, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['rank', 'score', 'bm25', 'seed_similarity', 'matched_terms', 'title', 'authors', 'year',
+                             'publisher_info', 'abstract', 'link', 'doc_id', 'source_query_id', 'decision'])
+            count = 0
+            for row in rows:
+                if row is not None:
+                    writer.writerow(row)
+                    count += 1
+        return count
+
+
+def load_criteria(path=CRITERIA_FILENAME):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    args = sys.argv[1:]
+    output_file = args[args.index('--output') + 1] if '--output' in args else 'screening_queue.csv'
+    positional = [a for i, a in enumerate(args) if not a.startswith('--') and (i == 0 or args[i - 1] != '--output')]
+    criteria_file = positional[0] if positional else CRITERIA_FILENAME
+
+    try:
+        import scipy  # noqa: F401
+    except ImportError:
+        print("✗ 需要安装 numpy 和 scipy：")
+        print("  pip install numpy scipy")
+        return
+    if not os.path.exists(criteria_file):
+        print(f"⚠️  没有找到纳入标准文件：{criteria_file}")
+        print(__doc__)
+        return
+
+    criteria = load_criteria(criteria_file)
+    ranker = ScreeningRanker().build(verbose=True)
+
+    start = time.perf_counter()
+    combined, _, _ = ranker.score(criteria.get('include', []), criteria.get('exclude', []),
+                                  criteria.get('seed_doc_ids', []), criteria.get('seed_weight', 0.5))
+    print(f"✓ 打分完成：{len(combined)} 篇（{(time.perf_counter() - start) * 1000:.1f} ms）")
+
+    count = ranker.export_queue(criteria, output_file)
+    print(f"✓ 筛选队列已导出：{count} 篇")
+    print(f"  文件位置：{os.path.abspath(output_file)}")
+
+
+if __name__ == "__main__":
+    main()
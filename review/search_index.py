@@ -0,0 +1,312 @@
+"""
+文献全文检索索引
+基于SQLite FTS5的磁盘倒排索引，覆盖标题、摘要、作者、发表信息以及（如果已提取）PDF全文。
+新的结果文件/全文出现时增量更新，支持布尔查询、短语查询、字段限定和BM25排序
+
+查询语法（FTS5）：
+    deep learning                      两个词都出现（AND）
+    radar OR lidar                     任一出现
+    "channel estimation"               短语
+    title: "federated learning"        限定字段（title/abstract/authors/publisher_info/fulltext）
+    transformer NOT survey             排除
+    beamform*                          前缀
+
+用法：
+    python search_index.py update            # 增量更新索引
+    python search_index.py search <查询>     # 检索
+"""
+
+import glob
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+
+from fulltext_extractor import DEFAULT_FULLTEXT_DIR, load_fulltext
+
+INDEX_FILENAME = 'search_index.db'
+FIELDS = ('title', 'abstract', 'authors', 'publisher_info', 'fulltext')
+# BM25字段权重：标题最重要，全文篇幅长权重最低
+FIELD_WEIGHTS = (8.0, 3.0, 1.5, 1.0, 1.0)
+
+SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS docs USING fts5(
+    title, abstract, authors, publisher_info, fulltext,
+    tokenize = 'porter unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS doc_meta (
+    id INTEGER PRIMARY KEY,
+    doc_key TEXT UNIQUE NOT NULL,
+    doc_id TEXT,
+    title TEXT,
+    authors TEXT,
+    year TEXT,
+    link TEXT,
+    query_ids TEXT,
+    fulltext_version TEXT
+);
+CREATE TABLE IF NOT EXISTS indexed_files (
+    path TEXT PRIMARY KEY,
+    size INTEGER,
+    mtime REAL
+);
+"""
+
+RE_TOKEN = re.compile(r'\w+', re.UNICODE)
+RE_RESULT_FILE = re.compile(r'query_(.+)_results\.json$')
+RE_HYPHENATED = re.compile(r'(?<!")\b(\w+(?:-\w+)+)\b(?!")')
+
+
+def fts5_available():
+    try:
+        conn = sqlite3.connect(':memory:')
+        conn.execute('CREATE VIRTUAL TABLE t USING fts5(a)')
+        conn.close()
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def article_key(article):
+    """索引中文献的唯一键：优先doc_id，没有时用标题"""
+    doc_id = article.get('doc_id')
+    if doc_id and not str(doc_id).startswith('doc_'):
+        return f"id:{doc_id}"
+    return f"t:{(article.get('title') or '').strip().lower()}"
+
+
+def file_query_id(path):
+    """结果文件名中的检索式编号：query_<id>_results.json -> <id>"""
+    match = RE_RESULT_FILE.search(os.path.basename(path))
+    return match.group(1) if match else None
+
+
+def _plain_query(text):
+    """把用户输入转为安全的FTS5查询（每个词作为短语，AND连接）"""
+    tokens = RE_TOKEN.findall(text)
+    return ' AND '.join(f'"{t}"' for t in tokens)
+
+
+class SearchIndex:
+    """磁盘倒排索引"""
+
+    def __init__(self, db_path=None, results_dir='ieee_results', fulltext_dir=DEFAULT_FULLTEXT_DIR):
+        self.results_dir = results_dir
+        self.fulltext_dir = fulltext_dir
+        self.db_path = db_path or os.path.join(results_dir, INDEX_FILENAME)
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    # ------------------------------------------------------------------
+    # 增量更新
+    # ------------------------------------------------------------------
+
+    def update(self, verbose=False):
+        """索引新增、变化或已删除的结果文件，以及新提取的全文
+
+        结果文件变化时先撤销该文件原来的贡献（文献上的检索式编号），再按当前内容重新写入，
+        修改过的标题/摘要会重新索引；不再属于任何检索式的文献从索引中删除
+        """
+        known = {r['path']: (r['size'], r['mtime']) for r in self.conn.execute('SELECT * FROM indexed_files')}
+        changed = []
+        present = set()
+        for path in glob.glob(os.path.join(self.results_dir, 'query_*_results.json')):
+            present.add(path)
+            stat = os.stat(path)
+            if known.get(path) != (stat.st_size, stat.st_mtime):
+                changed.append((path, stat.st_size, stat.st_mtime))
+        removed_files = [path for path in known if path not in present]
+
+        added = 0
+        removed = 0
+        with self.conn:
+            touched = set()
+            for path in removed_files:
+                touched |= self._retract_query(file_query_id(path))
+                self.conn.execute('DELETE FROM indexed_files WHERE path = ?', (path,))
+            for path, size, mtime in changed:
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                except Exception as e:
+                    print(f"✗ 索引失败：{path} - {e}")
+                    continue
+                query_id = str(data.get('query_id', file_query_id(path)))
+                touched |= self._retract_query(query_id)
+                for article in data.get('articles', []):
+                    added += self._upsert_article(article, query_id)
+                self.conn.execute('INSERT OR REPLACE INTO indexed_files VALUES (?, ?, ?)', (path, size, mtime))
+            removed = self._drop_orphans(touched)
+
+        fulltext_updated = self._update_fulltext()
+
+        if verbose:
+            print(f"✓ 索引已更新：{len(changed)} 个结果文件变化，{len(removed_files)} 个已删除；"
+                  f"新增 {added} 篇文献，移除 {removed} 篇，更新全文 {fulltext_updated} 篇")
+        return {'files': len(changed), 'removed_files': len(removed_files),
+                'added': added, 'removed': removed, 'fulltext': fulltext_updated}
+
+    def _retract_query(self, query_id):
+        """从所有文献的来源检索式中去掉 query_id，返回受影响文献的id集合"""
+        if query_id is None:
+            return set()
+        touched = set()
+        rows = self.conn.execute(
+            "SELECT id, query_ids FROM doc_meta WHERE ',' || query_ids || ',' LIKE ?", (f'%,{query_id},%',)
+        ).fetchall()
+        for row in rows:
+            query_ids = [q for q in row['query_ids'].split(',') if q != query_id]
+            self.conn.execute('UPDATE doc_meta SET query_ids = ? WHERE id = ?', (','.join(query_ids), row['id']))
+            touched.add(row['id'])
+        return touched
+
+    def _drop_orphans(self, ids):
+        """删除不再属于任何检索式的文献（元数据和倒排索引），返回删除数"""
+        removed = 0
+        for doc in ids:
+            row = self.conn.execute('SELECT query_ids FROM doc_meta WHERE id = ?', (doc,)).fetchone()
+            if row is not None and not row['query_ids']:
+                self.conn.execute('DELETE FROM doc_meta WHERE id = ?', (doc,))
+                self.conn.execute('DELETE FROM docs WHERE rowid = ?', (doc,))
+                removed += 1
+        return removed
+
+    def _upsert_article(self, article, query_id):
+        """写入一篇文献；已索引时追加来源检索式并用当前内容刷新元数据和倒排索引（保留已写入的全文）"""
+        key = article_key(article)
+        row = self.conn.execute('SELECT id, query_ids FROM doc_meta WHERE doc_key = ?', (key,)).fetchone()
+        values = (article.get('doc_id'), article.get('title', ''), article.get('authors', ''),
+                  article.get('year', ''), article.get('link', ''))
+        if row is None:
+            cur = self.conn.execute(
+                'INSERT INTO doc_meta (doc_key, doc_id, title, authors, year, link, query_ids) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key,) + values + (query_id,)
+            )
+            rowid = cur.lastrowid
+            fulltext = ''
+        else:
+            rowid = row['id']
+            query_ids = row['query_ids'].split(',') if row['query_ids'] else []
+            if query_id not in query_ids:
+                query_ids.append(query_id)
+            self.conn.execute(
+                'UPDATE doc_meta SET doc_id = ?, title = ?, authors = ?, year = ?, link = ?, query_ids = ? WHERE id = ?',
+                values + (','.join(query_ids), rowid)
+            )
+            existing = self.conn.execute('SELECT fulltext FROM docs WHERE rowid = ?', (rowid,)).fetchone()
+            fulltext = existing['fulltext'] if existing is not None else ''
+        self.conn.execute(
+            'INSERT OR REPLACE INTO docs (rowid, title, abstract, authors, publisher_info, fulltext) VALUES (?, ?, ?, ?, ?, ?)',
+            (rowid, article.get('title', ''), _clean(article.get('abstract')),
+             _clean(article.get('authors')), _clean(article.get('publisher_info')), fulltext)
+        )
+        return 1 if row is None else 0
+
+    def _update_fulltext(self):
+        """把 ieee_fulltext/ 中新增或变化的全文写入索引（按sidecar文件的大小和修改时间判断）"""
+        if not os.path.isdir(self.fulltext_dir):
+            return 0
+        indexed = {r['doc_id']: (r['id'], r['fulltext_version'])
+                   for r in self.conn.execute('SELECT id, doc_id, fulltext_version FROM doc_meta WHERE doc_id IS NOT NULL')}
+        updated = 0
+        with self.conn:
+            with os.scandir(self.fulltext_dir) as entries:
+                for entry in entries:
+                    if not entry.name.endswith('.json.gz'):
+                        continue
+                    doc_id = entry.name[:-len('.json.gz')]
+                    if doc_id not in indexed:
+                        continue
+                    stat = entry.stat()
+                    version = f"{stat.st_size}:{stat.st_mtime}"
+                    if version == indexed[doc_id][1]:
+                        continue
+                    record = load_fulltext(doc_id, self.fulltext_dir)
+                    if not record:
+                        continue
+                    rowid = indexed[doc_id][0]
+                    self.conn.execute('UPDATE docs SET fulltext = ? WHERE rowid = ?', ('\n'.join(record.get('pages', [])), rowid))
+                    self.conn.execute('UPDATE doc_meta SET fulltext_version = ? WHERE id = ?', (version, rowid))
+                    updated += 1
+        return updated
+
+    # ------------------------------------------------------------------
+    # 检索
+    # ------------------------------------------------------------------
+
+    def search(self, query, limit=20):
+        """检索，返回 (总匹配数, 排序后的结果列表)；limit=None 时返回全部匹配"""
+        # 连字符词（如 mm-wave）作为短语处理，否则FTS5会当作运算符
+        query = RE_HYPHENATED.sub(r'"\1"', query)
+        try:
+            return self._search(query, limit)
+        except sqlite3.OperationalError:
+            # 不是合法的FTS5语法（例如包含连字符），退回逐词AND
+            plain = _plain_query(query)
+            if not plain:
+                return 0, []
+            return self._search(plain, limit)
+
+    def _search(self, match, limit):
+        weights = ', '.join(str(w) for w in FIELD_WEIGHTS)
+        total = self.conn.execute('SELECT COUNT(*) FROM docs WHERE docs MATCH ?', (match,)).fetchone()[0]
+        rows = self.conn.execute(f"""
+            SELECT m.doc_id, m.title, m.authors, m.year, m.link, m.query_ids,
+                   bm25(docs, {weights}) AS score,
+                   snippet(docs, -1, '[', ']', '…', 12) AS snippet
+            FROM docs JOIN doc_meta m ON m.id = docs.rowid
+            WHERE docs MATCH ?
+            ORDER BY score
+            LIMIT ?
+        """, (match, -1 if limit is None else limit)).fetchall()
+        results = []
+        for r in rows:
+            item = dict(r)
+            item['score'] = -item['score']  # FTS5的bm25越小越相关
+            item['source_query_ids'] = item.pop('query_ids').split(',') if r['query_ids'] else []
+            results.append(item)
+        return total, results
+
+    def count(self):
+        return self.conn.execute('SELECT COUNT(*) FROM doc_meta').fetchone()[0]
+
+
+def _clean(value):
+    return '' if value in (None, 'N/A') else value
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] not in ('update', 'search'):
+        print(__doc__)
+        return
+
+    index = SearchIndex()
+    if args[0] == 'update':
+        index.update(verbose=True)
+        print(f"  索引文献数：{index.count()} 篇")
+        return
+
+    index.update()
+    query = ' '.join(args[1:])
+    start = time.perf_counter()
+    total, results = index.search(query)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"\n🔍 '{query}'：{total} 篇（{elapsed:.1f} ms）")
+    for idx, item in enumerate(results, 1):
+        print(f"\n{idx}. {item['title']}  [{item['score']:.2f}]")
+        print(f"   {item['authors']} | {item['year']} | 检索式 {','.join(item['source_query_ids'])}")
+        print(f"   {item['snippet']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,520 @@
+"""
+滚雪球检索（前向/后向引用扩展）
+从种子文献出发，沿每篇文献的参考文献列表（后向）和"被引"列表（前向）扩展语料：
+
+    frontier  待展开/已展开的文献：doc_id、深度、入度、相关度、状态、元数据
+    edges     引用边（src 引用 dst）
+    meta      种子、运行参数
+
+前沿队列保存在 ieee_results/snowball.db（SQLite），按入度或相关度排序；每展开一篇文献，
+新发现的文献、引用边和"已展开"标记在同一个事务中提交，中断后重新运行会从中断处准确继续。
+已见过的doc_id先用内存Bloom过滤器判断（"肯定没见过"时不再查库），数据库是唯一的权威记录。
+请求通过IEEE Xplore REST接口（/rest/document/{id}/references 与 /citations），每次请求之间使用爬虫的
+安全延迟（safe_delay）。发现的文献写入 ieee_results/query_snowball_results.json，与普通检索结果一起分析
+
+用法：
+    python snowball.py seed <doc_id> [<doc_id> ...]      # 添加种子文献
+    python snowball.py seed --from-graph [N]             # 以引用图中被引最多的N篇本地文献为种子
+    python snowball.py run [--depth 2] [--max-docs 100] [--mode indegree|relevance]
+                           [--criteria screening_criteria.json] [--base-url https://ieeexplore.ieee.org]
+    python snowball.py status
+"""
+
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from citation_graph import parse_reference
+from proxy_pool import looks_blocked
+from screening_rank import tokenize, terms
+
+SNOWBALL_FILENAME = 'snowball.db'
+SNOWBALL_QUERY_ID = 'snowball'
+DEFAULT_SITE_URL = 'https://ieeexplore.ieee.org'
+DEFAULT_MAX_DEPTH = 2
+MODES = ('indegree', 'relevance')
+# 单篇文献连续请求失败达到该次数后不再尝试
+MAX_ATTEMPTS = 3
+# 每展开多少篇文献重写一次结果文件
+CHECKPOINT_EVERY = 20
+
+RE_DOCUMENT_LINK = re.compile(r'/document/(\d+)')
+RE_TAGS = re.compile(r'<[^>]+>')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS frontier (
+    doc_id TEXT PRIMARY KEY,
+    depth INTEGER NOT NULL,
+    in_degree INTEGER NOT NULL DEFAULT 0,
+    relevance REAL NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    source TEXT,
+    discovered_from TEXT,
+    title TEXT,
+    article TEXT,
+    error TEXT,
+    discovered_at TEXT,
+    expanded_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_frontier_status ON frontier(status, depth);
+CREATE TABLE IF NOT EXISTS edges (
+    src TEXT NOT NULL,
+    dst TEXT NOT NULL,
+    PRIMARY KEY (src, dst)
+);
+CREATE INDEX IF NOT EXISTS idx_edges_dst ON edges(dst);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+ORDER_BY = {
+    'indegree': 'in_degree DESC, relevance DESC, depth ASC, rowid ASC',
+    'relevance': 'relevance DESC, in_degree DESC, depth ASC, rowid ASC',
+}
+
+
+class BloomFilter:
+    """定长位数组的Bloom过滤器（双重哈希）；只会误报"见过"，不会漏报"""
+
+    def __init__(self, capacity=1000000, error_rate=0.001):
+        import math
+
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+def doc_id_from_link(link):
+    match = RE_DOCUMENT_LINK.search(link or '')
+    return match.group(1) if match else None
+
+
+def _clean(text):
+    return ' '.join(RE_TAGS.sub('', text).split()) if text else ''
+
+
+def entry_to_article(entry, site_url=DEFAULT_SITE_URL):
+    """REST接口返回的一条参考文献/施引文献 -> 文章字典（与检索结果页抽取的字段一致）；非IEEE文献返回None"""
+    links = entry.get('links') or {}
+    doc_id = doc_id_from_link(links.get('documentLink')) or (str(entry['articleNumber']) if entry.get('articleNumber') else None)
+    if not doc_id:
+        return None
+
+    text = _clean(entry.get('text') or entry.get('displayText'))
+    parsed = parse_reference(text) if text else {}
+    authors = entry.get('authors')
+    if isinstance(authors, list):
+        authors = '; '.join(a.get('fullName', '') if isinstance(a, dict) else str(a) for a in authors)
+    return {
+        'title': _clean(entry.get('title')) or parsed.get('title') or 'N/A',
+        'link': f"{site_url}/document/{doc_id}/",
+        'authors': authors or 'N/A',
+        'publisher_info': _clean(entry.get('publicationTitle')) or 'N/A',
+        'year': str(entry.get('year') or parsed.get('year') or 'N/A'),
+        'abstract': 'N/A',
+        'doc_id': doc_id,
+    }
+
+
+class RelevanceScorer:
+    """按纳入标准（screening_criteria.json 的 include/exclude）给标题打分：命中纳入词的比例，命中排除词为0"""
+
+    def __init__(self, criteria=None):
+        criteria = criteria or {}
+        self.include = [' '.join(tokenize(t)) for t in criteria.get('include', []) if tokenize(t)]
+        self.exclude = [' '.join(tokenize(t)) for t in criteria.get('exclude', []) if tokenize(t)]
+
+    def score(self, title):
+        if not self.include:
+            return 0.0
+        present = set(terms(tokenize(title)))
+        if any(t in present for t in self.exclude):
+            return 0.0
+        return sum(1 for t in self.include if t in present) / len(self.include)
+
+
+class SnowballFrontier:
+    """持久化的优先级前沿队列"""
+
+    def __init__(self, db_path=os.path.join('ieee_results', SNOWBALL_FILENAME), scorer=None):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+        self.scorer = scorer or RelevanceScorer()
+
+        count = self.conn.execute('SELECT COUNT(*) FROM frontier').fetchone()[0]
+        self.seen = BloomFilter(capacity=max(1000000, count * 2))
+        for (doc_id,) in self.conn.execute('SELECT doc_id FROM frontier'):
+            self.seen.add(doc_id)
+
+    def close(self):
+        self.conn.close()
+
+    def add_seeds(self, doc_ids, source='seed'):
+        """添加种子文献（深度0）；返回新加入的数量"""
+        added = 0
+        now = datetime.now().isoformat()
+        with self.conn:
+            for doc_id in doc_ids:
+                doc_id = str(doc_id)
+                cur = self.conn.execute(
+                    'INSERT OR IGNORE INTO frontier (doc_id, depth, source, discovered_at) VALUES (?, 0, ?, ?)',
+                    (doc_id, source, now))
+                if cur.rowcount:
+                    self.seen.add(doc_id)
+                    added += 1
+                else:
+                    # 已发现的文献提升为种子
+                    self.conn.execute("UPDATE frontier SET depth = 0 WHERE doc_id = ?", (doc_id,))
+                    self._propagate_depth([doc_id])
+        return added
+
+    def next(self, max_depth, mode='indegree'):
+        """优先级最高的待展开文献（深度小于max_depth）；没有时返回None"""
+        return self.conn.execute(
+            f"SELECT * FROM frontier WHERE status = 'pending' AND depth < ? ORDER BY {ORDER_BY[mode]} LIMIT 1",
+            (max_depth,)).fetchone()
+
+    def _rescore(self, article):
+        if article and article.get('title') != 'N/A':
+            return self.scorer.score(article['title'])
+        return 0.0
+
+    def complete(self, doc_id, depth, references, citations):
+        """在一个事务中写入展开结果：新文献入队、已有文献入度+1、记录引用边、标记已展开
+
+        references：doc_id 引用的文献；citations：引用了 doc_id 的文献（均为文章字典）
+        返回新发现的文献数
+        """
+        now = datetime.now().isoformat()
+        neighbours = {}
+        edges = []
+        for direction, articles in (('references', references), ('citations', citations)):
+            for article in articles:
+                other = article['doc_id']
+                if other == doc_id:
+                    continue
+                edges.append((doc_id, other) if direction == 'references' else (other, doc_id))
+                neighbours.setdefault(other, (article, direction))
+
+        new = 0
+        lowered = []
+        with self.conn:
+            self.conn.executemany('INSERT OR IGNORE INTO edges VALUES (?, ?)', edges)
+            for other, (article, direction) in neighbours.items():
+                row = None
+                if other in self.seen:
+                    row = self.conn.execute('SELECT depth, status FROM frontier WHERE doc_id = ?', (other,)).fetchone()
+                if row is None:
+                    self.conn.execute("""
+                        INSERT INTO frontier
+                            (doc_id, depth, in_degree, relevance, source, discovered_from, title, article, discovered_at)
+                        VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?)
+                    """, (other, depth + 1, self._rescore(article), direction, doc_id, article['title'],
+                          json.dumps(article, ensure_ascii=False), now))
+                    self.seen.add(other)
+                    new += 1
+                    continue
+                # 已发现：入度+1，深度取最小值，补全缺失的元数据
+                self.conn.execute("""
+                    UPDATE frontier SET in_degree = in_degree + 1, depth = MIN(depth, ?),
+                        title = COALESCE(title, ?), article = COALESCE(article, ?),
+                        relevance = CASE WHEN title IS NULL THEN ? ELSE relevance END
+                    WHERE doc_id = ?
+                """, (depth + 1, article['title'], json.dumps(article, ensure_ascii=False),
+                      self._rescore(article), other))
+                if depth + 1 < row['depth'] and row['status'] == 'done':
+                    lowered.append(other)
+            self.conn.execute(
+                "UPDATE frontier SET status = 'done', expanded_at = ?, error = NULL WHERE doc_id = ?", (now, doc_id))
+            self._propagate_depth(lowered)
+        return new
+
+    def _propagate_depth(self, doc_ids):
+        """已展开文献的深度变小后，沿已记录的引用边更新其邻居的深度（不需要重新请求）
+
+        队列不是按层展开的，一篇文献可能先从较远的路径被发现并展开，之后才出现更短的路径
+        """
+        queue = list(doc_ids)
+        while queue:
+            doc_id = queue.pop()
+            depth = self.conn.execute('SELECT depth FROM frontier WHERE doc_id = ?', (doc_id,)).fetchone()[0]
+            for row in self.conn.execute("""
+                SELECT f.doc_id, f.depth, f.status FROM edges e JOIN frontier f
+                    ON f.doc_id = CASE WHEN e.src = ? THEN e.dst ELSE e.src END
+                WHERE (e.src = ? OR e.dst = ?) AND f.depth > ?
+            """, (doc_id, doc_id, doc_id, depth + 1)).fetchall():
+                self.conn.execute('UPDATE frontier SET depth = ? WHERE doc_id = ?', (depth + 1, row['doc_id']))
+                if row['status'] == 'done':
+                    queue.append(row['doc_id'])
+
+    def fail(self, doc_id, error, max_attempts=MAX_ATTEMPTS):
+        with self.conn:
+            self.conn.execute("""
+                UPDATE frontier SET attempts = attempts + 1, error = ?,
+                    status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE status END
+                WHERE doc_id = ?
+            """, (str(error)[:500], max_attempts, doc_id))
+
+    def set_meta(self, key, value):
+        with self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', (key, json.dumps(value)))
+
+    def get_meta(self, key, default=None):
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def counts(self, max_depth=None):
+        stats = {r['status']: r['n'] for r in self.conn.execute(
+            'SELECT status, COUNT(*) AS n FROM frontier GROUP BY status')}
+        stats['edges'] = self.conn.execute('SELECT COUNT(*) FROM edges').fetchone()[0]
+        if max_depth is not None:
+            stats['expandable'] = self.conn.execute(
+                "SELECT COUNT(*) FROM frontier WHERE status = 'pending' AND depth < ?", (max_depth,)).fetchone()[0]
+        return stats
+
+    def top_pending(self, limit=10, mode='indegree'):
+        return [dict(r) for r in self.conn.execute(
+            f"SELECT doc_id, depth, in_degree, relevance, title FROM frontier WHERE status = 'pending' "
+            f"ORDER BY {ORDER_BY[mode]} LIMIT ?", (limit,))]
+
+    def articles(self):
+        """已发现的文献（不含种子），按发现顺序"""
+        for (article,) in self.conn.execute(
+                "SELECT article FROM frontier WHERE article IS NOT NULL AND source != 'seed' ORDER BY rowid"):
+            yield json.loads(article)
+
+
+class SnowballClient:
+    """IEEE Xplore REST接口（requests；有浏览器会话时复用其Cookie）"""
+
+    def __init__(self, site_url=DEFAULT_SITE_URL, session=None, timeout=30, proxy_pool=None, scheduler=None):
+        import requests
+
+        self.site_url = site_url.rstrip('/')
+        self.proxy_pool = proxy_pool
+        self.scheduler = scheduler
+        self.session = session or requests.Session()
+        self.session.headers.setdefault('User-Agent', 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
+                                        'AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+        self.session.headers['Accept'] = 'application/json, text/plain, */*'
+        self.timeout = timeout
+
+    def copy_cookies(self, driver):
+        for cookie in driver.get_cookies():
+            self.session.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain'))
+
+    def _get(self, doc_id, endpoint):
+        if self.scheduler is None:
+            return self._request(doc_id, endpoint)
+        with self.scheduler.slot('rest', urlsplit(self.site_url).hostname):
+            return self._request(doc_id, endpoint)
+
+    def _request(self, doc_id, endpoint):
+        proxy = self.proxy_pool.get() if self.proxy_pool is not None else None
+        start = time.perf_counter()
+        try:
+            response = self.session.get(
+                f"{self.site_url}/rest/document/{doc_id}/{endpoint}",
+                headers={'Referer': f"{self.site_url}/document/{doc_id}/"},
+                timeout=self.timeout,
+                proxies=self.proxy_pool.requests_proxies(proxy) if proxy else None,
+            )
+        except Exception:
+            if proxy:
+                self.proxy_pool.record(proxy, time.perf_counter() - start, ok=False)
+            raise
+        if proxy:
+            self.proxy_pool.record(proxy, time.perf_counter() - start, ok=response.ok,
+                                   blocked=looks_blocked(response.status_code), nbytes=len(response.content))
+        response.raise_for_status()
+        return response.json()
+
+    def references(self, doc_id):
+        """doc_id 的参考文献（仅IEEE文献，非IEEE条目没有doc_id，无法继续扩展）"""
+        data = self._get(doc_id, 'references')
+        entries = data.get('references') or []
+        return [a for a in (entry_to_article(e, self.site_url) for e in entries) if a]
+
+    def citations(self, doc_id):
+        """引用了 doc_id 的IEEE文献"""
+        data = self._get(doc_id, 'citations')
+        entries = (data.get('paperCitations') or {}).get('ieee') or []
+        return [a for a in (entry_to_article(e, self.site_url) for e in entries) if a]
+
+
+class SnowballCrawler:
+    """按优先级逐篇展开前沿队列中的文献
+
+    delay：每次请求之后调用的等待函数（IEEECrawler.safe_delay）；metrics：CrawlMetrics（可选）
+    save_results：写出发现的文献的函数 (query_id, query_text, result)，缺省直接写结果文件
+    """
+
+    def __init__(self, frontier, client, delay=None, metrics=None, save_results=None, results_dir='ieee_results'):
+        self.frontier = frontier
+        self.client = client
+        self.delay = delay or (lambda delay_type='small': time.sleep(random.uniform(3, 8)))
+        self.metrics = metrics
+        self.save_results = save_results
+        self.results_dir = results_dir
+
+    def _span(self, name):
+        if self.metrics is None:
+            import contextlib
+            return contextlib.nullcontext()
+        return self.metrics.span(name)
+
+    def expand(self, row, directions=('references', 'citations')):
+        doc_id = row['doc_id']
+        fetched = {'references': [], 'citations': []}
+        for direction in directions:
+            with self._span(f'snowball.{direction}'):
+                fetched[direction] = getattr(self.client, direction)(doc_id)
+            self.delay('small')
+        return self.frontier.complete(doc_id, row['depth'], fetched['references'], fetched['citations'])
+
+    def run(self, max_depth=DEFAULT_MAX_DEPTH, max_docs=None, mode='indegree',
+            directions=('references', 'citations')):
+        """展开前沿队列，直到没有深度小于max_depth的待展开文献或达到max_docs；返回本次展开的文献数"""
+        if mode not in MODES:
+            raise ValueError(f"不支持的排序方式：{mode}（可选 {', '.join(MODES)}）")
+        self.frontier.set_meta('last_run', {'max_depth': max_depth, 'mode': mode,
+                                            'directions': list(directions),
+                                            'started_at': datetime.now().isoformat()})
+        expanded = discovered = 0
+        try:
+            while max_docs is None or expanded < max_docs:
+                row = self.frontier.next(max_depth, mode)
+                if row is None:
+                    break
+                logging.info(f"[滚雪球] 展开 {row['doc_id']}（深度 {row['depth']}，入度 {row['in_degree']}，"
+                             f"相关度 {row['relevance']:.2f}）{(row['title'] or '')[:50]}")
+                try:
+                    new = self.expand(row, directions)
+                except Exception as e:
+                    logging.warning(f"  ✗ 展开失败：{row['doc_id']}：{e}")
+                    self.frontier.fail(row['doc_id'], e)
+                    if self.metrics is not None:
+                        self.metrics.inc('snowball_expanded', status='failed')
+                    continue
+                expanded += 1
+                discovered += new
+                if self.metrics is not None:
+                    self.metrics.inc('snowball_expanded', status='done')
+                    self.metrics.inc('snowball_discovered', new)
+                logging.info(f"  ✓ 新发现 {new} 篇")
+                if expanded % CHECKPOINT_EVERY == 0:
+                    self.write_results()
+        finally:
+            self.write_results()
+        logging.info(f"[滚雪球] 本次展开 {expanded} 篇，新发现 {discovered} 篇")
+        return expanded
+
+    def write_results(self):
+        """把已发现的文献写成 query_snowball_results.json（与普通检索结果格式一致）"""
+        articles = list(self.frontier.articles())
+        seeds = self.frontier.get_meta('seeds', [])
+        query_text = f"snowball from {len(seeds)} seeds" if seeds else 'snowball'
+        result = {'total_results': len(articles), 'articles_count': len(articles), 'articles': articles}
+        if self.save_results is not None:
+            self.save_results(SNOWBALL_QUERY_ID, query_text, result)
+            return
+        path = os.path.join(self.results_dir, f"query_{SNOWBALL_QUERY_ID}_results.json")
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'query_id': SNOWBALL_QUERY_ID, 'query_text': query_text,
+                       'crawl_time': datetime.now().isoformat(), **result}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+
+
+def add_seeds(frontier, doc_ids):
+    added = frontier.add_seeds(doc_ids)
+    seeds = frontier.get_meta('seeds', [])
+    seeds.extend(d for d in map(str, doc_ids) if d not in seeds)
+    frontier.set_meta('seeds', seeds)
+    return added
+
+
+def _option(args, name, default=None, cast=str):
+    return cast(args[args.index(name) + 1]) if name in args and args.index(name) + 1 < len(args) else default
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] not in ('seed', 'run', 'status'):
+        print(__doc__)
+        return
+
+    results_dir = 'ieee_results'
+    criteria_file = _option(args, '--criteria')
+    scorer = None
+    if criteria_file:
+        from screening_rank import load_criteria
+        scorer = RelevanceScorer(load_criteria(criteria_file))
+    frontier = SnowballFrontier(os.path.join(results_dir, SNOWBALL_FILENAME), scorer)
+
+    try:
+        if args[0] == 'seed':
+            if '--from-graph' in args:
+                from citation_graph import CitationGraph
+                graph = CitationGraph(results_dir)
+                doc_ids = [d for d, _ in graph.in_degree_ranking(_option(args, '--from-graph', 20, int))]
+                graph.close()
+            else:
+                doc_ids = [a for a in args[1:] if not a.startswith('--')]
+            added = add_seeds(frontier, doc_ids)
+            print(f"✓ 添加种子 {added} 篇（共 {len(frontier.get_meta('seeds', []))} 篇）")
+
+        elif args[0] == 'run':
+            try:
+                client = SnowballClient(_option(args, '--base-url', DEFAULT_SITE_URL))
+            except ImportError:
+                print("✗ 需要安装 requests：")
+                print("  pip install requests")
+                return
+            logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+            crawler = SnowballCrawler(frontier, client, results_dir=results_dir)
+            crawler.run(_option(args, '--depth', DEFAULT_MAX_DEPTH, int), _option(args, '--max-docs', None, int),
+                        _option(args, '--mode', 'indegree'))
+
+        depth = _option(args, '--depth', (frontier.get_meta('last_run') or {}).get('max_depth', DEFAULT_MAX_DEPTH), int)
+        stats = frontier.counts(depth)
+        print(f"\n前沿队列：已展开 {stats.get('done', 0)}，待展开 {stats.get('expandable', 0)}（深度<{depth}），"
+              f"已发现未展开 {stats.get('pending', 0)}，失败 {stats.get('failed', 0)}，引用边 {stats['edges']}")
+        for r in frontier.top_pending(10, _option(args, '--mode', 'indegree')):
+            print(f"  {r['doc_id']:<10} 深度 {r['depth']}  入度 {r['in_degree']:<3} 相关度 {r['relevance']:.2f}  "
+                  f"{(r['title'] or '')[:60]}")
+    finally:
+        frontier.close()
+
+
+if __name__ == "__main__":
+    main()
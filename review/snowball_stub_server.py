@@ -0,0 +1,171 @@
+"""
+滚雪球检索的本地桩服务器（测试用）
+生成一个确定性的合成引用网络，按IEEE Xplore REST接口的格式提供：
+
+    /rest/document/{id}/references   参考文献（含少量没有documentLink的非IEEE条目）
+    /rest/document/{id}/citations    被引列表（paperCitations.ieee / nonIeee）
+    /document/{id}/                  简单的文献页面
+
+并统计每个路径被请求的次数，测试脚本据此检查是否有文献被重复展开
+
+用法：
+    python snowball_stub_server.py [端口，默认8901] [--docs 300]
+"""
+
+import json
+import random
+import re
+import sys
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_STUB_PORT = 8901
+FIRST_DOC_ID = 9000000
+
+RE_REST = re.compile(r'^/rest/document/(\d+)/(references|citations)/?$')
+RE_DOCUMENT = re.compile(r'^/document/(\d+)/?$')
+
+WORDS = ('deep learning radar channel estimation beamforming federated transformer lidar '
+         'vehicle sensing network graph optimization wireless mmwave attention').split()
+
+
+class SyntheticCitationGraph:
+    """合成引用网络：文献i只引用编号更小（更早）的文献，被引列表是参考文献的反向索引"""
+
+    def __init__(self, n_docs=300, refs_per_doc=8, external_ratio=0.2, seed=7):
+        rng = random.Random(seed)
+        self.doc_ids = [str(FIRST_DOC_ID + i) for i in range(n_docs)]
+        self.docs = {}
+        self.references = {}
+        self.citations = {d: [] for d in self.doc_ids}
+        for i, doc_id in enumerate(self.doc_ids):
+            self.docs[doc_id] = {
+                'title': ' '.join(rng.choice(WORDS) for _ in range(6)).capitalize(),
+                'authors': [f"Author{rng.randrange(500)} Name{rng.randrange(500)}" for _ in range(3)],
+                'year': 2000 + i * 24 // n_docs,
+                'publicationTitle': rng.choice(('IEEE Access', 'IEEE Transactions on Signal Processing')),
+            }
+            cited = rng.sample(self.doc_ids[:i], min(i, refs_per_doc))
+            self.references[doc_id] = cited
+            for other in cited:
+                self.citations[other].append(doc_id)
+        self.external_ratio = external_ratio
+        self.seed = seed
+
+    def _entry(self, order, doc_id, text_key):
+        doc = self.docs[doc_id]
+        authors = ', '.join(doc['authors'])
+        return {
+            'order': str(order),
+            text_key: f"{authors}, \"{doc['title']}\", <i>{doc['publicationTitle']}</i>, {doc['year']}.",
+            'title': doc['title'],
+            'links': {'documentLink': f"/document/{doc_id}"},
+        }
+
+    def _external(self, order, text_key):
+        return {'order': str(order), text_key: f"J. Doe, \"External work {order}\", arXiv, 2020.", 'links': {}}
+
+    def references_json(self, doc_id):
+        refs = [self._entry(i, d, 'text') for i, d in enumerate(self.references[doc_id], 1)]
+        rng = random.Random(f"{self.seed}-{doc_id}")
+        refs += [self._external(len(refs) + i + 1, 'text')
+                 for i in range(sum(1 for _ in refs if rng.random() < self.external_ratio))]
+        return {'references': refs}
+
+    def citations_json(self, doc_id):
+        ieee = [self._entry(i, d, 'displayText') for i, d in enumerate(self.citations[doc_id], 1)]
+        return {'paperCitations': {'ieee': ieee, 'nonIeee': [self._external(1, 'displayText')]},
+                'patentCitations': {}}
+
+    def reachable(self, seeds, max_depth):
+        """从种子出发、沿参考文献和被引两个方向、深度不超过max_depth能到达的全部文献（用于校验）"""
+        depth = {str(s): 0 for s in seeds}
+        layer = list(depth)
+        for d in range(max_depth):
+            nxt = []
+            for doc_id in layer:
+                for other in self.references[doc_id] + self.citations[doc_id]:
+                    if other not in depth:
+                        depth[other] = d + 1
+                        nxt.append(other)
+            layer = nxt
+        return depth
+
+
+class StubServer:
+    """在后台线程中运行的桩服务器"""
+
+    def __init__(self, graph=None, host='127.0.0.1', port=DEFAULT_STUB_PORT):
+        self.graph = graph or SyntheticCitationGraph()
+        self.requests = Counter()
+        self.host = host
+        self.port = port
+        self.httpd = None
+        self.thread = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                stub.requests[path] += 1
+                match = RE_REST.match(path)
+                if match and match.group(1) in stub.graph.docs:
+                    doc_id, endpoint = match.groups()
+                    data = stub.graph.references_json(doc_id) if endpoint == 'references' \
+                        else stub.graph.citations_json(doc_id)
+                    self._send(200, json.dumps(data).encode('utf-8'), 'application/json')
+                    return
+                match = RE_DOCUMENT.match(path)
+                if match and match.group(1) in stub.graph.docs:
+                    doc = stub.graph.docs[match.group(1)]
+                    body = f"<html><head><title>{doc['title']}</title></head><body><h1>{doc['title']}</h1></body></html>"
+                    self._send(200, body.encode('utf-8'), 'text/html; charset=utf-8')
+                    return
+                self._send(404, b'{"error": "not found"}', 'application/json')
+
+            def _send(self, code, body, content_type):
+                self.send_response(code)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+
+
+def main():
+    args = sys.argv[1:]
+    positional = [a for i, a in enumerate(args) if not a.startswith('--') and (i == 0 or args[i - 1] != '--docs')]
+    port = int(positional[0]) if positional else DEFAULT_STUB_PORT
+    n_docs = int(args[args.index('--docs') + 1]) if '--docs' in args else 300
+    server = StubServer(SyntheticCitationGraph(n_docs), port=port).start()
+    print(f"✓ 桩服务器已启动：{server.url}（{n_docs} 篇合成文献，doc_id {FIRST_DOC_ID}-{FIRST_DOC_ID + n_docs - 1}）")
+    print(f"  例如：{server.url}/rest/document/{FIRST_DOC_ID + n_docs - 1}/references")
+    try:
+        server.thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
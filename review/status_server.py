@@ -0,0 +1,285 @@
+"""
+爬虫实时状态接口
+在爬虫进程内启动一个本地HTTP服务，直接从内存计数器返回进度、吞吐、当前阶段、
+最近错误和预计剩余时间，不读取任何结果文件或日志文件
+
+    http://127.0.0.1:8765/             HTML页面（自动刷新）
+    http://127.0.0.1:8765/status.json  JSON
+"""
+
+import html
+import json
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_STATUS_HOST = '127.0.0.1'
+DEFAULT_STATUS_PORT = 8765
+
+
+class CrawlStatus:
+    """爬虫运行状态（仅内存，线程安全）"""
+
+    def __init__(self, max_errors=20, max_log_lines=30):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.total_queries = 0
+        self.completed_queries = 0       # 包含之前运行已完成的
+        self.completed_this_run = 0
+        self.failed_queries = 0
+        self._completed_ids = set()      # 已计入 completed_queries / failed_queries 的检索式编号
+        self._failed_ids = set()
+        self.current_query_id = None
+        self.current_query_text = None
+        self.current_query_started = None
+        self.current_page = 0
+        self.articles_extracted = 0
+        self.pdfs_downloaded = 0
+        self.query_durations = deque(maxlen=20)  # 最近检索式耗时，用于估算ETA
+        self.recent_errors = deque(maxlen=max_errors)
+        self.recent_log = deque(maxlen=max_log_lines)
+        self.stage_source = None  # 提供当前阶段的对象（CrawlMetrics）
+        self.scheduler_source = None  # 提供各端点队列状态的对象（EndpointScheduler）
+
+    def set_totals(self, total_queries, completed_ids=(), failed_ids=()):
+        """设置总数和之前运行已完成/失败的检索式编号（重新爬取这些检索式时不会重复计数）"""
+        with self._lock:
+            self.total_queries = total_queries
+            self._completed_ids = {str(q) for q in completed_ids}
+            self._failed_ids = {str(q) for q in failed_ids}
+            self.completed_queries = len(self._completed_ids)
+            self.failed_queries = len(self._failed_ids)
+
+    def query_started(self, query_id, query_text):
+        with self._lock:
+            self.current_query_id = query_id
+            self.current_query_text = query_text
+            self.current_query_started = time.time()
+            self.current_page = 0
+
+    def page_extracted(self, page_num, articles_count):
+        with self._lock:
+            self.current_page = page_num
+            self.articles_extracted += articles_count
+
+    def pdf_downloaded(self):
+        with self._lock:
+            self.pdfs_downloaded += 1
+
+    def query_finished(self, success):
+        with self._lock:
+            if self.current_query_started is not None:
+                self.query_durations.append(time.time() - self.current_query_started)
+            query_id = str(self.current_query_id)
+            if success:
+                self.completed_this_run += 1
+                if query_id not in self._completed_ids:
+                    self._completed_ids.add(query_id)
+                    self.completed_queries += 1
+                if query_id in self._failed_ids:
+                    self._failed_ids.discard(query_id)
+                    self.failed_queries -= 1
+            elif query_id not in self._failed_ids:
+                self._failed_ids.add(query_id)
+                self.failed_queries += 1
+            self.current_query_id = None
+            self.current_query_text = None
+            self.current_query_started = None
+
+    def add_log(self, record_time, level, message):
+        with self._lock:
+            entry = {'time': record_time, 'level': level, 'message': message}
+            self.recent_log.append(entry)
+            if level in ('WARNING', 'ERROR', 'CRITICAL'):
+                self.recent_errors.append(entry)
+
+    def to_dict(self):
+        """生成状态快照"""
+        now = time.time()
+        stage = getattr(self.stage_source, 'active_stage', None)
+        endpoints = self.scheduler_source.stats() if self.scheduler_source is not None else {}
+        with self._lock:
+            elapsed = now - self.started_at
+            hours = elapsed / 3600 if elapsed > 0 else 0
+            remaining = max(self.total_queries - self.completed_queries, 0)
+
+            eta_seconds = None
+            if self.query_durations:
+                avg = sum(self.query_durations) / len(self.query_durations)
+                eta_seconds = avg * remaining
+                # 当前检索式已经用掉的时间
+                if self.current_query_started is not None:
+                    eta_seconds = max(eta_seconds - (now - self.current_query_started), 0)
+
+            return {
+                'time': datetime.now().isoformat(timespec='seconds'),
+                'uptime_seconds': round(elapsed, 1),
+                'progress': {
+                    'total': self.total_queries,
+                    'completed': self.completed_queries,
+                    'failed': self.failed_queries,
+                    'remaining': remaining,
+                    'percent': round(self.completed_queries / self.total_queries * 100, 1) if self.total_queries else 0.0
+                },
+                'current': {
+                    'query_id': self.current_query_id,
+                    'query_text': (self.current_query_text or '')[:200],
+                    'page': self.current_page,
+                    'stage': stage,
+                    'query_elapsed_seconds': round(now - self.current_query_started, 1) if self.current_query_started else None
+                },
+                'throughput': {
+                    'queries_per_hour': round(self.completed_this_run / hours, 2) if hours else 0.0,
+                    'articles_per_minute': round(self.articles_extracted / (elapsed / 60), 2) if elapsed else 0.0,
+                    'articles_extracted': self.articles_extracted,
+                    'pdfs_downloaded': self.pdfs_downloaded
+                },
+                'eta_seconds': round(eta_seconds) if eta_seconds is not None else None,
+                'endpoints': endpoints,
+                'recent_errors': list(self.recent_errors),
+                'recent_log': list(self.recent_log)[-10:]
+            }
+
+
+class StatusLogHandler(logging.Handler):
+    """把日志写入内存环形缓冲区（替代 readlines() 读取整个日志文件）"""
+
+    def __init__(self, status, level=logging.INFO):
+        super().__init__(level)
+        self.status = status
+
+    def emit(self, record):
+        try:
+            message = record.getMessage().strip()
+            if message:
+                self.status.add_log(
+                    datetime.fromtimestamp(record.created).strftime('%H:%M:%S'),
+                    record.levelname,
+                    message[:300]
+                )
+        except Exception:
+            self.handleError(record)
+
+
+def _format_seconds(seconds):
+    if seconds is None:
+        return '未知'
+    seconds = int(seconds)
+    return f"{seconds // 3600}小时{seconds % 3600 // 60}分{seconds % 60}秒"
+
+
+def render_html(data):
+    """渲染简单的HTML状态页"""
+    p = data['progress']
+    c = data['current']
+    t = data['throughput']
+    esc = html.escape
+
+    rows_errors = ''.join(
+        f"<tr><td>{esc(e['time'])}</td><td>{esc(e['level'])}</td><td>{esc(e['message'])}</td></tr>"
+        for e in reversed(data['recent_errors'])
+    ) or '<tr><td colspan="3">无</td></tr>'
+    rows_endpoints = ''.join(
+        f"<tr><td>{esc(name)}</td><td>{e['queue_depth']}</td><td>{e['running']}/{e['concurrency']}</td>"
+        f"<td>{e['started']}</td><td>{e['avg_wait_seconds']}</td><td>{e['max_wait_seconds']}</td></tr>"
+        for name, e in sorted(data.get('endpoints', {}).items())
+    ) or '<tr><td colspan="6">无</td></tr>'
+    rows_log = ''.join(
+        f"<tr><td>{esc(e['time'])}</td><td>{esc(e['level'])}</td><td>{esc(e['message'])}</td></tr>"
+        for e in reversed(data['recent_log'])
+    )
+
+    return f"""<!DOCTYPE html>
+<html lang="zh-CN"><head><meta charset="utf-8"><meta http-equiv="refresh" content="5">
+<title>IEEE Xplore 爬虫状态</title>
+<style>
+body {{ font-family: sans-serif; margin: 24px; }}
+table {{ border-collapse: collapse; margin-bottom: 16px; }}
+td, th {{ border: 1px solid #ccc; padding: 4px 8px; text-align: left; font-size: 13px; }}
+.bar {{ width: 400px; height: 16px; background: #eee; }}
+.bar div {{ height: 100%; background: #4a90d9; }}
+</style></head><body>
+<h2>IEEE Xplore 爬虫状态</h2>
+<div class="bar"><div style="width: {p['percent']}%"></div></div>
+<p>已完成 {p['completed']}/{p['total']} ({p['percent']}%) ｜ 失败 {p['failed']} ｜ 剩余 {p['remaining']} ｜ 预计剩余 {_format_seconds(data['eta_seconds'])}</p>
+<table>
+<tr><th>当前检索式</th><td>#{esc(str(c['query_id'] or '-'))} {esc(c['query_text'])}</td></tr>
+<tr><th>当前页 / 阶段</th><td>{c['page']} / {esc(str(c['stage'] or '-'))}</td></tr>
+<tr><th>本检索式已用时</th><td>{_format_seconds(c['query_elapsed_seconds'])}</td></tr>
+<tr><th>吞吐</th><td>{t['queries_per_hour']} 检索式/小时，{t['articles_per_minute']} 篇/分钟</td></tr>
+<tr><th>本次已提取</th><td>{t['articles_extracted']} 篇文献，{t['pdfs_downloaded']} 个PDF</td></tr>
+<tr><th>运行时长</th><td>{_format_seconds(data['uptime_seconds'])}</td></tr>
+</table>
+<h3>端点队列</h3>
+<table><tr><th>端点</th><th>排队</th><th>执行中/并发</th><th>已执行</th><th>平均等待(秒)</th><th>最长等待(秒)</th></tr>{rows_endpoints}</table>
+<h3>最近错误</h3>
+<table><tr><th>时间</th><th>级别</th><th>内容</th></tr>{rows_errors}</table>
+<h3>最近日志</h3>
+<table><tr><th>时间</th><th>级别</th><th>内容</th></tr>{rows_log}</table>
+</body></html>"""
+
+
+class StatusServer:
+    """在后台线程中运行的状态HTTP服务"""
+
+    def __init__(self, status, host=DEFAULT_STATUS_HOST, port=DEFAULT_STATUS_PORT):
+        self.status = status
+        self.host = host
+        self.port = port
+        self.httpd = None
+        self.thread = None
+
+    def start(self):
+        status = self.status
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                if path in ('/status.json', '/status'):
+                    body = json.dumps(status.to_dict(), ensure_ascii=False, indent=2).encode('utf-8')
+                    content_type = 'application/json; charset=utf-8'
+                elif path in ('/', '/index.html'):
+                    body = render_html(status.to_dict()).encode('utf-8')
+                    content_type = 'text/html; charset=utf-8'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('Cache-Control', 'no-store')
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # 不把访问日志写进爬虫日志
+
+        self.httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='status-server', daemon=True)
+        self.thread.start()
+        return self
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/"
+
+    def stop(self):
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+
+
+def fetch_status(host=DEFAULT_STATUS_HOST, port=DEFAULT_STATUS_PORT, timeout=1.0):
+    """读取正在运行的爬虫的状态，爬虫未运行时返回None"""
+    import urllib.request
+    try:
+        with urllib.request.urlopen(f"http://{host}:{port}/status.json", timeout=timeout) as resp:
+            return json.loads(resp.read().decode('utf-8'))
+    except Exception:
+        return None
@@ -0,0 +1,165 @@
+"""
+测试脚本：在本地模拟的IEEE Xplore服务器（mock_ieee_server.py）上做端到端测试，不访问外网
+    1. 检索结果页的结构、翻页和结果数（用 page_parser 按爬虫的选择器解析）
+    2. 文章页 -> PDF查看器 -> getPDF 的下载流程，无订阅权限的文献不重试
+    3. 随机故障和429限流下爬虫的重试恢复，以及PDF队列的吞吐和并发
+    4. 加 --browser 参数时用Chrome完整运行 IEEECrawler（需要安装Chrome）
+结果写入临时目录，不影响 ieee_results/
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import requests
+
+from mock_ieee_server import MockIEEEServer, MockSettings
+from page_parser import parse_result_page, find_pdf_url
+from retry_policy import CATEGORIES
+
+QUERIES = ['stress detection', 'wearable sensor emotion', 'federated learning health']
+TRANSFERS = 40
+
+
+def crawl_pages(server, query_text):
+    """按 Next page 翻页，返回每页解析出的文献"""
+    pages = []
+    url = f"{server.url}/search/searchresult.jsp?queryText={query_text}&newsearch=true"
+    while url:
+        html = requests.get(url, timeout=10).text
+        pages.append(parse_result_page(html, server.url))
+        marker = "window.location.href='"
+        url = None
+        if 'aria-label="Next page"' in html:
+            start = html.index(marker) + len(marker)
+            url = server.url + html[start:html.index("'", start)]
+    return pages
+
+
+def check_pages(server):
+    for query_text in QUERIES:
+        expected = server.corpus.result_ids(query_text)
+        pages = crawl_pages(server, query_text)
+        ids = [a['doc_id'] for page in pages for a in page]
+        assert ids == expected, f"检索式 '{query_text}'：解析到 {len(ids)} 篇，应为 {len(expected)} 篇"
+        assert all(len(page) <= server.settings.results_per_page for page in pages), \
+            f"检索式 '{query_text}'：单页结果超过 {server.settings.results_per_page} 条"
+    print(f"✓ 检索结果页：{len(QUERIES)} 个检索式，共 {server.requests['search']} 页")
+
+
+def check_download_flow(server, crawler):
+    """文章页 -> 查看器 -> getPDF，与 resolve_pdf_url / fetch_pdf 的查找方式一致"""
+    from retry_policy import CrawlError, NOT_PDF
+
+    ids = server.corpus.result_ids(QUERIES[0])[:12]
+    downloaded = paywalled = 0
+    for doc_id in ids:
+        document = requests.get(f"{server.url}/document/{doc_id}/", timeout=10).text
+        assert 'stamp.jsp' in document, f"文章页没有PDF查看器链接：{doc_id}"
+        viewer = requests.get(f"{server.url}/stamp/stamp.jsp?tp=&arnumber={doc_id}", timeout=10).text
+        pdf_url = find_pdf_url(viewer)
+        try:
+            content = crawler.fetch_pdf(pdf_url, {}, {})
+            downloaded += content[:4] == b'%PDF'
+        except CrawlError as e:
+            paywalled += e.category == NOT_PDF
+            assert server.corpus.document(doc_id)['paywalled'] == (e.category == NOT_PDF), f"{doc_id}：{e.category}"
+    expected_paywalled = sum(server.corpus.document(d)['paywalled'] for d in ids)
+    assert paywalled == expected_paywalled and downloaded + paywalled == len(ids), \
+        f"下载 {downloaded} 篇、无权限 {paywalled} 篇，应无权限 {expected_paywalled} 篇"
+    print(f"✓ 下载流程：{downloaded} 篇PDF，{paywalled} 篇无权限（不重试）")
+
+
+def check_recovery(crawler, server, tmp):
+    """随机故障和限流下，经调度器的pdf队列并发传输，全部应在重试后成功（无权限的除外）"""
+    ids = [d for d in server.corpus.result_ids(QUERIES[1]) if not server.corpus.document(d)['paywalled']][:TRANSFERS]
+    start = time.perf_counter()
+    futures = []
+    for doc_id in ids:
+        article = {'doc_id': doc_id, 'title': doc_id}
+        url = f"{server.url}/stampPDF/getPDF.jsp?tp=&arnumber={doc_id}"
+        futures.append(crawler.scheduler.submit('pdf', '127.0.0.1', crawler.transfer_pdf, article, url, {}, {},
+                                                os.path.join(tmp, f"{doc_id}.pdf"), doc_id))
+    results = [f.result() for f in futures]
+    elapsed = time.perf_counter() - start
+    stats = server.stats()
+    failures = sum(n for key, n in stats['statuses'].items() if key.split()[-1] in ('429', '500', '503'))
+    assert all(results), f"{results.count(False)} 篇重试后仍失败"
+    assert failures > 0, "没有产生任何故障或限流响应，无法检查恢复行为"
+    assert stats['max_in_flight'] <= crawler.scheduler.endpoints['pdf'][0], \
+        f"并发 {stats['max_in_flight']} 超过pdf队列上限 {crawler.scheduler.endpoints['pdf'][0]}"
+    print(f"✓ 故障恢复：{results.count(True)}/{len(ids)} 篇下载成功，期间 {failures} 次故障/限流响应，"
+          f"{elapsed:.1f} 秒（{len(ids) / elapsed:.1f} 篇/秒），最大并发 {stats['max_in_flight']}")
+
+
+def run_browser_crawl(crawler, tmp):
+    """用Chrome完整运行爬虫（检索、翻页、下载）"""
+    csv_path = os.path.join(tmp, 'queries.csv')
+    with open(csv_path, 'w', encoding='utf-8') as f:
+        f.write("编号,检索式\n" + "".join(f'{i},"{q}"\n' for i, q in enumerate(QUERIES, 1)))
+    crawler.csv_file = csv_path
+    crawler.min_delay, crawler.max_delay = 1, 2
+    crawler.small_delay_min, crawler.small_delay_max = 0.2, 0.5
+    start = time.perf_counter()
+    crawler.run()
+    elapsed = time.perf_counter() - start
+    assert len(crawler.progress['completed']) == len(QUERIES), \
+        f"浏览器端到端：只完成 {len(crawler.progress['completed'])}/{len(QUERIES)} 个检索式"
+    print(f"✓ 浏览器端到端：完成 {len(crawler.progress['completed'])}/{len(QUERIES)} 个检索式，{elapsed:.0f} 秒")
+
+
+def test_mock_server(use_browser=False):
+    """测试模拟服务器和爬虫的端到端流程"""
+    print("""
+    ╔═══════════════════════════════════════════════════════════╗
+    ║              模拟IEEE Xplore服务器测试程序                ║
+    ║                                                           ║
+    ║  🧪 检索/翻页/下载流程、随机故障、429限流                 ║
+    ║  ⏱️  预计耗时：30秒以内（--browser 另计）                 ║
+    ╚═══════════════════════════════════════════════════════════╝
+    """)
+    settings = MockSettings(results=(30, 80), paywall_ratio=0.25, latency_scale=0.05)
+    server = MockIEEEServer(settings, port=0).start()
+    print(f"✓ 模拟服务器已启动：{server.url}")
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            from ieee_crawler import IEEECrawler
+            crawler = IEEECrawler(site_url=server.url)
+            # 退避不抖动（取全抖动区间的上限，结果可复现），时间缩短为1/100；熔断器不暂停，测试不必等待
+            crawler.retry.backoff_delay = lambda category, attempt: min(CATEGORIES[category][2],
+                                                                        CATEGORIES[category][1] * 2 ** attempt)
+            crawler.retry._sleep = lambda seconds: time.sleep(seconds / 100)
+            crawler.retry.breaker.min_samples = 10 ** 6
+            # PDF队列：4个并发，不设请求间隔（压测服务器端的限流和故障）
+            crawler.scheduler.endpoints['pdf'] = (4, 0, 0)
+
+            check_pages(server)
+            check_download_flow(server, crawler)
+
+            # 打开随机故障和限流
+            settings.failure_ratio = 0.15
+            server.set_rate_limit(15, burst=5)
+            check_recovery(crawler, server, tmp)
+            crawler.scheduler.shutdown()
+
+            if use_browser:
+                settings.failure_ratio = 0.02
+                server.set_rate_limit(None)
+                run_browser_crawl(crawler, tmp)
+        finally:
+            os.chdir(cwd)
+            server.stop()
+
+    print("\n✅ 测试成功！")
+
+
+if __name__ == "__main__":
+    try:
+        test_mock_server('--browser' in sys.argv)
+    except AssertionError as e:
+        print(f"\n❌ 测试失败：{e}")
+        sys.exit(1)
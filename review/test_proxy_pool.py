@@ -0,0 +1,109 @@
+"""
+测试脚本：验证代理池（评分、轮换、隔离、吞吐统计）
+在本机启动一个源服务器和四个转发代理（正常 / 慢 / 返回403验证码页面 / 直接断开），不访问外网
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from proxy_pool import ProxyPool, LocalForwardingProxy, looks_blocked
+
+REQUESTS = 60
+
+
+def start_origin():
+    """本地源服务器：返回固定大小的内容"""
+    body = b'%PDF' + b'x' * 20000
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/pdf')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
+def fetch(pool, url):
+    proxy = pool.get()
+    start = time.perf_counter()
+    try:
+        response = requests.get(url, proxies=pool.requests_proxies(proxy), timeout=10)
+    except requests.RequestException:
+        pool.record(proxy, time.perf_counter() - start, ok=False)
+        return None
+    pool.record(proxy, time.perf_counter() - start, ok=response.ok,
+                blocked=looks_blocked(response.status_code, response.text if response.status_code != 200 else None),
+                nbytes=len(response.content))
+    return response
+
+
+def test_proxy_pool():
+    """测试代理池"""
+    print("""
+    ╔═══════════════════════════════════════════════════════════╗
+    ║              代理池测试程序                               ║
+    ║                                                           ║
+    ║  🧪 本地源服务器 + 4个本地转发代理（正常/慢/被封/断开）   ║
+    ║  ⏱️  预计耗时：30秒以内                                   ║
+    ╚═══════════════════════════════════════════════════════════╝
+    """)
+
+    origin = start_origin()
+    url = f"http://127.0.0.1:{origin.server_address[1]}/stamp/getPDF.jsp?arnumber=1"
+    good = LocalForwardingProxy().start()
+    slow = LocalForwardingProxy(delay=0.3).start()
+    blocked = LocalForwardingProxy(mode='block').start()
+    dead = LocalForwardingProxy(mode='fail').start()
+
+    try:
+        # 按请求轮换
+        pool = ProxyPool([good.url, slow.url, blocked.url, dead.url], rotate='request', quarantine_seconds=60, seed=1)
+        success = sum(1 for _ in range(REQUESTS) if (r := fetch(pool, url)) is not None and r.ok)
+        report = {r['proxy']: r for r in pool.report()}
+        print(pool.format_report())
+
+        assert report[blocked.url]['status'] == 'quarantined' and report[blocked.url]['requests'] == 1, \
+            "被封的代理应在第一次被封后立即隔离"
+        assert report[dead.url]['status'] == 'quarantined', "连续出错的代理应被隔离"
+        assert report[good.url]['requests'] > report[slow.url]['requests'] > 0, "快的代理应分到更多请求"
+        assert report[good.url]['kb_per_second'] > 0, "没有统计到吞吐"
+        print(f"✓ 按请求轮换：{success}/{REQUESTS} 次成功")
+
+        # 按会话轮换：会话代理被隔离后换到其他代理
+        pool = ProxyPool([blocked.url, good.url], rotate='session', quarantine_seconds=60)
+        pool.session_proxy = blocked.url
+        fetch(pool, url)
+        assert not pool.session_healthy() and pool.get() == good.url, "会话代理被隔离后没有换到其他代理"
+        print("✓ 按会话轮换：会话代理被封后自动更换")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = pool.export(tmp)
+            assert os.path.exists(path), "没有写出代理统计文件"
+    finally:
+        for p in (good, slow, blocked, dead):
+            p.stop()
+        origin.shutdown()
+
+    print("\n✅ 测试成功！")
+
+
+if __name__ == "__main__":
+    try:
+        test_proxy_pool()
+    except AssertionError as e:
+        print(f"\n❌ 测试失败：{e}")
+        sys.exit(1)
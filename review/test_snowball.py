@@ -0,0 +1,119 @@
+"""
+测试脚本：验证滚雪球检索（前沿队列、深度限制、断点续爬）
+使用本地桩服务器（snowball_stub_server.py）提供的合成引用网络，不访问IEEE Xplore，不需要浏览器
+结果写入临时目录，不影响 ieee_results/
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+from snowball import SnowballFrontier, SnowballClient, SnowballCrawler, add_seeds, SNOWBALL_FILENAME
+from snowball_stub_server import StubServer, SyntheticCitationGraph, FIRST_DOC_ID
+
+MAX_DEPTH = 2
+SEEDS = [str(FIRST_DOC_ID + 120), str(FIRST_DOC_ID + 180)]
+# 第几次请求后模拟用户按下Ctrl+C
+INTERRUPT_AFTER = 7
+
+
+class InterruptingDelay:
+    """代替 safe_delay：不等待，只计数；达到指定次数时抛出 KeyboardInterrupt"""
+
+    def __init__(self, interrupt_after=None):
+        self.calls = 0
+        self.interrupt_after = interrupt_after
+
+    def __call__(self, delay_type='small'):
+        self.calls += 1
+        if self.interrupt_after and self.calls == self.interrupt_after:
+            raise KeyboardInterrupt
+
+
+def test_snowball():
+    """测试滚雪球检索"""
+    print("""
+    ╔═══════════════════════════════════════════════════════════╗
+    ║              滚雪球检索测试程序                           ║
+    ║                                                           ║
+    ║  🧪 本地桩服务器 + 合成引用网络（中断后续爬）             ║
+    ║  ⏱️  预计耗时：10秒以内                                   ║
+    ╚═══════════════════════════════════════════════════════════╝
+    """)
+
+    graph = SyntheticCitationGraph(n_docs=200)
+    server = StubServer(graph, port=0).start()
+    print(f"✓ 桩服务器已启动：{server.url}")
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, SNOWBALL_FILENAME)
+            client = SnowballClient(server.url)
+
+            # 第一次运行：中途中断
+            frontier = SnowballFrontier(db_path)
+            add_seeds(frontier, SEEDS)
+            crawler = SnowballCrawler(frontier, client, delay=InterruptingDelay(INTERRUPT_AFTER), results_dir=tmp)
+            interrupted = False
+            try:
+                crawler.run(max_depth=MAX_DEPTH)
+            except KeyboardInterrupt:
+                interrupted = True
+            assert interrupted, "没有发生预期的中断"
+            first = frontier.counts(MAX_DEPTH)
+            frontier.close()
+            print(f"✓ 第一次运行在第 {INTERRUPT_AFTER} 次请求时中断：已展开 {first.get('done', 0)} 篇")
+
+            # 第二次运行：重新打开数据库，从中断处继续
+            frontier = SnowballFrontier(db_path)
+            crawler = SnowballCrawler(frontier, client, delay=InterruptingDelay(), results_dir=tmp)
+            crawler.run(max_depth=MAX_DEPTH)
+
+            # 校验
+            expected = graph.reachable(SEEDS, MAX_DEPTH)
+            rows = {r['doc_id']: dict(r) for r in frontier.conn.execute('SELECT * FROM frontier')}
+
+            assert set(rows) == set(expected), \
+                f"发现的文献与预期不一致：多出 {len(set(rows) - set(expected))}，缺少 {len(set(expected) - set(rows))}"
+            wrong_depth = [d for d in rows if rows[d]['depth'] != expected.get(d)]
+            assert not wrong_depth, f"{len(wrong_depth)} 篇文献的深度不正确，例如 {wrong_depth[:3]}"
+
+            expanded = {d for d, r in rows.items() if r['status'] == 'done'}
+            should_expand = {d for d, depth in expected.items() if depth < MAX_DEPTH}
+            assert expanded == should_expand, f"已展开 {len(expanded)} 篇，应展开 {len(should_expand)} 篇"
+
+            # 入度 = 与之相邻的已展开文献数
+            for doc_id, row in rows.items():
+                neighbours = set(graph.references[doc_id]) | set(graph.citations[doc_id])
+                assert row['source'] == 'seed' or row['in_degree'] == len(neighbours & expanded), \
+                    f"入度不正确：{doc_id} 记录 {row['in_degree']}，应为 {len(neighbours & expanded)}"
+
+            # 只有中断时正在展开的那一篇允许被请求两次
+            repeated = [p for p, n in server.requests.items() if n > 1]
+            assert len(repeated) <= 2, f"重复请求：{repeated[:5]}"
+            print(f"✓ 共请求 {sum(server.requests.values())} 次，重复请求 {len(repeated)} 个路径（中断时未提交的那一篇）")
+
+            # 结果文件
+            with open(os.path.join(tmp, 'query_snowball_results.json'), 'r', encoding='utf-8') as f:
+                results = json.load(f)
+            assert results['articles_count'] == len(rows) - len(SEEDS), \
+                f"结果文件文献数 {results['articles_count']}，应为 {len(rows) - len(SEEDS)}"
+
+            # 再次运行不应再发出任何请求
+            before = sum(server.requests.values())
+            SnowballCrawler(frontier, client, delay=InterruptingDelay(), results_dir=tmp).run(max_depth=MAX_DEPTH)
+            assert sum(server.requests.values()) == before, "队列已空时再次运行仍发出了请求"
+            frontier.close()
+    finally:
+        server.stop()
+
+    print(f"\n✅ 测试成功！深度≤{MAX_DEPTH} 共 {len(expected)} 篇文献，展开 {len(expanded)} 篇")
+
+
+if __name__ == "__main__":
+    try:
+        test_snowball()
+    except AssertionError as e:
+        print(f"\n❌ 测试失败：{e}")
+        sys.exit(1)
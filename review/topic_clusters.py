@@ -0,0 +1,373 @@
+"""
+主题聚类
+对去重后的文献（标题+摘要）做特征哈希TF-IDF（不需要维护完整词表），用小批量球面k-means聚类，
+给每篇文献附加主题簇编号和簇的高频词。模型保存在 ieee_results/topic_model.npz：
+之后爬取的新文献直接分配到已有簇（同时在线更新簇中心），不需要重新训练
+需要安装 numpy 和 scipy：pip install numpy scipy
+
+用法：
+    python topic_clusters.py fit [--k 20]     # 训练（覆盖已有模型）
+    python topic_clusters.py update           # 把新文献分配到已有簇
+    python topic_clusters.py show             # 查看各簇大小和高频词
+"""
+
+import json
+import os
+import random
+import sys
+import time
+import zlib
+
+from article_records import iter_articles
+from near_duplicates import StreamingDeduplicator, DEFAULT_THRESHOLD
+from screening_rank import article_terms
+from search_index import article_key
+
+MODEL_FILENAME = 'topic_model.npz'
+ASSIGNMENTS_FILENAME = 'topic_assignments.json'
+DEFAULT_K = 20
+N_FEATURES = 1 << 16
+SAMPLE_SIZE = 20000
+BATCH_SIZE = 1000
+INIT_EPOCHS = 5
+TOP_TERMS = 8
+
+
+def hash_term(term):
+    return zlib.crc32(term.encode('utf-8')) & (N_FEATURES - 1)
+
+
+def hashed_counts(article, names=None):
+    """文献 -> {哈希桶: 词频}；names 不为None时记录桶对应的词（用于生成簇标签）"""
+    counts = {}
+    for term in article_terms(article):
+        bucket = hash_term(term)
+        counts[bucket] = counts.get(bucket, 0) + 1
+        if names is not None and bucket not in names:
+            names[bucket] = term
+    return counts
+
+
+class TopicModel:
+    """特征哈希TF-IDF + 小批量球面k-means"""
+
+    def __init__(self, results_dir='ieee_results', k=DEFAULT_K, dedupe_threshold=DEFAULT_THRESHOLD, seed=1):
+        self.results_dir = results_dir
+        self.k = k
+        self.dedupe_threshold = dedupe_threshold
+        self.seed = seed
+        self.centroids = None     # k × N_FEATURES，行L2归一化
+        self.cluster_sizes = None
+        self.df = None            # 每个哈希桶的文档频率
+        self.n_docs = 0
+        self.assignments = {}     # article_key -> 簇编号
+        self.labels = {}          # 簇编号 -> 高频词
+        self.names = {}           # 哈希桶 -> 词（只保存标签用到的桶）
+
+    # ------------------------------------------------------------------
+    # 持久化
+    # ------------------------------------------------------------------
+
+    @property
+    def model_path(self):
+        return os.path.join(self.results_dir, MODEL_FILENAME)
+
+    @property
+    def assignments_path(self):
+        return os.path.join(self.results_dir, ASSIGNMENTS_FILENAME)
+
+    def exists(self):
+        return os.path.exists(self.model_path) and os.path.exists(self.assignments_path)
+
+    def load(self):
+        import numpy as np
+
+        data = np.load(self.model_path)
+        self.centroids = data['centroids']
+        self.cluster_sizes = data['cluster_sizes']
+        self.df = data['df']
+        self.n_docs = int(data['n_docs'])
+        self.k = self.centroids.shape[0]
+        with open(self.assignments_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        self.assignments = meta['assignments']
+        self.labels = {int(c): terms for c, terms in meta['labels'].items()}
+        self.names = {int(b): t for b, t in meta['names'].items()}
+        return self
+
+    def save(self):
+        import numpy as np
+
+        tmp = self.model_path + '.tmp.npz'
+        np.savez(tmp, centroids=self.centroids, cluster_sizes=self.cluster_sizes, df=self.df, n_docs=self.n_docs)
+        os.replace(tmp, self.model_path)
+        tmp = self.assignments_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({
+                'k': self.k,
+                'assignments': self.assignments,
+                'labels': {str(c): terms for c, terms in self.labels.items()},
+                'names': {str(b): t for b, t in self.names.items()},
+            }, f, ensure_ascii=False)
+        os.replace(tmp, self.assignments_path)
+
+    # ------------------------------------------------------------------
+    # 向量化
+    # ------------------------------------------------------------------
+
+    def _vectorize(self, batch_counts):
+        """一批 {桶: 词频} -> 行L2归一化的TF-IDF稀疏矩阵"""
+        import numpy as np
+        from scipy import sparse
+
+        indptr, indices, data = [0], [], []
+        for counts in batch_counts:
+            indices.extend(counts.keys())
+            data.extend(counts.values())
+            indptr.append(len(indices))
+        indices = np.array(indices, dtype=np.int32)
+        tf = np.array(data, dtype=np.float32)
+        idf = np.log((1 + self.n_docs) / (1 + self.df[indices])) + 1
+        values = (1 + np.log(tf)) * idf
+        x = sparse.csr_matrix((values.astype(np.float32), indices, np.array(indptr, dtype=np.int64)),
+                              shape=(len(batch_counts), N_FEATURES))
+        norms = np.sqrt(np.asarray(x.multiply(x).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        return sparse.diags(1 / norms).dot(x).tocsr()
+
+    # ------------------------------------------------------------------
+    # k-means
+    # ------------------------------------------------------------------
+
+    def _init_centroids(self, x, rng):
+        """k-means++ 初始化（余弦距离）"""
+        import numpy as np
+
+        n = x.shape[0]
+        first = rng.randrange(n)
+        chosen = [first]
+        best_sim = np.asarray(x.dot(x[first].T).todense()).ravel()
+        for _ in range(1, min(self.k, n)):
+            dist = np.clip(1 - best_sim, 0, None)
+            total = dist.sum()
+            if total <= 0:
+                idx = rng.randrange(n)
+            else:
+                idx = int(np.searchsorted(np.cumsum(dist), rng.random() * total))
+                idx = min(idx, n - 1)
+            chosen.append(idx)
+            best_sim = np.maximum(best_sim, np.asarray(x.dot(x[idx].T).todense()).ravel())
+        centroids = np.asarray(x[chosen].todense(), dtype=np.float32)
+        self.k = len(chosen)
+        return centroids
+
+    def _partial_fit(self, x):
+        """小批量更新：把批内文献分配到最近的簇，并按 1/簇大小 的学习率移动簇中心；返回分配结果"""
+        import numpy as np
+
+        assigned = np.asarray(x.dot(self.centroids.T)).argmax(axis=1)
+        for c in np.unique(assigned):
+            members = x[assigned == c]
+            m = members.shape[0]
+            self.cluster_sizes[c] += m
+            eta = m / self.cluster_sizes[c]
+            mean = np.asarray(members.mean(axis=0)).ravel()
+            self.centroids[c] = (1 - eta) * self.centroids[c] + eta * mean
+            norm = np.linalg.norm(self.centroids[c])
+            if norm > 0:
+                self.centroids[c] /= norm
+        return assigned
+
+    def _update_labels(self, names):
+        import numpy as np
+
+        self.labels = {}
+        used = {}
+        for c in range(self.k):
+            top = np.argsort(-self.centroids[c])[:TOP_TERMS * 2]
+            terms = []
+            for bucket in top.tolist():
+                term = names.get(bucket) or self.names.get(bucket)
+                if term and self.centroids[c, bucket] > 0:
+                    terms.append(term)
+                    used[bucket] = term
+                if len(terms) >= TOP_TERMS:
+                    break
+            self.labels[c] = terms
+        self.names = used
+
+    def fit(self, verbose=False):
+        """训练：第一遍统计文档频率并抽样，在样本上初始化；第二遍流式小批量更新并记录全部文献的簇"""
+        import numpy as np
+
+        start = time.perf_counter()
+        rng = random.Random(self.seed)
+
+        # 第一遍：去重、文档频率、蓄水池抽样
+        deduplicator = StreamingDeduplicator(threshold=self.dedupe_threshold)
+        df = np.zeros(N_FEATURES, dtype=np.float64)
+        representative = []
+        sample = []
+        n_docs = 0
+        names = {}
+        for position, article in enumerate(iter_articles(self.results_dir)):
+            rep = deduplicator.add(article)
+            representative.append(rep)
+            if rep != position:
+                continue
+            counts = hashed_counts(article, names)
+            df[list(counts.keys())] += 1
+            n_docs += 1
+            if len(sample) < SAMPLE_SIZE:
+                sample.append(counts)
+            else:
+                j = rng.randrange(n_docs)
+                if j < SAMPLE_SIZE:
+                    sample[j] = counts
+        if not n_docs:
+            return self
+        self.df, self.n_docs = df, n_docs
+
+        # 在样本上初始化并迭代几轮
+        x = self._vectorize(sample)
+        self.centroids = self._init_centroids(x, rng)
+        self.cluster_sizes = np.zeros(self.k, dtype=np.float64)
+        order = list(range(x.shape[0]))
+        for _ in range(INIT_EPOCHS):
+            rng.shuffle(order)
+            for i in range(0, len(order), BATCH_SIZE):
+                self._partial_fit(x[order[i:i + BATCH_SIZE]])
+        del x, sample
+
+        # 第二遍：全部文献流式分配（重复文献跟随其代表文献）
+        self.assignments = {}
+        rep_cluster = {}
+        batch, batch_keys, batch_positions = [], [], []
+
+        def flush():
+            if not batch:
+                return
+            assigned = self._partial_fit(self._vectorize(batch))
+            for key, position, c in zip(batch_keys, batch_positions, assigned.tolist()):
+                self.assignments[key] = c
+                rep_cluster[position] = c
+            batch.clear()
+            batch_keys.clear()
+            batch_positions.clear()
+
+        pending = []
+        for position, article in enumerate(iter_articles(self.results_dir)):
+            key = article_key(article)
+            rep = representative[position] if position < len(representative) else position
+            if rep != position:
+                pending.append((key, rep))
+                continue
+            batch.append(hashed_counts(article))
+            batch_keys.append(key)
+            batch_positions.append(position)
+            if len(batch) >= BATCH_SIZE:
+                flush()
+        flush()
+        for key, rep in pending:
+            if rep in rep_cluster and key not in self.assignments:
+                self.assignments[key] = rep_cluster[rep]
+
+        self._update_labels(names)
+        self.save()
+        if verbose:
+            print(f"✓ 聚类完成：{n_docs} 篇去重文献，{self.k} 个簇（{time.perf_counter() - start:.1f} 秒）")
+        return self
+
+    def update(self, verbose=False):
+        """把尚未分配的新文献分配到已有簇，在线更新簇中心，返回新分配的文献数"""
+        import numpy as np
+
+        batch, batch_keys = [], []
+        seen = set()
+        names = {}
+        added = 0
+
+        def flush():
+            if not batch:
+                return
+            for counts in batch:
+                self.df[list(counts.keys())] += 1
+            self.n_docs += len(batch)
+            assigned = self._partial_fit(self._vectorize(batch))
+            self.assignments.update(zip(batch_keys, assigned.tolist()))
+            batch.clear()
+            batch_keys.clear()
+
+        for article in iter_articles(self.results_dir):
+            key = article_key(article)
+            if key in self.assignments or key in seen:
+                continue
+            seen.add(key)
+            batch.append(hashed_counts(article, names))
+            batch_keys.append(key)
+            added += 1
+            if len(batch) >= BATCH_SIZE:
+                flush()
+        flush()
+
+        if added:
+            self.cluster_sizes = np.asarray(self.cluster_sizes, dtype=np.float64)
+            self._update_labels(names)
+            self.save()
+        if verbose:
+            print(f"✓ 新分配 {added} 篇文献到已有的 {self.k} 个簇")
+        return added
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    def cluster_of(self, article):
+        """文献的 (簇编号, 高频词)；未分配时返回 (None, [])"""
+        c = self.assignments.get(article_key(article))
+        if c is None:
+            return None, []
+        return c, self.labels.get(c, [])
+
+    def summary(self):
+        """[(簇编号, 文献数, 高频词)]，按文献数降序"""
+        counts = {}
+        for c in self.assignments.values():
+            counts[c] = counts.get(c, 0) + 1
+        return sorted(((c, n, self.labels.get(c, [])) for c, n in counts.items()), key=lambda x: x[1], reverse=True)
+
+
+def print_summary(model, top=None):
+    rows = model.summary()
+    print(f"\n🧩 主题簇（{model.k} 个，已分配 {len(model.assignments)} 篇）：")
+    for c, n, terms in rows[:top] if top else rows:
+        print(f"  #{c:<3} {n:>6} 篇  {', '.join(terms)}")
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] not in ('fit', 'update', 'show'):
+        print(__doc__)
+        return
+    try:
+        import scipy  # noqa: F401
+    except ImportError:
+        print("✗ 需要安装 numpy 和 scipy：")
+        print("  pip install numpy scipy")
+        return
+
+    model = TopicModel(k=int(args[args.index('--k') + 1]) if '--k' in args else DEFAULT_K)
+    if args[0] == 'fit':
+        model.fit(verbose=True)
+    else:
+        if not model.exists():
+            print("⚠️  还没有主题模型，请先运行 python topic_clusters.py fit")
+            return
+        model.load()
+        if args[0] == 'update':
+            model.update(verbose=True)
+    print_summary(model)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,55 @@
-"""验证PDF文件"""
-import os
+"""验证PDF文件（文件头、%%EOF结尾、xref、页数、加密）"""
+import sys
+from corpus_manifest import CorpusManifest
+from pdf_validator import validate_directory
 
 pdf_dir = 'ieee_pdfs'
-files = [f for f in os.listdir(pdf_dir) if f.endswith('.pdf')]
 
-print(f"\n{'='*60}")
-print(f"PDF文件验证报告")
-print(f"{'='*60}\n")
-print(f"文件数量：{len(files)} 个\n")
 
-total_size = 0
-valid_count = 0
-
-for i, filename in enumerate(files, 1):
-    filepath = os.path.join(pdf_dir, filename)
-    size = os.path.getsize(filepath)
-    total_size += size
+def main():
+    force = '--force' in sys.argv  # 忽略缓存，全部重新校验
+    manifest = CorpusManifest(pdf_dir=pdf_dir)
+    results, checked = validate_directory(pdf_dir, manifest=manifest, force=force)
     
-    # 验证PDF文件头
-    with open(filepath, 'rb') as f:
-        header = f.read(4)
-        is_valid = header == b'%PDF'
+    print(f"\n{'='*60}")
+    print(f"PDF文件验证报告")
+    print(f"{'='*60}\n")
+    print(f"文件数量：{len(results)} 个（本次校验 {checked} 个，其余使用缓存结果）\n")
     
-    status = "✓ 有效PDF" if is_valid else "✗ 无效文件"
-    if is_valid:
-        valid_count += 1
+    total_size = 0
+    valid_count = 0
+    encrypted_count = 0
+    truncated = []
     
-    print(f"{i}. {filename[:50]}...")
-    print(f"   大小：{size/1024:.1f} KB | {status}")
-
-print(f"\n{'='*60}")
-print(f"总计：{len(files)} 个文件，{total_size/1024/1024:.2f} MB")
-print(f"有效PDF：{valid_count}/{len(files)} 个")
-print(f"{'='*60}\n")
-
+    for i, (filename, size, verdict) in enumerate(results, 1):
+        total_size += size
+        
+        if verdict['valid']:
+            valid_count += 1
+            status = "✓ 有效PDF"
+        elif verdict['has_header'] and not verdict['has_eof']:
+            status = "✗ 已截断"
+            truncated.append(filename)
+        else:
+            status = "✗ 无效文件"
+        if verdict['encrypted']:
+            encrypted_count += 1
+            status += "（已加密）"
+        pages = verdict['pages'] if verdict['pages'] else '?'
+        
+        print(f"{i}. {filename[:50]}...")
+        print(f"   大小：{size/1024:.1f} KB | 页数：{pages} | {status}")
+        if verdict['errors']:
+            print(f"   问题：{'；'.join(verdict['errors'])}")
+    
+    print(f"\n{'='*60}")
+    print(f"总计：{len(results)} 个文件，{total_size/1024/1024:.2f} MB")
+    print(f"有效PDF：{valid_count}/{len(results)} 个")
+    print(f"已截断：{len(truncated)} 个，已加密：{encrypted_count} 个")
+    print(f"{'='*60}\n")
 
 
+if __name__ == "__main__":
+    # 进程池在Windows上会重新导入本模块，必须放在main()中
+    main()
 
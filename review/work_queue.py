@@ -0,0 +1,473 @@
+"""
+分布式工作队列（租约 + 心跳）
+多台机器共同完成一次爬取：协调者持有 ieee_results/work_queue.db（SQLite），各机器上的爬虫作为工作者
+租用检索式、定期发送心跳续约、把结果提交给协调者。
+
+- 租约：每个任务同一时刻只租给一个工作者，带有随机令牌和到期时间；心跳延长到期时间
+- 回收：租约到期（工作者崩溃、断网）的任务回到待处理状态，令牌作废
+- 幂等提交：只有持有当前令牌的工作者能提交；同一令牌重复提交直接返回"已提交"，
+  过期令牌的提交被丢弃，因此每个检索式的结果只写入一次
+- 失败：失败的任务重新排队，达到最大尝试次数后标记为失败
+- 限速：每台机器各自使用爬虫的安全延迟，总吞吐随出口IP数量增加
+
+结果文件由协调者写入 ieee_results/query_<id>_results.json（同时更新语料清单）。
+同一台机器上的多个进程可以直接共用数据库文件；跨机器时运行 serve，工作者通过HTTP访问
+（SQLite放在网络共享盘上时文件锁不可靠，不建议直接共用）
+
+用法：
+    python work_queue.py init [--queries 1,2,3] [--skip-completed]   # 把检索式加入队列
+    python work_queue.py serve [--host 0.0.0.0] [--port 8777]        # 启动协调者
+    python work_queue.py stats [http://协调者:8777]
+    python ieee_crawler.py --worker http://协调者:8777 [--worker-id 名称]
+    python ieee_crawler.py --worker ieee_results/work_queue.db       # 同一台机器上的多个进程
+"""
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+QUEUE_FILENAME = 'work_queue.db'
+DEFAULT_QUEUE_PORT = 8777
+# 租约时长（秒）；工作者每 1/3 租约时长发送一次心跳
+DEFAULT_LEASE_SECONDS = 300
+DEFAULT_MAX_ATTEMPTS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker_id TEXT,
+    lease_token TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    reclaimed INTEGER NOT NULL DEFAULT 0,
+    result_file TEXT,
+    error TEXT,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status, priority);
+CREATE TABLE IF NOT EXISTS workers (
+    worker_id TEXT PRIMARY KEY,
+    host TEXT,
+    first_seen TEXT,
+    last_heartbeat REAL,
+    completed INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class WorkQueue:
+    """SQLite租约队列（协调者端；同一台机器上的多个进程也可以直接使用）"""
+
+    def __init__(self, db_path=os.path.join('ieee_results', QUEUE_FILENAME), output_dir='ieee_results',
+                 lease_seconds=DEFAULT_LEASE_SECONDS, max_attempts=DEFAULT_MAX_ATTEMPTS, manifest=None):
+        self.db_path = db_path
+        self.output_dir = output_dir
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.manifest = manifest
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        os.makedirs(output_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def enqueue(self, tasks):
+        """加入任务 [(task_id, payload字典)]；已存在的任务不变，返回新加入的数量"""
+        now = datetime.now().isoformat()
+        with self._lock, self.conn:
+            before = self.conn.total_changes
+            # 按加入顺序处理
+            start = self.conn.execute('SELECT COALESCE(MAX(priority), -1) + 1 FROM tasks').fetchone()[0]
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO tasks (task_id, payload, priority, updated_at) VALUES (?, ?, ?, ?)',
+                [(str(task_id), json.dumps(payload, ensure_ascii=False), start + i, now)
+                 for i, (task_id, payload) in enumerate(tasks)])
+            return self.conn.total_changes - before
+
+    def _touch_worker(self, worker_id, host=None, completed=0, failed=0):
+        self.conn.execute("""
+            INSERT INTO workers (worker_id, host, first_seen, last_heartbeat, completed, failed) VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(worker_id) DO UPDATE SET last_heartbeat = excluded.last_heartbeat,
+                completed = completed + excluded.completed, failed = failed + excluded.failed
+        """, (worker_id, host, datetime.now().isoformat(), time.time(), completed, failed))
+
+    def reclaim_expired(self):
+        """租约到期的任务回到待处理状态（令牌作废，原工作者之后的提交会被拒绝）；返回回收数量"""
+        with self._lock, self.conn:
+            cur = self.conn.execute("""
+                UPDATE tasks SET status = 'pending', worker_id = NULL, lease_token = NULL, lease_expires = NULL,
+                    reclaimed = reclaimed + 1, updated_at = ?
+                WHERE status = 'leased' AND lease_expires < ?
+            """, (datetime.now().isoformat(), time.time()))
+            if cur.rowcount:
+                logging.warning(f"回收 {cur.rowcount} 个租约已到期的任务")
+            return cur.rowcount
+
+    def lease(self, worker_id, count=1, host=None):
+        """租用最多count个任务：[{'task_id', 'payload', 'token', 'expires'}]"""
+        self.reclaim_expired()
+        leased = []
+        with self._lock, self.conn:
+            self._touch_worker(worker_id, host)
+            rows = self.conn.execute(
+                "SELECT task_id, payload FROM tasks WHERE status = 'pending' ORDER BY priority, rowid LIMIT ?",
+                (count,)).fetchall()
+            for row in rows:
+                token = uuid.uuid4().hex
+                expires = time.time() + self.lease_seconds
+                # 条件更新：多个进程同时租用时只有一个能成功
+                cur = self.conn.execute("""
+                    UPDATE tasks SET status = 'leased', worker_id = ?, lease_token = ?, lease_expires = ?, updated_at = ?
+                    WHERE task_id = ? AND status = 'pending'
+                """, (worker_id, token, expires, datetime.now().isoformat(), row['task_id']))
+                if cur.rowcount:
+                    leased.append({'task_id': row['task_id'], 'payload': json.loads(row['payload']),
+                                   'token': token, 'expires': expires})
+        return leased
+
+    def heartbeat(self, worker_id, tokens):
+        """延长这些租约；返回仍然有效的令牌（不在其中的租约已被回收，工作者应放弃该任务）"""
+        valid = []
+        with self._lock, self.conn:
+            self._touch_worker(worker_id)
+            for token in tokens:
+                cur = self.conn.execute("""
+                    UPDATE tasks SET lease_expires = ? WHERE lease_token = ? AND status = 'leased'
+                """, (time.time() + self.lease_seconds, token))
+                if cur.rowcount:
+                    valid.append(token)
+        return valid
+
+    def complete(self, task_id, token, output_data, worker_id=None):
+        """提交结果：'committed'（已写入）、'duplicate'（该令牌已提交过）或 'stale'（租约已失效，结果被丢弃）"""
+        task_id = str(task_id)
+        with self._lock, self.conn:
+            # 立即取得写锁：检查令牌和写入结果之间不会被其他进程回收
+            self.conn.execute('BEGIN IMMEDIATE')
+            row = self.conn.execute('SELECT status, lease_token FROM tasks WHERE task_id = ?', (task_id,)).fetchone()
+            if row is None or row['lease_token'] != token:
+                return 'stale'
+            if row['status'] == 'done':
+                return 'duplicate'
+
+            path = os.path.join(self.output_dir, f"query_{task_id}_results.json")
+            tmp = f"{path}.{token}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(output_data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, path)
+            self.conn.execute("""
+                UPDATE tasks SET status = 'done', lease_expires = NULL, result_file = ?, error = NULL, updated_at = ?
+                WHERE task_id = ?
+            """, (path, datetime.now().isoformat(), task_id))
+            if worker_id:
+                self._touch_worker(worker_id, completed=1)
+
+        if self.manifest is not None:
+            try:
+                self.manifest.record_query(output_data, path)
+            except Exception as e:
+                logging.warning(f"更新语料清单失败（可运行 python corpus_manifest.py rebuild 修复）：{e}")
+        return 'committed'
+
+    def fail(self, task_id, token, error, worker_id=None):
+        """报告失败：重新排队（未达到最大尝试次数时）；返回任务的新状态，令牌失效时返回 'stale'"""
+        with self._lock, self.conn:
+            self.conn.execute('BEGIN IMMEDIATE')
+            row = self.conn.execute('SELECT status, lease_token, attempts FROM tasks WHERE task_id = ?',
+                                    (str(task_id),)).fetchone()
+            if row is None or row['lease_token'] != token or row['status'] != 'leased':
+                return 'stale'
+            status = 'failed' if row['attempts'] + 1 >= self.max_attempts else 'pending'
+            self.conn.execute("""
+                UPDATE tasks SET status = ?, attempts = attempts + 1, worker_id = NULL, lease_token = NULL,
+                    lease_expires = NULL, error = ?, updated_at = ?
+                WHERE task_id = ?
+            """, (status, str(error)[:500], datetime.now().isoformat(), str(task_id)))
+            if worker_id:
+                self._touch_worker(worker_id, failed=1)
+        return status
+
+    def release(self, task_id, token):
+        """主动归还租约（工作者正常退出时），不计入尝试次数"""
+        with self._lock, self.conn:
+            cur = self.conn.execute("""
+                UPDATE tasks SET status = 'pending', worker_id = NULL, lease_token = NULL, lease_expires = NULL
+                WHERE task_id = ? AND lease_token = ? AND status = 'leased'
+            """, (str(task_id), token))
+        return cur.rowcount > 0
+
+    def stats(self):
+        with self._lock:
+            counts = {r['status']: r['n'] for r in self.conn.execute(
+                'SELECT status, COUNT(*) AS n FROM tasks GROUP BY status')}
+            reclaimed = self.conn.execute('SELECT COALESCE(SUM(reclaimed), 0) FROM tasks').fetchone()[0]
+            now = time.time()
+            workers = [{
+                'worker_id': r['worker_id'],
+                'host': r['host'],
+                'completed': r['completed'],
+                'failed': r['failed'],
+                'seconds_since_heartbeat': round(now - r['last_heartbeat'], 1),
+                'alive': now - r['last_heartbeat'] < self.lease_seconds,
+            } for r in self.conn.execute('SELECT * FROM workers ORDER BY worker_id')]
+        return {
+            'pending': counts.get('pending', 0),
+            'leased': counts.get('leased', 0),
+            'done': counts.get('done', 0),
+            'failed': counts.get('failed', 0),
+            'reclaimed': reclaimed,
+            'lease_seconds': self.lease_seconds,
+            'workers': workers,
+        }
+
+
+class RemoteWorkQueue:
+    """通过HTTP访问协调者的队列（接口与WorkQueue相同）"""
+
+    def __init__(self, url, timeout=30, retries=3):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.retries = retries
+
+    def _call(self, method, **params):
+        import urllib.request
+        import urllib.error
+
+        body = json.dumps(params, ensure_ascii=False).encode('utf-8')
+        # heartbeat/complete/fail/release 都是幂等的，网络错误时可以安全重试；
+        # lease 重试可能留下一个没人持有的租约，它会在到期后被回收
+        for attempt in range(self.retries):
+            try:
+                request = urllib.request.Request(f"{self.url}/{method}", data=body,
+                                                 headers={'Content-Type': 'application/json'})
+                with urllib.request.urlopen(request, timeout=self.timeout) as resp:
+                    return json.loads(resp.read().decode('utf-8'))['result']
+            except (urllib.error.URLError, OSError) as e:
+                if attempt == self.retries - 1:
+                    raise
+                logging.warning(f"协调者请求失败（{method}），{2 ** attempt} 秒后重试：{e}")
+                time.sleep(2 ** attempt)
+
+    def lease(self, worker_id, count=1, host=None):
+        return self._call('lease', worker_id=worker_id, count=count, host=host or socket.gethostname())
+
+    def heartbeat(self, worker_id, tokens):
+        return self._call('heartbeat', worker_id=worker_id, tokens=list(tokens))
+
+    def complete(self, task_id, token, output_data, worker_id=None):
+        return self._call('complete', task_id=task_id, token=token, output_data=output_data, worker_id=worker_id)
+
+    def fail(self, task_id, token, error, worker_id=None):
+        return self._call('fail', task_id=task_id, token=token, error=str(error), worker_id=worker_id)
+
+    def release(self, task_id, token):
+        return self._call('release', task_id=task_id, token=token)
+
+    def stats(self):
+        return self._call('stats')
+
+    def close(self):
+        pass
+
+
+def open_queue(target, output_dir='ieee_results', manifest=None):
+    """http(s):// 地址 -> RemoteWorkQueue，否则视为本地数据库路径"""
+    if target.startswith(('http://', 'https://')):
+        return RemoteWorkQueue(target)
+    return WorkQueue(target, output_dir, manifest=manifest)
+
+
+class Heartbeat:
+    """后台线程定期为当前租约续约；租约被回收时 lost 置为True"""
+
+    def __init__(self, queue, worker_id, token, interval):
+        self.queue = queue
+        self.worker_id = worker_id
+        self.token = token
+        self.interval = interval
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='lease-heartbeat', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                if self.token not in self.queue.heartbeat(self.worker_id, [self.token]):
+                    self.lost = True
+                    logging.warning("租约已被协调者回收，本任务的结果将被丢弃")
+                    return
+            except Exception as e:
+                logging.warning(f"心跳失败：{e}")
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join(timeout=5)
+        return False
+
+
+class CoordinatorServer:
+    """协调者HTTP服务：POST /lease /heartbeat /complete /fail /release，GET /stats"""
+
+    METHODS = ('lease', 'heartbeat', 'complete', 'fail', 'release', 'stats')
+
+    def __init__(self, queue, host='127.0.0.1', port=DEFAULT_QUEUE_PORT):
+        self.queue = queue
+        self.host = host
+        self.port = port
+        self.httpd = None
+        self.thread = None
+
+    def start(self):
+        queue = self.queue
+
+        class Handler(BaseHTTPRequestHandler):
+            def _dispatch(self, params):
+                method = self.path.split('?', 1)[0].strip('/')
+                if method not in CoordinatorServer.METHODS:
+                    self._send(404, {'error': f"未知方法：{method}"})
+                    return
+                try:
+                    self._send(200, {'result': getattr(queue, method)(**params)})
+                except TypeError as e:
+                    self._send(400, {'error': str(e)})
+                except Exception as e:
+                    logging.error(f"协调者处理 {method} 出错：{e}")
+                    self._send(500, {'error': str(e)})
+
+            def do_GET(self):
+                self._dispatch({})
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                try:
+                    params = json.loads(self.rfile.read(length).decode('utf-8')) if length else {}
+                except ValueError:
+                    self._send(400, {'error': '请求体不是JSON'})
+                    return
+                self._dispatch(params)
+
+            def _send(self, code, data):
+                body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+                self.send_response(code)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='work-queue', daemon=True)
+        self.thread.start()
+        return self
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def stop(self):
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+
+
+def print_stats(stats):
+    print(f"待处理 {stats['pending']}，租用中 {stats['leased']}，已完成 {stats['done']}，"
+          f"失败 {stats['failed']}，回收 {stats['reclaimed']} 次")
+    for w in stats['workers']:
+        state = '在线' if w['alive'] else '离线'
+        print(f"  {w['worker_id']:<30} {state}  完成 {w['completed']:<4} 失败 {w['failed']:<4} "
+              f"上次心跳 {w['seconds_since_heartbeat']:.0f} 秒前")
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] not in ('init', 'serve', 'stats'):
+        print(__doc__)
+        return
+
+    def option(name, default=None):
+        return args[args.index(name) + 1] if name in args and args.index(name) + 1 < len(args) else default
+
+    db_path = option('--db', os.path.join('ieee_results', QUEUE_FILENAME))
+
+    if args[0] == 'stats' and len(args) > 1 and args[1].startswith('http'):
+        print_stats(RemoteWorkQueue(args[1]).stats())
+        return
+
+    if args[0] == 'init':
+        import csv
+
+        csv_file = option('--csv', 'IEEE_Xplore_检索式汇总_修正版.csv')
+        with open(csv_file, 'r', encoding='utf-8') as f:
+            queries = [{'id': row['编号'], 'text': row['检索式'].strip('"')} for row in csv.DictReader(f)]
+        if option('--queries'):
+            wanted = set(option('--queries').split(','))
+            queries = [q for q in queries if q['id'] in wanted]
+        if '--skip-completed' in args and os.path.exists('crawl_progress.json'):
+            with open('crawl_progress.json', 'r', encoding='utf-8') as f:
+                completed = set(json.load(f).get('completed', []))
+            queries = [q for q in queries if q['id'] not in completed]
+        queue = WorkQueue(db_path)
+        added = queue.enqueue((q['id'], q) for q in queries)
+        print(f"✓ 加入队列 {added} 个检索式（{len(queries) - added} 个已在队列中）")
+        print_stats(queue.stats())
+        return
+
+    if args[0] == 'stats':
+        print_stats(WorkQueue(db_path).stats())
+        return
+
+    from corpus_manifest import CorpusManifest, MANIFEST_FILENAME
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    manifest = CorpusManifest(os.path.join('ieee_results', MANIFEST_FILENAME), 'ieee_results', 'ieee_pdfs')
+    lease_seconds = int(option('--lease', DEFAULT_LEASE_SECONDS))
+    queue = WorkQueue(db_path, lease_seconds=lease_seconds, manifest=manifest)
+    server = CoordinatorServer(queue, option('--host', '127.0.0.1'), int(option('--port', DEFAULT_QUEUE_PORT))).start()
+    print(f"✓ 协调者已启动：{server.url}（租约 {lease_seconds} 秒）")
+    print(f"  工作者：python ieee_crawler.py --worker {server.url}")
+    try:
+        while True:
+            time.sleep(60)
+            queue.reclaim_expired()
+            stats = queue.stats()
+            logging.info(f"队列：待处理 {stats['pending']}，租用中 {stats['leased']}，已完成 {stats['done']}，"
+                         f"失败 {stats['failed']}")
+    except KeyboardInterrupt:
+        server.stop()
+        print("\n协调者已停止")
+
+
+if __name__ == "__main__":
+    main()